@@ -54,6 +54,17 @@ interface BlockedDateResponse {
   reason?: string;
 }
 
+interface DashboardSummary {
+  today: DailyStats;
+  week: RevenueStats;
+  month: RevenueStats;
+  popular_services: ServicePopularity[];
+  schedules: ScheduleItem[];
+  blocked_dates: BlockedDateResponse[];
+  appointments: Appointment[];
+  next_cursor?: string | null;
+}
+
 @Component({
   selector: 'app-worker-dashboard',
   standalone: true,
@@ -132,24 +143,55 @@ export class WorkerDashboardComponent implements OnInit {
   loadAllData(): void {
     this.loading = true;
     Promise.all([
-      this.loadAppointments(),
-      this.loadDailyStats(),
-      this.loadWeekStats(),
-      this.loadMonthStats(),
-      this.loadPopularServices(),
-      this.loadServices(),
-      this.loadSchedules(),
-      this.loadBlockedDates()
+      this.loadDashboardSummary(),
+      this.loadServices()
     ]).finally(() => {
       this.loading = false;
       this.cdr.detectChanges();
     });
   }
 
+  // Citas, estadísticas, horario y bloqueos en una sola petición
+  loadDashboardSummary(): Promise<void> {
+    return new Promise((resolve, reject) => {
+      const token = this.authService.getToken();
+      this.http.get<DashboardSummary>(
+        `${environment.apiUrl}/dashboard/summary?services_limit=5`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      ).subscribe({
+        next: (summary) => {
+          this.appointments = summary.appointments;
+          this.filterAppointments();
+          this.dailyStats = summary.today;
+          this.weekStats = summary.week;
+          this.monthStats = summary.month;
+          this.popularServices = summary.popular_services;
+          this.schedules = this.formatSchedules(summary.schedules);
+          this.blockedDates = summary.blocked_dates;
+          resolve();
+        },
+        error: (err) => {
+          console.error('Error loading dashboard summary:', err);
+          this.toastService.error('Error al cargar el dashboard');
+          reject(err);
+        }
+      });
+    });
+  }
+
   // ═══════════════════════════════════════════════════
   // HORARIOS (NUEVO)
   // ═══════════════════════════════════════════════════
 
+  // Asegurar formato HH:MM para inputs time (cortar segundos si vienen)
+  private formatSchedules(data: ScheduleItem[]): ScheduleItem[] {
+    return data.map(s => ({
+      ...s,
+      start_time: s.start_time.substring(0, 5),
+      end_time: s.end_time.substring(0, 5)
+    }));
+  }
+
   loadSchedules(): Promise<void> {
     return new Promise((resolve, reject) => {
       const token = this.authService.getToken();
@@ -158,12 +200,7 @@ export class WorkerDashboardComponent implements OnInit {
         { headers: { Authorization: `Bearer ${token}` } }
       ).subscribe({
         next: (data) => {
-          // Asegurar formato HH:MM para inputs time (cortar segundos si vienen)
-          this.schedules = data.map(s => ({
-            ...s,
-            start_time: s.start_time.substring(0, 5),
-            end_time: s.end_time.substring(0, 5)
-          }));
+          this.schedules = this.formatSchedules(data);
           resolve();
         },
         error: (err) => {
@@ -33,37 +33,53 @@ oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=
 
 
 from app.models.worker import Worker
+from app.utils.identity_cache import attach_snapshot, identity_cache, snapshot_of
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+
+def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
     """
-    Dependency para obtener el usuario actual desde el token JWT
+    Dependency que decodifica el token JWT una sola vez por request
+    (FastAPI la comparte entre `get_current_user` y `get_current_worker`).
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Decodificar token
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    
-    if email is None:
-        raise credentials_exception
-    
-    # Buscar usuario en la base de datos
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+def resolve_user(db: Session, email: str) -> Optional[User]:
+    """Busca el usuario por email usando el cache de identidad"""
+    snapshot = identity_cache.get(email, "user")
+    if snapshot is not None:
+        return attach_snapshot(db, User, snapshot)
+
     statement = select(User).where(User.email == email)
     result = db.execute(statement)
     user = result.scalar_one_or_none()
+    if user is not None:
+        identity_cache.set(email, "user", snapshot_of(user))
+    return user
+
+
+def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency para obtener el usuario actual desde el token JWT
+    """
+    user = resolve_user(db, payload["sub"])
     
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     if not user.is_active:
         raise HTTPException(
@@ -75,23 +91,40 @@ def get_current_user(
 
 def get_current_worker(
     current_user: User = Depends(get_current_user),
+    payload: dict = Depends(get_token_payload),
     db: Session = Depends(get_db)
 ) -> Worker:
     """
-    Dependency para obtener el perfil de Worker del usuario actual usando su email.
+    Dependency para obtener el perfil de Worker del usuario actual.
+
+    Si el token trae el claim `worker_id` se busca por clave primaria;
+    los tokens viejos (sin el claim) siguen resolviéndose por email.
     """
     if current_user.role not in ['worker', 'admin']:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Se requiere rol de worker para esta operación."
         )
-        
-    worker = db.query(Worker).filter(Worker.email == current_user.email).first()
+
+    snapshot = identity_cache.get(current_user.email, "worker")
+    if snapshot is not None:
+        return attach_snapshot(db, Worker, snapshot)
+
+    worker = None
+    worker_id = payload.get("worker_id")
+    if worker_id is not None:
+        worker = db.get(Worker, worker_id)
+        if worker is not None and worker.email != current_user.email:
+            # El worker cambió de email después del login
+            worker = None
+    if worker is None:
+        worker = db.query(Worker).filter(Worker.email == current_user.email).first()
     if not worker:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="El usuario no tiene un perfil de worker asociado."
         )
+    identity_cache.set(current_user.email, "worker", snapshot_of(worker))
     return worker
 
 
@@ -112,9 +145,7 @@ def get_optional_user(
         email: str = payload.get("sub")
         if not email:
             return None
-        statement = select(User).where(User.email == email)
-        result = db.execute(statement)
-        user = result.scalar_one_or_none()
+        user = resolve_user(db, email)
         if user and user.is_active:
             return user
         return None
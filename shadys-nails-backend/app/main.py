@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -15,6 +16,7 @@ from app.routers.additional import router as additional_router
 from app.routers.auth import router as auth_router
 from app.routers.stats import router as stats_router
 from app.routers.schedule import router as schedule_router # Nuevo router
+from app.routers.dashboard import router as dashboard_router
 
 
 
@@ -29,6 +31,20 @@ with engine.connect() as conn:
 
 
 from init_prod import init_production_data
+from app.utils.periodic import run_periodically
+from app.utils.idempotency import purge_expired_keys
+from app.utils.security import password_pool
+from app.utils.email_outbox import email_sender_wakeup, process_outbox_async
+from app.utils.email_transport import email_transport
+from app.utils.reminders import reminder_scheduler
+from app.utils.pending_expiry import expire_stale_pending
+from app.utils.settings import settings_store
+
+IDEMPOTENCY_SWEEP_INTERVAL_SECONDS = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL_SECONDS", "3600"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+SETTINGS_WATCH_INTERVAL_SECONDS = float(os.getenv("SETTINGS_WATCH_INTERVAL_SECONDS", "10"))
+REMINDER_TICK_SECONDS = float(os.getenv("REMINDER_TICK_SECONDS", "30"))
+PENDING_EXPIRY_INTERVAL_SECONDS = float(os.getenv("PENDING_EXPIRY_INTERVAL_SECONDS", "300"))
 
 # ─────────────────────────────────────────────
 # Definir Lifespan (Carga de datos al iniciar)
@@ -40,8 +56,38 @@ async def lifespan(app: FastAPI):
         init_production_data()
     except Exception as e:
         print(f"⚠️ Error en init_production_data: {e}")
+
+    # Cliente HTTP de correos en el event loop del servidor
+    email_transport.start()
+
+    # Tareas periódicas en segundo plano
+    background = [
+        asyncio.create_task(run_periodically(
+            "idempotency-sweep", IDEMPOTENCY_SWEEP_INTERVAL_SECONDS, purge_expired_keys
+        )),
+        asyncio.create_task(run_periodically(
+            "email-sender", EMAIL_OUTBOX_POLL_SECONDS, process_outbox_async, wakeup=email_sender_wakeup
+        )),
+        asyncio.create_task(run_periodically(
+            "settings-watcher", SETTINGS_WATCH_INTERVAL_SECONDS, settings_store.reload_if_changed
+        )),
+        asyncio.create_task(run_periodically(
+            "reminders", REMINDER_TICK_SECONDS, reminder_scheduler.tick
+        )),
+        asyncio.create_task(run_periodically(
+            "pending-expiry", PENDING_EXPIRY_INTERVAL_SECONDS, expire_stale_pending
+        )),
+    ]
     yield
 
+    for task in background:
+        task.cancel()
+    # Libera el hilo del sender que espera el próximo intervalo
+    email_sender_wakeup.set()
+    await asyncio.gather(*background, return_exceptions=True)
+    await email_transport.aclose()
+    password_pool.shutdown(wait=False, cancel_futures=True)
+
 # ─────────────────────────────────────────────
 # Crear aplicación FastAPI
 # ─────────────────────────────────────────────
@@ -68,7 +114,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    expose_headers=["*", "X-Next-Cursor"],  # "*" no aplica con credenciales
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
@@ -82,6 +128,7 @@ app.include_router(customer_router)
 app.include_router(additional_router)
 app.include_router(stats_router)
 app.include_router(schedule_router)  # Nuevo: horarios
+app.include_router(dashboard_router)  # Resumen del dashboard en una sola llamada
 # ─────────────────────────────────────────────
 # Crear tablas en PostgreSQL
 # ─────────────────────────────────────────────
@@ -3,4 +3,5 @@ from app.models.worker import Worker
 from app.models.service import Service
 from app.models.additional import Additional
 from app.models.appointment import Appointment
-print("📦 Modelos cargados: Customer, Worker, Service, Additional, Appointment")
\ No newline at end of file
+from app.models.daily_worker_stats import DailyWorkerStats
+print("📦 Modelos cargados: Customer, Worker, Service, Additional, Appointment, DailyWorkerStats")
\ No newline at end of file
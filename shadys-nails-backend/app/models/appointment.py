@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, Date, Time, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,6 +18,14 @@ class Appointment(Base):
     date = Column(Date, nullable=False)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
+
+    # Precios y duración al momento de reservar/editar: las estadísticas usan
+    # estos valores, así cambiar el precio de un servicio no altera el histórico
+    service_price = Column(Integer, nullable=True)
+    additional_price = Column(Integer, nullable=True)  # NULL si no tiene adicional
+    duration_minutes = Column(Integer, nullable=True)  # servicio + adicional
+    # Los cruces entre citas no canceladas también los bloquea la restricción
+    # appointments_no_overlap (ver migrations/004_appointments_no_overlap.sql)
     status = Column(String(20), default="confirmed")
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -28,6 +36,15 @@ class Appointment(Base):
     service = relationship("Service", back_populates="appointments")
     additional = relationship("Additional", back_populates="appointments")
 
+    __table_args__ = (
+        # Listados por worker ordenados por fecha/hora (paginación por keyset)
+        Index("ix_appointments_worker_date_start", "worker_id", "date", "start_time"),
+        # Citas confirmadas de los próximos días (recordatorios)
+        Index("ix_appointments_status_date_start", "status", "date", "start_time"),
+        # Solicitudes pendientes más viejas que el TTL (app/utils/pending_expiry.py)
+        Index("ix_appointments_status_created", "status", "created_at"),
+    )
+
     @property
     def worker_name(self):
         return self.worker.name if self.worker else None
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+print("📦 Cargando modelo AppointmentReminder")
+
+class AppointmentReminder(Base):
+    """
+    Marca de recordatorio enviado ("tu cita es mañana", "en 2 horas").
+
+    Se inserta en la misma transacción que el correo en el outbox: si el
+    servidor se reinicia, el scheduler de app/utils/reminders.py ve la marca y
+    no lo vuelve a enviar. `starts_at` es el inicio de la cita al enviarlo; si
+    la cita se reprograma, la nueva hora tiene sus propios recordatorios.
+    """
+    __tablename__ = "appointment_reminders"
+    __table_args__ = (
+        # También evita que dos procesos envíen el mismo recordatorio
+        UniqueConstraint("appointment_id", "kind", "starts_at", name="uq_appointment_reminders_kind_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(20), nullable=False)  # 'day_before' | 'two_hours'
+    starts_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+print("📦 Cargando modelo DailyWorkerStats")
+
+class DailyWorkerStats(Base):
+    """
+    Resumen diario de citas por worker (rollup).
+    Se actualiza en cada cambio de cita (app/utils/daily_stats.py) y se puede
+    recalcular desde cero con rebuild_daily_stats.py.
+    """
+    __tablename__ = "daily_worker_stats"
+
+    worker_id = Column(Integer, ForeignKey("workers.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    total_count = Column(Integer, nullable=False, default=0, server_default="0")
+    pending_count = Column(Integer, nullable=False, default=0, server_default="0")
+    confirmed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    cancelled_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Servicio + adicional de todas las citas del día (incluye canceladas)
+    estimated_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+    # Solo citas completadas
+    actual_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+    # Citas pendientes + confirmadas
+    pending_revenue = Column(Integer, nullable=False, default=0, server_default="0")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+print("📦 Cargando modelo EmailOutbox")
+
+class EmailOutbox(Base):
+    """
+    Correo pendiente de envío.
+
+    Se inserta en la misma transacción que el cambio que lo origina (ej. crear
+    una cita), así que si el commit falla no queda correo y si el servidor se
+    reinicia no se pierde. Lo envía el sender de app/utils/email_outbox.py.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Consulta del sender: status pendiente y next_attempt_at vencido
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        # Limpieza: status 'sent' y sent_at más viejo que la retención
+        Index("ix_email_outbox_status_sent_at", "status", "sent_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body_html = Column(Text, nullable=False)
+
+    # 'pending', 'sending' (reclamado por un sender), 'sent' o 'failed'
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    # Próximo intento; para 'sending' es el vencimiento del reclamo
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, PrimaryKeyConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+print("📦 Cargando modelo IdempotencyKey")
+
+class IdempotencyKey(Base):
+    """
+    Respuesta guardada de un POST con header Idempotency-Key.
+    Si el cliente reintenta con la misma clave se devuelve esta respuesta.
+    Las claves son de cada customer: otro customer puede usar la misma clave.
+    """
+    __tablename__ = "idempotency_keys"
+
+    customer_id = Column(Integer, nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 del body
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        # Ver migrations/012_idempotency_keys_per_customer.sql
+        PrimaryKeyConstraint('customer_id', 'key', name='idempotency_keys_pkey'),
+    )
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Header, Query, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
 from datetime import date, time, datetime, timedelta
-from typing import Optional
+from typing import Annotated, Optional, Union
 from pydantic import BaseModel
 
-from app.database import get_db, SessionLocal
+from app.database import get_db
 from app.models.appointment import Appointment
 from app.dependencies import get_current_user, get_current_worker, get_optional_user
 from app.models.worker import Worker
@@ -13,12 +16,23 @@ from app.models.user import User
 from app.utils.appointment_validation import (
     validate_appointment_time,
     calculate_end_time,
-    get_total_duration,
-    validate_future_date
+    get_price_snapshot,
+    validate_future_date,
+    commit_appointment,
+    flush_appointment
 )
-from app.utils.entity_validation import validate_all_entities
+from app.utils.entity_validation import (
+    validate_all_entities,
+    load_appointment_entities,
+    validate_loaded_entities
+)
+from app.utils.availability_cache import availability_cache
+from app.utils.idempotency import hash_request, get_stored_response, store_response
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.daily_stats import contribution_of, record_stats_change
+from app.utils.email_outbox import OutboxEmail, enqueue_email, enqueue_emails, wake_email_sender
+from app.utils.reminders import reminder_scheduler
 from app.utils.email_service import (
-    send_email, 
     get_confirmation_template, 
     get_cancellation_template, 
     get_update_template,
@@ -28,6 +42,7 @@ from app.utils.email_service import (
 )
 from app.models.customer import Customer
 from app.models.service import Service
+from app.models.additional import Additional
 
 router = APIRouter(
     prefix="/appointments",
@@ -86,6 +101,9 @@ class AppointmentResponse(BaseModel):
     end_time: time
     status: str
     notes: Optional[str]
+    service_price: Optional[int] = None
+    additional_price: Optional[int] = None
+    duration_minutes: Optional[int] = None
     
     # Objetos anidados en lugar de nombres sueltos
     customer: Optional[CustomerSimple] = None
@@ -96,6 +114,29 @@ class AppointmentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AppointmentCompact(BaseModel):
+    """
+    Fila de la vista compacta de GET /appointments (view=compact o fields=).
+    Solo vienen las columnas pedidas; sin `fields` vienen todas.
+    """
+    id: Optional[int] = None
+    worker_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    service_id: Optional[int] = None
+    additional_id: Optional[int] = None
+    date: Optional[date] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    service_price: Optional[int] = None
+    additional_price: Optional[int] = None
+    duration_minutes: Optional[int] = None
+    worker_name: Optional[str] = None
+    customer_name: Optional[str] = None
+    service_name: Optional[str] = None
+    additional_name: Optional[str] = None
+
 class AppointmentUpdate(BaseModel):
     """Schema para actualizar una cita existente"""
     worker_id: Optional[int] = None
@@ -111,12 +152,76 @@ class AppointmentUpdate(BaseModel):
 # ENDPOINTS
 # ═══════════════════════════════════════════════════
 
+# Paginación de GET /appointments
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def enqueue_new_appointment_emails(
+    db: Session,
+    appointment: Appointment,
+    customer: Customer,
+    service: Service,
+    worker: Worker
+) -> None:
+    """Agrega al outbox (un solo INSERT) el aviso al cliente y a la manicurista de una cita nueva"""
+    emails = []
+    if customer.email:
+        emails.append(OutboxEmail(
+            subject="⏳ Hemos recibido tu solicitud - Shady's Nails",
+            recipient=customer.email,
+            body_html=get_request_received_template(
+                customer_name=customer.name,
+                service_name=service.name,
+                date=str(appointment.date),
+                time=str(appointment.start_time)
+            )
+        ))
+    else:
+        print(f"⚠️ El customer ID={customer.id} no tiene email registrado, se omite su notificación")
+
+    if worker and worker.email:
+        emails.append(OutboxEmail(
+            subject="💅 Tienes una nueva solicitud de cita",
+            recipient=worker.email,
+            body_html=get_new_appointment_request_admin_template(
+                worker_name=worker.name,
+                customer_name=customer.name,
+                service_name=service.name,
+                date=str(appointment.date),
+                time=str(appointment.start_time)
+            )
+        ))
+    else:
+        print("⚠️ Worker no tiene email, se omite notificación a manicurista")
+
+    enqueue_emails(db, emails)
+
+
+def get_appointment_for_update(db: Session, appointment_id: int) -> Optional[Appointment]:
+    """
+    Carga la cita con FOR UPDATE para cambiarla.
+
+    El delta de daily_worker_stats se calcula con el estado leído aquí: sin
+    el lock, dos cambios simultáneos (o el vencimiento de pendientes) restarían
+    el mismo estado anterior y el rollup quedaría descuadrado. El lock dura
+    hasta el commit o rollback de la petición.
+    """
+    return (
+        db.query(Appointment)
+        .filter(Appointment.id == appointment_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
 @router.post("", response_model=AppointmentResponse, status_code=201)
 def create_appointment(
     data: AppointmentCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_optional_user)
+    current_user: User = Depends(get_optional_user),
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)] = None
 ):
     """
     Crea una nueva cita con validaciones automáticas:
@@ -127,17 +232,39 @@ def create_appointment(
     - Valida horarios (9am-8:59pm inicio, 11pm fin máximo)
     - Evita cruces con otras citas del mismo worker
     - Asocia la cita al usuario autenticado (si existe)
+    
+    Con el header Idempotency-Key, un reintento con la misma clave y los mismos
+    datos devuelve la respuesta original sin validar ni enviar correos de nuevo.
+    La clave es de cada customer (`customer_id`).
     """
     
+    # Reintento de una petición ya procesada: devolver la respuesta guardada
+    request_hash = None
+    if idempotency_key:
+        request_hash = hash_request(data)
+        stored_response = get_stored_response(db, data.customer_id, idempotency_key, request_hash)
+        if stored_response:
+            print(f"🔁 Idempotency-Key repetida, se devuelve la respuesta guardada: {idempotency_key}")
+            return stored_response
+    
+    # Worker, customer, service y additional en UNA sola consulta; se reutilizan
+    # para validar, calcular la duración y armar la respuesta
+    entities = load_appointment_entities(
+        worker_id=data.worker_id,
+        customer_id=data.customer_id,
+        service_id=data.service_id,
+        additional_id=data.additional_id,
+        db=db
+    )
+    
     # VALIDACIÓN 1: Auto-crear customer si no existe pero el user sí
-    from app.models.user import User
-    customer = db.query(Customer).filter(Customer.id == data.customer_id).first()
+    customer = entities.customer
     
     if not customer:
         # Intentar encontrar el usuario correspondiente
         user = db.query(User).filter(User.id == data.customer_id).first()
         if user:
-            # Auto-crear customer desde user
+            # Auto-crear customer desde user (se guarda junto con la cita)
             customer = Customer(
                 id=user.id,
                 name=user.name,
@@ -145,8 +272,7 @@ def create_appointment(
                 email=user.email
             )
             db.add(customer)
-            db.commit()
-            db.refresh(customer)
+            entities = entities._replace(customer=customer)
             print(f"✅ Auto-creado customer ID {customer.id} desde user")
         else:
             raise HTTPException(
@@ -155,24 +281,19 @@ def create_appointment(
             )
     
     # VALIDACIÓN 2: Verificar que worker y service existan
-    validate_all_entities(
+    validate_loaded_entities(
+        entities,
         worker_id=data.worker_id,
         customer_id=data.customer_id,
         service_id=data.service_id,
-        additional_id=data.additional_id,
-        db=db
+        additional_id=data.additional_id
     )
     
     # VALIDACIÓN 2: Verificar que la fecha no sea en el pasado
     validate_future_date(data.date)
     
     # Calcular duración total y hora de fin
-    additional_id_value = data.additional_id if data.additional_id is not None else 0
-    total_duration = get_total_duration(
-        service_id=data.service_id,
-        additional_id=additional_id_value,
-        db=db
-    )
+    total_duration = entities.total_duration
     
     end_time = calculate_end_time(data.start_time, total_duration)
     
@@ -194,95 +315,151 @@ def create_appointment(
         start_time=data.start_time,
         end_time=end_time,
         status="pending", # Cambiado de confirmed a pending para que Gina la apruebe
-        notes=data.notes
+        notes=data.notes,
+        # Precios y duración de hoy; las estadísticas usan estos valores
+        service_price=entities.service.price,
+        additional_price=entities.additional.price if entities.additional else None,
+        duration_minutes=total_duration
     )
+    # Relaciones ya cargadas: la respuesta no necesita lazy-loads
+    new_appointment.worker = entities.worker
+    new_appointment.customer = customer
+    new_appointment.service = entities.service
+    new_appointment.additional = entities.additional
     
     db.add(new_appointment)
-    db.commit()
-    db.refresh(new_appointment)
-    
-    # 📧 ENVIAR CORREOS DE NOTIFICACIÓN EN SEGUNDO PLANO
-    def process_appointment_emails(appointment_id: int):
-        from app.models.customer import Customer as CustomerModel
-        from app.models.service import Service as ServiceModel
-        from app.models.worker import Worker as WorkerModel
-
-        bg_db = SessionLocal()
-        try:
-            print(f"📧 [EMAIL TASK] Procesando emails para cita ID={appointment_id}")
-
-            appt = bg_db.query(Appointment).filter(Appointment.id == appointment_id).first()
-            if not appt:
-                print(f"❌ [EMAIL TASK] Cita ID={appointment_id} no encontrada en DB")
-                return
-
-            # Consultas explícitas para evitar lazy-load en hilos
-            customer = bg_db.query(CustomerModel).filter(CustomerModel.id == appt.customer_id).first()
-            service  = bg_db.query(ServiceModel).filter(ServiceModel.id == appt.service_id).first()
-            worker   = bg_db.query(WorkerModel).filter(WorkerModel.id == appt.worker_id).first()
-
-            print(f"📧 [EMAIL TASK] customer={customer and customer.email} | service={service and service.name} | worker={worker and worker.email}")
-
-            if not customer:
-                print(f"❌ [EMAIL TASK] No se encontró el customer ID={appt.customer_id}")
-                return
-            if not customer.email:
-                print(f"❌ [EMAIL TASK] El customer ID={customer.id} no tiene email registrado")
-                return
-            if not service:
-                print(f"❌ [EMAIL TASK] No se encontró el servicio ID={appt.service_id}")
-                return
-
-            # 1. Correo al Cliente
-            print(f"📤 [EMAIL TASK] Enviando correo al cliente: {customer.email}")
-            cust_body = get_request_received_template(
-                customer_name=customer.name,
-                service_name=service.name,
-                date=str(appt.date),
-                time=str(appt.start_time)
-            )
-            send_email(
-                subject="⏳ Hemos recibido tu solicitud - Shady's Nails",
-                recipient=customer.email,
-                body_html=cust_body
+    try:
+        record_stats_change(db, None, contribution_of(new_appointment))
+        # 📧 Correos al cliente y a la manicurista, en la misma transacción
+        enqueue_new_appointment_emails(db, new_appointment, customer, entities.service, entities.worker)
+        if idempotency_key:
+            # Se necesita el id de la cita para guardar la respuesta en la misma transacción
+            flush_appointment(db)
+            store_response(
+                db, data.customer_id, idempotency_key, request_hash, 201,
+                AppointmentResponse.model_validate(new_appointment).model_dump(mode="json")
             )
-
-            # 2. Correo a la Manicurista
-            if worker and worker.email:
-                print(f"📤 [EMAIL TASK] Enviando correo a la manicurista: {worker.email}")
-                admin_body = get_new_appointment_request_admin_template(
-                    worker_name=worker.name,
-                    customer_name=customer.name,
-                    service_name=service.name,
-                    date=str(appt.date),
-                    time=str(appt.start_time)
-                )
-                send_email(
-                    subject="💅 Tienes una nueva solicitud de cita",
-                    recipient=worker.email,
-                    body_html=admin_body
-                )
-            else:
-                print(f"⚠️ [EMAIL TASK] Worker no tiene email, se omite notificación a manicurista")
-
-            print(f"✅ [EMAIL TASK] Emails encolados correctamente para cita ID={appointment_id}")
-
-        except Exception as e:
-            import traceback
-            print(f"❌ [EMAIL TASK] Error inesperado: {e}")
-            print(traceback.format_exc())
+        # Sin expirar tras el commit no hace falta db.refresh() para responder.
+        # La sesión es de toda la petición: se restaura apenas termina el commit
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
+        try:
+            commit_appointment(db)
         finally:
-            bg_db.close()
-
-    background_tasks.add_task(process_appointment_emails, new_appointment.id)
+            db.expire_on_commit = expire_on_commit
+    except (HTTPException, IntegrityError):
+        # Dos reintentos simultáneos con la misma clave: el primero ganó
+        if idempotency_key:
+            stored_response = get_stored_response(db, data.customer_id, idempotency_key, request_hash)
+            if stored_response:
+                return stored_response
+        raise
+    availability_cache.invalidate_day(new_appointment.worker_id, new_appointment.date)
+    reminder_scheduler.appointment_changed(new_appointment)
+    
+    # 📧 El sender del outbox envía los correos apenas se responde la petición
+    background_tasks.add_task(wake_email_sender)
     
     return new_appointment
 
 
-@router.get("", response_model=list[AppointmentResponse])
+# Columnas disponibles en la vista compacta (view=compact / fields=)
+COMPACT_COLUMNS = {
+    "id": Appointment.id,
+    "worker_id": Appointment.worker_id,
+    "customer_id": Appointment.customer_id,
+    "service_id": Appointment.service_id,
+    "additional_id": Appointment.additional_id,
+    "date": Appointment.date,
+    "start_time": Appointment.start_time,
+    "end_time": Appointment.end_time,
+    "status": Appointment.status,
+    "notes": Appointment.notes,
+    "service_price": Appointment.service_price,
+    "additional_price": Appointment.additional_price,
+    "duration_minutes": Appointment.duration_minutes,
+    "worker_name": Worker.name,
+    "customer_name": Customer.name,
+    "service_name": Service.name,
+    "additional_name": Additional.name,
+}
+# Columnas de fecha/hora que se envían como texto ISO
+COMPACT_ISO_COLUMNS = {"date", "start_time", "end_time"}
+
+
+def _parse_compact_fields(fields: Optional[str]) -> list[str]:
+    """Valida `fields=` (separados por coma); sin valor devuelve todas las columnas"""
+    if not fields:
+        return list(COMPACT_COLUMNS)
+    
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in COMPACT_COLUMNS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos no válidos: {', '.join(unknown) or fields}. Disponibles: {', '.join(COMPACT_COLUMNS)}"
+        )
+    return list(dict.fromkeys(names))
+
+
+def _list_compact(db: Session, conditions: list, fields: list[str], limit: Optional[int]) -> JSONResponse:
+    """
+    Vista compacta: un SELECT de Core solo con las columnas pedidas y los nombres
+    unidos por JOIN. Se serializa directo desde las tuplas, sin objetos del ORM.
+    """
+    # Las columnas del keyset van siempre al final para poder armar el cursor
+    stmt = (
+        select(*(COMPACT_COLUMNS[name] for name in fields), Appointment.date, Appointment.start_time, Appointment.id)
+        .select_from(Appointment)
+        .join(Worker, Worker.id == Appointment.worker_id)
+        .join(Customer, Customer.id == Appointment.customer_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .outerjoin(Additional, Additional.id == Appointment.additional_id)
+        .where(*conditions)
+        .order_by(Appointment.date, Appointment.start_time, Appointment.id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    
+    rows = db.execute(stmt).all()
+    
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(*rows[-1][-3:])
+    
+    iso_positions = [i for i, name in enumerate(fields) if name in COMPACT_ISO_COLUMNS]
+    content = []
+    for row in rows:
+        values = list(row[:len(fields)])
+        for i in iso_positions:
+            values[i] = values[i].isoformat()
+        content.append(dict(zip(fields, values)))
+    
+    return JSONResponse(content=content, headers=headers)
+
+
+# La vista compacta se serializa a mano (JSONResponse), así que no hay un
+# response_model que FastAPI valide: el esquema solo documenta ambas formas
+@router.get(
+    "",
+    response_model=None,
+    responses={200: {
+        "model": Union[list[AppointmentResponse], list[AppointmentCompact]],
+        "description": "Citas completas, o planas con view=compact / fields="
+    }}
+)
 def list_appointments(
+    response: Response,
     worker_id: Optional[int] = None,
     date: Optional[date] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: Optional[str] = Query(None, pattern="^(full|compact)$"),
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -291,26 +468,65 @@ def list_appointments(
     - Sin autenticación: todas las citas
     - Customers: solo sus propias citas
     - Workers: todas las citas (con filtros opcionales)
+    
+    Ordenadas por fecha, hora de inicio e id. Con `limit` se pagina: si hay más
+    resultados, el header `X-Next-Cursor` trae el valor para pedir la siguiente
+    página con `cursor`.
+    
+    Con `view=compact` (o `fields=id,date,...`) cada cita es un objeto plano con
+    solo esas columnas y los nombres de worker/customer/servicio/adicional, sin
+    objetos anidados.
     """
-    query = db.query(Appointment).options(
-        joinedload(Appointment.worker),
-        joinedload(Appointment.customer),
-        joinedload(Appointment.service),
-        joinedload(Appointment.additional)
-    )
+    conditions = []
     
     # Si hay usuario autenticado y es customer, filtrar por user_id
     if current_user and hasattr(current_user, 'role') and current_user.role == 'customer':
-        query = query.filter(Appointment.user_id == current_user.id)
+        conditions.append(Appointment.user_id == current_user.id)
     
     # Filtros opcionales para workers o sin autenticación
     if worker_id:
-        query = query.filter(Appointment.worker_id == worker_id)
+        conditions.append(Appointment.worker_id == worker_id)
     
     if date:
-        query = query.filter(Appointment.date == date)
+        conditions.append(Appointment.date == date)
     
-    return query.all()
+    if date_from:
+        conditions.append(Appointment.date >= date_from)
+    
+    if date_to:
+        conditions.append(Appointment.date <= date_to)
+    
+    if status:
+        conditions.append(Appointment.status == status)
+    
+    # Keyset: solo filas posteriores a la última de la página anterior
+    if cursor:
+        conditions.append(
+            tuple_(Appointment.date, Appointment.start_time, Appointment.id) > decode_cursor(cursor)
+        )
+        limit = limit or DEFAULT_PAGE_SIZE
+    
+    if view == "compact" or fields:
+        return _list_compact(db, conditions, _parse_compact_fields(fields), limit)
+    
+    query = db.query(Appointment).options(
+        joinedload(Appointment.worker),
+        joinedload(Appointment.customer),
+        joinedload(Appointment.service),
+        joinedload(Appointment.additional)
+    ).filter(*conditions).order_by(Appointment.date, Appointment.start_time, Appointment.id)
+    
+    if limit is None:
+        return [AppointmentResponse.model_validate(appointment) for appointment in query.all()]
+    
+    # Se pide una fila extra para saber si hay otra página
+    appointments = query.limit(limit + 1).all()
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.start_time, last.id)
+    
+    return [AppointmentResponse.model_validate(appointment) for appointment in appointments]
 
 
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
@@ -356,10 +572,8 @@ def update_appointment(
     Valida automáticamente horarios y conflictos.
     """
     
-    # 1️⃣ Buscar la cita existente
-    appointment = db.query(Appointment).filter(
-        Appointment.id == appointment_id
-    ).first()
+    # 1️⃣ Buscar la cita existente (bloqueada hasta el commit)
+    appointment = get_appointment_for_update(db, appointment_id)
     
     if not appointment:
         raise HTTPException(
@@ -397,10 +611,11 @@ def update_appointment(
     
     start_time_val = data.start_time if data.start_time is not None else appointment.start_time
     
-    # 4️⃣ Recalcular duración y end_time si cambió el servicio o adicional
+    # 4️⃣ Recalcular duración, end_time y precios si cambió el servicio o adicional
+    price_snapshot = None
     if data.service_id or data.additional_id is not None:
-        duration = get_total_duration(service_id, additional_id, db)
-        end_time_val = calculate_end_time(start_time_val, duration)
+        price_snapshot = get_price_snapshot(service_id, additional_id, db)
+        end_time_val = calculate_end_time(start_time_val, price_snapshot.duration_minutes)
     else:
         end_time_val = appointment.end_time
     
@@ -415,6 +630,9 @@ def update_appointment(
     )
     
     # 6️⃣ Actualizar campos
+    previous_worker_id = appointment.worker_id
+    previous_date = appointment.date
+    previous_stats = contribution_of(appointment)
     appointment.worker_id = worker_id
     appointment.customer_id = customer_id
     appointment.service_id = service_id
@@ -423,20 +641,24 @@ def update_appointment(
     appointment.start_time = start_time_val
     appointment.end_time = end_time_val
     
+    if price_snapshot:
+        appointment.service_price = price_snapshot.service_price
+        appointment.additional_price = price_snapshot.additional_price
+        appointment.duration_minutes = price_snapshot.duration_minutes
+    
     if data.notes is not None:
         appointment.notes = data.notes
     
     if data.status is not None:
         appointment.status = data.status
     
-    # 7️⃣ Guardar cambios
-    db.commit()
-    db.refresh(appointment)
+    record_stats_change(db, previous_stats, contribution_of(appointment))
     
-    # 📧 ENVIAR CORREO DE ACTUALIZACIÓN
+    # 📧 CORREO DE ACTUALIZACIÓN (al outbox, en la misma transacción)
     try:
-        # Cargar relaciones si no están cargadas
-        if appointment.customer and appointment.customer.email and appointment.service:
+        customer = db.get(Customer, appointment.customer_id)
+        service = db.get(Service, appointment.service_id)
+        if customer and customer.email and service:
             # Determinar qué cambió para el mensaje
             changes_list = []
             if data.date is not None:
@@ -444,27 +666,38 @@ def update_appointment(
             if data.start_time is not None:
                 changes_list.append(f"Hora actualizada a {start_time_val}")
             if data.service_id is not None:
-                changes_list.append(f"Servicio cambiado a {appointment.service.name}")
-            if data.worker_id is not None and appointment.worker:
-                changes_list.append(f"Manicurista cambiada a {appointment.worker.name}")
+                changes_list.append(f"Servicio cambiado a {service.name}")
+            if data.worker_id is not None:
+                worker = db.get(Worker, appointment.worker_id)
+                if worker:
+                    changes_list.append(f"Manicurista cambiada a {worker.name}")
             
             changes_description = ". ".join(changes_list) if changes_list else "Se han actualizado los detalles de tu cita"
             
             body = get_update_template(
-                customer_name=appointment.customer.name,
-                service_name=appointment.service.name,
+                customer_name=customer.name,
+                service_name=service.name,
                 date=str(appointment.date),
                 time=str(appointment.start_time),
                 changes=changes_description
             )
-            send_email(
+            enqueue_email(
+                db,
                 subject="📝 Tu cita ha sido actualizada - Shady's Nails",
-                recipient=appointment.customer.email,
+                recipient=customer.email,
                 body_html=body
             )
     except Exception as email_err:
         print(f"⚠️ Error al preparar email de actualización: {email_err}")
     
+    # 7️⃣ Guardar cambios
+    commit_appointment(db)
+    db.refresh(appointment)
+    availability_cache.invalidate_day(previous_worker_id, previous_date)
+    availability_cache.invalidate_day(appointment.worker_id, appointment.date)
+    reminder_scheduler.appointment_changed(appointment)
+    wake_email_sender()
+    
     return appointment
 
 
@@ -479,9 +712,7 @@ def cancel_appointment(
     No elimina físicamente la cita para mantener historial.
     """
     
-    appointment = db.query(Appointment).filter(
-        Appointment.id == appointment_id
-    ).first()
+    appointment = get_appointment_for_update(db, appointment_id)
     
     if not appointment:
         raise HTTPException(
@@ -508,13 +739,12 @@ def cancel_appointment(
     
     # Guardar el status anterior antes de modificarlo
     previous_status = appointment.status
+    previous_stats = contribution_of(appointment)
     
     appointment.status = "cancelled"
+    record_stats_change(db, previous_stats, previous_stats._replace(status="cancelled"))
     
-    db.commit()
-    db.refresh(appointment)
-    
-    # 📧 ENVIAR CORREO DE CANCELACIÓN
+    # 📧 CORREO DE CANCELACIÓN (al outbox, en la misma transacción)
     try:
         if appointment.customer and appointment.customer.email:
             body = get_cancellation_template(
@@ -523,7 +753,8 @@ def cancel_appointment(
                 date=str(appointment.date),
                 time=str(appointment.start_time)
             )
-            send_email(
+            enqueue_email(
+                db,
                 subject="🚫 Cita Cancelada - Shady's Nails",
                 recipient=appointment.customer.email,
                 body_html=body
@@ -531,6 +762,12 @@ def cancel_appointment(
     except Exception as email_err:
         print(f"⚠️ Error al preparar email de cancelación: {email_err}")
     
+    db.commit()
+    db.refresh(appointment)
+    availability_cache.invalidate_day(appointment.worker_id, appointment.date)
+    reminder_scheduler.appointment_changed(appointment)
+    wake_email_sender()
+    
     return {
         "message": "Cita cancelada exitosamente",
         "appointment_id": appointment_id,
@@ -549,19 +786,28 @@ def confirm_appointment_status(
     """
     Confirma una cita (Pasa de 'pending' a 'confirmed').
     Solo accesible por workers.
+    
+    Si la cita ya no está pendiente (ej. la canceló el cliente o venció sin
+    confirmarse, ver app/utils/pending_expiry.py) responde 409.
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = get_appointment_for_update(db, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
     if appointment.status == 'confirmed':
         return appointment
 
+    if appointment.status != 'pending':
+        raise HTTPException(
+            status_code=409,
+            detail=f"La cita ya no está pendiente (status '{appointment.status}')"
+        )
+
+    previous_stats = contribution_of(appointment)
     appointment.status = 'confirmed'
-    db.commit()
-    db.refresh(appointment)
+    record_stats_change(db, previous_stats, previous_stats._replace(status='confirmed'))
 
-    # 📧 Notificar al cliente
+    # 📧 Notificar al cliente (al outbox, en la misma transacción)
     if appointment.customer and appointment.customer.email:
          # Usamos el mismo template de confirmación
         body = get_confirmation_template(
@@ -570,13 +816,19 @@ def confirm_appointment_status(
             date=str(appointment.date),
             time=str(appointment.start_time)
         )
-        background_tasks.add_task(
-            send_email,
+        enqueue_email(
+            db,
             subject="✅ ¡Tu cita ha sido aceptada! - Shady's Nails",
             recipient=appointment.customer.email,
             body_html=body
         )
 
+    commit_appointment(db)
+    db.refresh(appointment)
+    availability_cache.invalidate_day(appointment.worker_id, appointment.date)
+    reminder_scheduler.appointment_changed(appointment)
+    background_tasks.add_task(wake_email_sender)
+
     return appointment
 
 
@@ -590,26 +842,43 @@ def complete_appointment_status(
     """
     Marca una cita como completada (Pasa de 'confirmed' a 'completed').
     Solo accesible por workers.
+    
+    Una cita cancelada (o vencida sin confirmarse) no se puede completar: 409.
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = get_appointment_for_update(db, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
+    if appointment.status == 'completed':
+        return appointment
+
+    if appointment.status not in ('pending', 'confirmed'):
+        raise HTTPException(
+            status_code=409,
+            detail=f"No se puede completar una cita con status '{appointment.status}'"
+        )
+
+    previous_stats = contribution_of(appointment)
     appointment.status = 'completed'
-    db.commit()
-    db.refresh(appointment)
+    record_stats_change(db, previous_stats, previous_stats._replace(status='completed'))
 
-    # 📧 Notificar al cliente que su cita se completó
+    # 📧 Notificar al cliente que su cita se completó (al outbox, en la misma transacción)
     if appointment.customer and appointment.customer.email:
         body = get_completion_template(
             customer_name=appointment.customer.name,
             service_name=appointment.service.name if appointment.service else "Servicio"
         )
-        background_tasks.add_task(
-            send_email,
+        enqueue_email(
+            db,
             subject="✨ ¡Gracias por elegir Shady's Nails!",
             recipient=appointment.customer.email,
             body_html=body
         )
 
+    commit_appointment(db)
+    db.refresh(appointment)
+    availability_cache.invalidate_day(appointment.worker_id, appointment.date)
+    reminder_scheduler.appointment_changed(appointment)
+    background_tasks.add_task(wake_email_sender)
+
     return appointment
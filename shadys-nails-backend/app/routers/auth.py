@@ -6,18 +6,25 @@ Endpoints para login, registro y gestión de usuarios
 import random
 import string
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from app.database import get_db
 from app.models.user import User
+from app.models.worker import Worker
 from app.schemas.auth import (
     Token, UserResponse, LoginRequest, RegisterRequest, 
     UserUpdate, ForgotPasswordRequest, ResetPasswordRequest
 )
-from app.utils.security import verify_password, create_access_token, create_refresh_token, get_password_hash, decode_refresh_token
+from app.utils.security import (
+    create_access_token, create_refresh_token, decode_refresh_token,
+    hash_password_in_pool, run_in_password_pool, verify_and_update_password
+)
 from app.dependencies import get_current_user
+from app.utils.email_outbox import enqueue_email, wake_email_sender
 from app.utils.email_service import send_email, get_reset_password_template
 import os
 
@@ -27,6 +34,25 @@ router = APIRouter(
 )
 
 
+def build_token_data(user: User, db: Session) -> dict:
+    """
+    Claims del JWT. Para workers/admins incluye `worker_id` para que
+    `get_current_worker` busque por clave primaria en vez de por email.
+    """
+    token_data = {
+        "sub": user.email,
+        "user_id": user.id,
+        "role": user.role
+    }
+    if user.role in ['worker', 'admin']:
+        worker_id = db.execute(
+            select(Worker.id).where(Worker.email == user.email)
+        ).scalar_one_or_none()
+        if worker_id is not None:
+            token_data["worker_id"] = worker_id
+    return token_data
+
+
 # Explicit OPTIONS handlers for CORS preflight
 @router.options("/register")
 @router.options("/login")
@@ -57,7 +83,7 @@ def register(
     # Crear nuevo usuario
     new_user = User(
         email=register_data.email,
-        password_hash=get_password_hash(register_data.password),
+        password_hash=hash_password_in_pool(register_data.password),
         name=register_data.name,
         phone=register_data.phone,
         role='customer'
@@ -70,20 +96,34 @@ def register(
     return new_user
 
 
+def find_user_by_email(db: Session, email: str) -> Optional[User]:
+    statement = select(User).where(User.email == email)
+    result = db.execute(statement)
+    return result.scalar_one_or_none()
+
+
+def complete_login(db: Session, user: User, new_password_hash: Optional[str]) -> dict:
+    """Guarda el rehash (si cambió el costo de bcrypt) y arma los claims del token"""
+    if new_password_hash:
+        user.password_hash = new_password_hash
+        db.commit()
+    return build_token_data(user, db)
+
+
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     login_data: LoginRequest,
     db: Session = Depends(get_db)
 ):
     """
     Login de usuario (worker o customer)
     
-    Retorna un JWT token si las credenciales son correctas
+    Retorna un JWT token si las credenciales son correctas.
+    Las consultas van al threadpool y bcrypt al pool de contraseñas, así una
+    ráfaga de logins no bloquea el event loop.
     """
     # Buscar usuario por email
-    statement = select(User).where(User.email == login_data.email)
-    result = db.execute(statement)
-    user = result.scalar_one_or_none()
+    user = await run_in_threadpool(find_user_by_email, db, login_data.email)
     
     # Verificar que existe
     if not user:
@@ -94,7 +134,10 @@ def login(
         )
     
     # Verificar contraseña
-    if not verify_password(login_data.password, user.password_hash):
+    is_valid, new_password_hash = await run_in_password_pool(
+        verify_and_update_password, login_data.password, user.password_hash
+    )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -109,11 +152,7 @@ def login(
         )
     
     # Crear access y refresh token
-    token_data = {
-        "sub": user.email,
-        "user_id": user.id,
-        "role": user.role
-    }
+    token_data = await run_in_threadpool(complete_login, db, user, new_password_hash)
     access_token = create_access_token(data=token_data)
     refresh_token = create_refresh_token(data=token_data)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
@@ -145,11 +184,7 @@ def refresh_token(
             detail="User not found or inactive",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token_data = {
-        "sub": user.email,
-        "user_id": user.id,
-        "role": user.role
-    }
+    token_data = build_token_data(user, db)
     access_token = create_access_token(data=token_data)
     new_refresh_token = create_refresh_token(data=token_data)
     return {"access_token": access_token, "refresh_token": new_refresh_token, "token_type": "bearer"}
@@ -182,7 +217,7 @@ def update_me(
         # Validar password minima longitud si se desea
         if len(user_data.password) < 6:
              raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
-        current_user.password_hash = get_password_hash(user_data.password)
+        current_user.password_hash = hash_password_in_pool(user_data.password)
     
     db.commit()
     db.refresh(current_user)
@@ -209,18 +244,16 @@ def forgot_password(data: ForgotPasswordRequest, db: Session = Depends(get_db)):
     code = ''.join(random.choices(string.digits, k=6))
     user.reset_token = code
     user.reset_token_expires = datetime.now() + timedelta(minutes=15)
-    db.commit()
 
-    # Enviar email
-    try:
-        body = get_reset_password_template(user.name, code)
-        send_email(
-            subject="🔐 Código de recuperación - Shady's Nails",
-            recipient=user.email,
-            body_html=body
-        )
-    except Exception as e:
-        print(f"Error enviando email de recuperación: {e}")
+    # Email al outbox en la misma transacción que el código
+    enqueue_email(
+        db,
+        subject="🔐 Código de recuperación - Shady's Nails",
+        recipient=user.email,
+        body_html=get_reset_password_template(user.name, code)
+    )
+    db.commit()
+    wake_email_sender()
 
     return {"message": "Si el email está registrado, recibirás un código en breve."}
 
@@ -239,7 +272,7 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="El código ha expirado")
 
     # Cambiar contraseña
-    user.password_hash = get_password_hash(data.new_password)
+    user.password_hash = hash_password_in_pool(data.new_password)
     user.reset_token = None # Limpiar token
     user.reset_token_expires = None
     db.commit()
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+import os
 from datetime import date, time, datetime, timedelta
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from pydantic import BaseModel
 
 from app.database import get_db
 from app.models.appointment import Appointment
 from app.models.schedule import WorkerSchedule, BlockedDate
+from app.models.worker import Worker
 from app.utils.appointment_validation import get_total_duration, calculate_end_time
+from app.utils.availability_engine import minutes_to_slot
+from app.utils.availability_cache import availability_cache, DayResult
+from app.utils.day_bitmap import DayOccupancy
 
 router = APIRouter(
     prefix="/availability",
@@ -33,6 +38,70 @@ class AvailabilityResponse(BaseModel):
         from_attributes = True
 
 
+class DayAvailability(BaseModel):
+    """Disponibilidad de un día dentro de un rango"""
+    date: date
+    has_availability: bool
+    available_slots: List[str] = []
+    is_blocked: bool = False
+    block_reason: Optional[str] = None
+
+
+class AvailabilityRangeResponse(BaseModel):
+    """Respuesta del endpoint de disponibilidad por rango de fechas"""
+    worker_id: int
+    service_id: int
+    additional_id: Optional[int]
+    date_from: date
+    date_to: date
+    total_duration_minutes: int
+    days: List[DayAvailability]
+
+
+class SlotWorkers(BaseModel):
+    """Un slot libre y las manicuristas que pueden tomarlo"""
+    time: str
+    worker_ids: List[int]
+
+
+class AnyWorkerAvailabilityResponse(BaseModel):
+    """Respuesta de disponibilidad combinada de todas las manicuristas activas"""
+    date: date
+    service_id: int
+    additional_id: Optional[int]
+    total_duration_minutes: int
+    available_slots: List[str]
+    slots: List[SlotWorkers]
+
+
+class NextSlot(BaseModel):
+    """Un slot libre encontrado por /availability/next"""
+    date: date
+    time: str
+    worker_ids: List[int]
+
+
+class NextAvailabilityResponse(BaseModel):
+    """Respuesta de la búsqueda del próximo horario disponible"""
+    service_id: int
+    additional_id: Optional[int]
+    worker_id: Optional[int]
+    total_duration_minutes: int
+    horizon_days: int
+    slots: List[NextSlot]
+
+
+# Máximo de días que se pueden consultar en una sola llamada a /availability/range
+MAX_RANGE_DAYS = 62
+
+# Días hacia adelante que revisa /availability/next por defecto y como máximo.
+# FastAPI no valida el default de un Query: se acota aquí
+NEXT_MAX_HORIZON_DAYS = 90
+NEXT_DEFAULT_HORIZON_DAYS = min(
+    max(int(os.getenv("AVAILABILITY_NEXT_HORIZON_DAYS", "30")), 1), NEXT_MAX_HORIZON_DAYS
+)
+
+
 # ═══════════════════════════════════════════════════
 # FUNCIONES AUXILIARES
 # ═══════════════════════════════════════════════════
@@ -116,8 +185,174 @@ def is_slot_available(
     return True
 
 
+def resolve_working_hours(schedule: Optional[WorkerSchedule], day_of_week: int):
+    """
+    Devuelve (is_working, start_time, end_time, break_start, break_end) para un día.
+    Si el worker no tiene configuración, aplica los defaults (L-S 9AM a 8PM).
+    """
+    if not schedule:
+        # Default: Lunes a Sábado, 9AM a 8PM. Domingo descanso.
+        if day_of_week < 6:
+            return True, time(9, 0), time(20, 0), None, None
+        return False, time(9, 0), time(18, 0), None, None
+
+    return (
+        schedule.is_working,
+        schedule.start_time,
+        schedule.end_time,
+        schedule.break_start,
+        schedule.break_end
+    )
+
+
+class AvailabilityWindow:
+    """
+    Bloqueos, horarios y citas de uno o varios workers para un rango de fechas,
+    cargados en bloque con `load_availability_window`.
+    """
+
+    def __init__(self, schedules, blocks, appointments):
+        # (worker_id, day_of_week) -> WorkerSchedule
+        self.schedules: Dict[Tuple[int, int], WorkerSchedule] = schedules
+        # (worker_id, date) -> BlockedDate
+        self.blocks: Dict[Tuple[int, date], BlockedDate] = blocks
+        # (worker_id, date) -> filas con start_time y end_time
+        self.appointments: Dict[Tuple[int, date], list] = appointments
+
+    def day_occupancy(self, worker_id: int, day: date) -> Tuple[Optional[DayOccupancy], bool, Optional[str]]:
+        """
+        Devuelve (ocupación, is_blocked, block_reason) de un worker en un día.
+        La ocupación es None si el día está bloqueado o no es laboral.
+        """
+        blocked = self.blocks.get((worker_id, day))
+        if blocked:
+            return None, True, blocked.reason
+
+        day_of_week = day.weekday()
+        is_working, start_time, end_time, break_start, break_end = resolve_working_hours(
+            self.schedules.get((worker_id, day_of_week)), day_of_week
+        )
+        if not is_working:
+            return None, False, "Día no laboral"
+
+        occupancy = DayOccupancy.from_day(
+            start_time=start_time,
+            end_time=end_time,
+            existing_appointments=self.appointments.get((worker_id, day), []),
+            break_start=break_start,
+            break_end=break_end
+        )
+        return occupancy, False, None
+
+
+def load_availability_window(
+    db: Session,
+    worker_ids: List[int],
+    date_from: date,
+    date_to: date
+) -> AvailabilityWindow:
+    """
+    Carga en 3 consultas (sin importar cuántos workers o días) todo lo necesario
+    para calcular disponibilidad: bloqueos, horario semanal y citas no canceladas.
+    """
+    blocks = {
+        (block.worker_id, block.date): block
+        for block in db.query(BlockedDate).filter(
+            BlockedDate.worker_id.in_(worker_ids),
+            BlockedDate.date >= date_from,
+            BlockedDate.date <= date_to
+        ).all()
+    }
+
+    schedules = {
+        (schedule.worker_id, schedule.day_of_week): schedule
+        for schedule in db.query(WorkerSchedule).filter(
+            WorkerSchedule.worker_id.in_(worker_ids)
+        ).all()
+    }
+
+    appointments: Dict[Tuple[int, date], list] = {}
+    for appointment in db.query(
+        Appointment.worker_id,
+        Appointment.date,
+        Appointment.start_time,
+        Appointment.end_time
+    ).filter(
+        Appointment.worker_id.in_(worker_ids),
+        Appointment.date >= date_from,
+        Appointment.date <= date_to,
+        Appointment.status != "cancelled"
+    ).all():
+        appointments.setdefault((appointment.worker_id, appointment.date), []).append(appointment)
+
+    return AvailabilityWindow(schedules, blocks, appointments)
+
+
+def get_day_results(
+    db: Session,
+    worker_ids: List[int],
+    date_from: date,
+    date_to: date,
+    total_duration: int
+) -> Dict[Tuple[int, date], DayResult]:
+    """
+    Disponibilidad de cada (worker, día) del rango para una duración dada.
+
+    Primero consulta el cache; solo si faltan días hace la carga en bloque
+    (una sola vez para todos los faltantes) y guarda los resultados.
+    """
+    results: Dict[Tuple[int, date], DayResult] = {}
+    missing: List[Tuple[int, date]] = []
+
+    for worker_id in worker_ids:
+        current = date_from
+        while current <= date_to:
+            cached = availability_cache.get(worker_id, current, total_duration)
+            if cached is None:
+                missing.append((worker_id, current))
+            else:
+                results[(worker_id, current)] = cached
+            current += timedelta(days=1)
+
+    if not missing:
+        return results
+
+    # Antes de leer la base: si alguna reserva invalida estos días mientras se
+    # calculan, el resultado se devuelve pero no se guarda en cache
+    generation = availability_cache.generation()
+    window = load_availability_window(
+        db,
+        sorted({worker_id for worker_id, _ in missing}),
+        min(day for _, day in missing),
+        max(day for _, day in missing)
+    )
+    for worker_id, day in missing:
+        results[(worker_id, day)] = compute_day_result(window, worker_id, day, total_duration, generation)
+
+    return results
+
+
+def compute_day_result(
+    window: AvailabilityWindow,
+    worker_id: int,
+    day: date,
+    total_duration: int,
+    generation: int
+) -> DayResult:
+    """
+    Calcula la disponibilidad de un (worker, día) ya cargado y la guarda en
+    cache. `generation` es `availability_cache.generation()` leído antes de
+    cargar la ventana.
+    """
+    occupancy, is_blocked, block_reason = window.day_occupancy(worker_id, day)
+    free_starts = tuple(occupancy.free_starts(total_duration)) if occupancy else ()
+    result = DayResult(is_blocked=is_blocked, block_reason=block_reason, free_starts=free_starts)
+    availability_cache.set(worker_id, day, total_duration, result, generation=generation)
+    return result
+
+
 # ═══════════════════════════════════════════════════
-# ENDPOINT
+# ENDPOINTS
 # ═══════════════════════════════════════════════════
 
 @router.get("", response_model=AvailabilityResponse)
@@ -130,101 +365,243 @@ def get_availability(
 ):
     """
     Calcula horarios dinámicos basados en la configuración del worker.
+    El resultado de cada (worker, día, duración) se cachea en memoria.
     """
     
-    # 0️⃣ Verificar si la fecha está BLOQUEADA
-    blocked = db.query(BlockedDate).filter(
-        BlockedDate.worker_id == worker_id,
-        BlockedDate.date == date
-    ).first()
-
-    if blocked:
-        return AvailabilityResponse(
-            date=date, worker_id=worker_id, service_id=service_id, additional_id=additional_id,
-            total_duration_minutes=0, available_slots=[], is_blocked=True, block_reason=blocked.reason
+    # 1️⃣ Calcular duración total del servicio
+    try:
+        total_duration = get_total_duration(
+            service_id=service_id,
+            additional_id=additional_id,
+            db=db
         )
+    except HTTPException:
+        # Un día BLOQUEADO o no laboral se responde antes de validar el servicio
+        _, is_blocked, block_reason = load_availability_window(
+            db, [worker_id], date, date
+        ).day_occupancy(worker_id, date)
+        if is_blocked or block_reason:
+            return AvailabilityResponse(
+                date=date, worker_id=worker_id, service_id=service_id, additional_id=additional_id,
+                total_duration_minutes=0, available_slots=[], is_blocked=is_blocked, block_reason=block_reason
+            )
+        raise
 
-    # 1️⃣ Obtener configuración de horario para ese día
-    day_of_week = date.weekday() # 0=Monday, 6=Sunday
-    schedule = db.query(WorkerSchedule).filter(
-        WorkerSchedule.worker_id == worker_id,
-        WorkerSchedule.day_of_week == day_of_week
-    ).first()
+    # 2️⃣ Bloqueo, horario y citas del día (o resultado cacheado)
+    result = get_day_results(db, [worker_id], date, date, total_duration)[(worker_id, date)]
 
-    # Logica de defaults si no existe configuración
-    if not schedule:
-        # Default: Lunes a Sábado, 9AM a 8PM
-        if day_of_week < 6:
-            start_time = time(9, 0)
-            end_time = time(20, 0) # 8 PM
-            is_working = True
-        else:
-            # Domingo descanso por defecto
-            is_working = False
-            start_time = time(9, 0)
-            end_time = time(18, 0)
-        
-        break_start = None
-        break_end = None
-    else:
-        is_working = schedule.is_working
-        start_time = schedule.start_time
-        end_time = schedule.end_time
-        break_start = schedule.break_start
-        break_end = schedule.break_end
-
-    # Si no trabaja ese día, retornar vacío
-    if not is_working:
+    # Fecha BLOQUEADA o día no laboral: retornar vacío
+    if result.is_blocked or result.block_reason:
         return AvailabilityResponse(
             date=date, worker_id=worker_id, service_id=service_id, additional_id=additional_id,
-            total_duration_minutes=0, available_slots=[], is_blocked=False, block_reason="Día no laboral"
+            total_duration_minutes=0, available_slots=[],
+            is_blocked=result.is_blocked, block_reason=result.block_reason
         )
     
-    # 2️⃣ Calcular duración total del servicio
+    # 3️⃣ Retornar respuesta
+    return AvailabilityResponse(
+        date=date,
+        worker_id=worker_id,
+        service_id=service_id,
+        additional_id=additional_id,
+        total_duration_minutes=total_duration,
+        available_slots=[minutes_to_slot(start) for start in result.free_starts]
+    )
+
+
+@router.get("/range", response_model=AvailabilityRangeResponse)
+def get_availability_range(
+    worker_id: int = Query(..., description="ID de la manicurista"),
+    service_id: int = Query(..., description="ID del servicio a agendar"),
+    date_from: date = Query(..., alias="from", description="Primer día del rango (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Último día del rango, inclusive (YYYY-MM-DD)"),
+    additional_id: Optional[int] = Query(None, description="ID del adicional (opcional)"),
+    include_slots: bool = Query(True, description="Si es False solo se devuelve el flag has_availability por día"),
+    db: Session = Depends(get_db)
+):
+    """
+    Calcula la disponibilidad de todos los días de un rango en una sola llamada.
+    Pensado para que el calendario pueda marcar los días llenos sin consultar día por día.
+
+    Carga bloqueos, horario semanal y citas de todo el rango con un número
+    constante de consultas, sin importar cuántos días tenga el rango.
+    """
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=400,
+            detail="La fecha 'to' debe ser igual o posterior a 'from'"
+        )
+
+    if (date_to - date_from).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede superar {MAX_RANGE_DAYS} días"
+        )
+
+    # 1️⃣ Duración total del servicio (valida que service/additional existan)
     total_duration = get_total_duration(
         service_id=service_id,
         additional_id=additional_id,
         db=db
     )
-    
-    # 3️⃣ Obtener citas existentes
-    existing_appointments = db.query(Appointment).filter(
-        Appointment.worker_id == worker_id,
-        Appointment.date == date,
-        Appointment.status != "cancelled"
-    ).all()
-    
-    # 4️⃣ Generar slots candidatos según horario laboral
-    candidate_slots = generate_time_slots(
-        start_time=start_time,
-        end_time=end_time, # Generar hasta el cierre
-        interval_minutes=15
+
+    # 2️⃣ Bloqueos, horario semanal y citas de todo el rango (o resultados cacheados)
+    results = get_day_results(db, [worker_id], date_from, date_to, total_duration)
+
+    # 3️⃣ Armar la respuesta día por día
+    days = []
+    current = date_from
+    while current <= date_to:
+        result = results[(worker_id, current)]
+        slots = [minutes_to_slot(start) for start in result.free_starts] if include_slots else []
+        days.append(DayAvailability(
+            date=current,
+            has_availability=bool(result.free_starts),
+            available_slots=slots,
+            is_blocked=result.is_blocked,
+            block_reason=result.block_reason
+        ))
+        current += timedelta(days=1)
+
+    return AvailabilityRangeResponse(
+        worker_id=worker_id,
+        service_id=service_id,
+        additional_id=additional_id,
+        date_from=date_from,
+        date_to=date_to,
+        total_duration_minutes=total_duration,
+        days=days
     )
-    
-    # 5️⃣ Filtrar solo los slots disponibles
-    available_slots = []
-    
-    for slot in candidate_slots:
-        # El slot de inicio no puede ser IGUAL al end_time laboral
-        if slot >= end_time:
-            continue
-
-        if is_slot_available(
-            start_time=slot,
-            duration_minutes=total_duration,
-            existing_appointments=existing_appointments,
-            work_end_time=end_time,
-            break_start=break_start,
-            break_end=break_end
-        ):
-            available_slots.append(slot.strftime("%H:%M:%S"))
-    
-    # 6️⃣ Retornar respuesta
-    return AvailabilityResponse(
+
+
+@router.get("/any", response_model=AnyWorkerAvailabilityResponse)
+def get_any_worker_availability(
+    date: date = Query(..., description="Fecha para consultar disponibilidad"),
+    service_id: int = Query(..., description="ID del servicio a agendar"),
+    additional_id: Optional[int] = Query(None, description="ID del adicional (opcional)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Disponibilidad de "cualquier manicurista": une los slots libres de todas
+    las manicuristas activas e indica quién puede tomar cada slot.
+
+    Usa un número fijo de consultas sin importar cuántas manicuristas haya.
+    """
+    total_duration = get_total_duration(
+        service_id=service_id,
+        additional_id=additional_id,
+        db=db
+    )
+
+    worker_ids = [
+        row.id for row in db.query(Worker.id).filter(Worker.state == True).order_by(Worker.id).all()
+    ]
+
+    results = get_day_results(db, worker_ids, date, date, total_duration)
+
+    workers_by_start: Dict[int, List[int]] = {}
+    for worker_id in worker_ids:
+        for start in results[(worker_id, date)].free_starts:
+            workers_by_start.setdefault(start, []).append(worker_id)
+
+    slots = [
+        SlotWorkers(time=minutes_to_slot(start), worker_ids=workers_by_start[start])
+        for start in sorted(workers_by_start)
+    ]
+
+    return AnyWorkerAvailabilityResponse(
         date=date,
-        worker_id=worker_id,
         service_id=service_id,
         additional_id=additional_id,
         total_duration_minutes=total_duration,
-        available_slots=available_slots
+        available_slots=[slot.time for slot in slots],
+        slots=slots
+    )
+
+
+@router.get("/next", response_model=NextAvailabilityResponse)
+def get_next_availability(
+    service_id: int = Query(..., description="ID del servicio a agendar"),
+    additional_id: Optional[int] = Query(None, description="ID del adicional (opcional)"),
+    worker_id: Optional[int] = Query(None, description="ID de la manicurista (si se omite, cualquiera activa)"),
+    after: Optional[datetime] = Query(None, description="Buscar a partir de este momento (default: ahora)"),
+    limit: int = Query(5, ge=1, le=50, description="Cantidad de slots a devolver"),
+    horizon_days: int = Query(NEXT_DEFAULT_HORIZON_DAYS, ge=1, le=NEXT_MAX_HORIZON_DAYS, description="Días hacia adelante a revisar"),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca los próximos `limit` horarios libres a partir de `after`.
+
+    Revisa día por día hasta `horizon_days` y se detiene apenas encuentra
+    suficientes slots. Si algún día no está en cache, carga bloqueos, horarios
+    y citas de todo el horizonte una sola vez.
+    """
+    total_duration = get_total_duration(
+        service_id=service_id,
+        additional_id=additional_id,
+        db=db
+    )
+
+    if worker_id is not None:
+        worker_ids = [worker_id]
+    else:
+        worker_ids = [
+            row.id for row in db.query(Worker.id).filter(Worker.state == True).order_by(Worker.id).all()
+        ]
+
+    # Los horarios son hora local sin zona: un `after` con zona (ej. ...Z) se
+    # pasa a hora local, y nunca se buscan horarios que ya pasaron
+    now = datetime.now()
+    if after is not None and after.tzinfo is not None:
+        after = after.astimezone().replace(tzinfo=None)
+    after = max(after, now) if after is not None else now
+    first_day = after.date()
+    last_day = first_day + timedelta(days=horizon_days - 1)
+    after_seconds = after.hour * 3600 + after.minute * 60 + after.second
+
+    window: Optional[AvailabilityWindow] = None
+    generation = 0
+    slots: List[NextSlot] = []
+    current = first_day
+
+    while current <= last_day and len(slots) < limit:
+        workers_by_start: Dict[int, List[int]] = {}
+
+        for candidate_worker_id in worker_ids:
+            result = availability_cache.get(candidate_worker_id, current, total_duration)
+            if result is None:
+                if window is None:
+                    generation = availability_cache.generation()
+                    window = load_availability_window(db, worker_ids, first_day, last_day)
+                result = compute_day_result(window, candidate_worker_id, current, total_duration, generation)
+
+            for start in result.free_starts:
+                if current == first_day and start * 60 < after_seconds:
+                    continue
+                workers_by_start.setdefault(start, []).append(candidate_worker_id)
+
+        for start in sorted(workers_by_start):
+            slots.append(NextSlot(
+                date=current, time=minutes_to_slot(start), worker_ids=workers_by_start[start]
+            ))
+            if len(slots) == limit:
+                break
+
+        current += timedelta(days=1)
+
+    return NextAvailabilityResponse(
+        service_id=service_id,
+        additional_id=additional_id,
+        worker_id=worker_id,
+        total_duration_minutes=total_duration,
+        horizon_days=horizon_days,
+        slots=slots
     )
+
+@router.get("/cache-stats")
+def get_availability_cache_stats():
+    """
+    Contadores del cache de disponibilidad (hits, misses, expulsiones...).
+    Útil para verificar que el cache está funcionando.
+    """
+    return availability_cache.stats()
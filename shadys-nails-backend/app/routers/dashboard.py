@@ -0,0 +1,99 @@
+"""
+Router del dashboard de workers: todo lo que la pantalla necesita al cargar
+en una sola petición.
+"""
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+from pydantic import BaseModel
+
+from app.database import get_db
+from app.dependencies import get_current_user, get_current_worker
+from app.models.user import User
+from app.models.worker import Worker
+from app.routers.appointment import AppointmentResponse, list_appointments, MAX_PAGE_SIZE
+from app.routers.schedule import BlockedDateResponse, ScheduleItem, load_schedule, load_upcoming_blocks
+from app.routers.stats import (
+    DailyStats,
+    RevenueStats,
+    ServicePopularity,
+    get_popular_services_for,
+    get_summary_stats,
+)
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"]
+)
+
+# ═══════════════════════════════════════════════════
+# SCHEMAS
+# ═══════════════════════════════════════════════════
+
+class DashboardSummary(BaseModel):
+    """Bloques del dashboard de worker"""
+    today: DailyStats
+    week: RevenueStats
+    month: RevenueStats
+    popular_services: List[ServicePopularity]
+    schedules: List[ScheduleItem]
+    blocked_dates: List[BlockedDateResponse]
+    appointments: List[AppointmentResponse]
+    # Cursor para GET /appointments?cursor=... si hay más citas
+    next_cursor: Optional[str] = None
+
+
+# ═══════════════════════════════════════════════════
+# ENDPOINTS
+# ═══════════════════════════════════════════════════
+
+@router.get("/summary", response_model=DashboardSummary)
+def get_dashboard_summary(
+    appointments_from: Optional[date] = Query(None, description="Solo citas desde esta fecha"),
+    appointments_limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE,
+        description="Sin valor se incluyen todas las citas, igual que GET /appointments"
+    ),
+    services_limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Reemplaza las llamadas a /stats/today, /stats/week, /stats/month,
+    /stats/services-popular, /schedules, /schedules/blocks y /appointments.
+
+    Autentica una sola vez (FastAPI reutiliza `get_current_user` dentro de
+    `get_current_worker`) y usa la misma sesión para todo: estadísticas del
+    día, semana y mes en una consulta al rollup, más una consulta por bloque.
+    """
+    today, week, month = get_summary_stats(db, current_worker.id, date.today())
+
+    # Mismo listado (y mismo orden/cursor) que GET /appointments para un worker
+    page = Response()
+    appointments = list_appointments(
+        page,
+        worker_id=None,
+        date=None,
+        date_from=appointments_from,
+        date_to=None,
+        status=None,
+        limit=appointments_limit,
+        cursor=None,
+        view=None,
+        fields=None,
+        db=db,
+        current_user=current_user
+    )
+
+    return DashboardSummary(
+        today=today,
+        week=week,
+        month=month,
+        popular_services=get_popular_services_for(db, current_worker.id, services_limit),
+        schedules=load_schedule(db, current_worker.id),
+        blocked_dates=load_upcoming_blocks(db, current_worker.id),
+        appointments=appointments,
+        next_cursor=page.headers.get("X-Next-Cursor")
+    )
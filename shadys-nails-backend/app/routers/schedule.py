@@ -9,6 +9,7 @@ from app.models.schedule import WorkerSchedule, BlockedDate
 from app.models.user import User
 from app.dependencies import get_current_user, get_current_worker
 from app.models.worker import Worker
+from app.utils.availability_cache import availability_cache
 
 router = APIRouter(
     prefix="/schedules",
@@ -47,18 +48,14 @@ class BlockedDateResponse(BaseModel):
 # ENDPOINTS
 # ═══════════════════════════════════════════════════
 
-@router.get("", response_model=List[ScheduleItem])
-def get_my_schedule(
-    db: Session = Depends(get_db),
-    current_worker: Worker = Depends(get_current_worker)
-):
+def load_schedule(db: Session, worker_id: int) -> List[ScheduleItem]:
     """
-    Obtiene el horario de trabajo del worker autenticado.
+    Horario semanal del worker.
     Si no tiene horario configurado, devuelve uno por defecto (9-6 L-S).
     """
     # Buscar horario en BD
     db_schedules = db.query(WorkerSchedule).filter(
-        WorkerSchedule.worker_id == current_worker.id
+        WorkerSchedule.worker_id == worker_id
     ).order_by(WorkerSchedule.day_of_week).all()
 
     # Si ya tiene configuración, devolverla
@@ -88,6 +85,26 @@ def get_my_schedule(
     return defaults
 
 
+def load_upcoming_blocks(db: Session, worker_id: int) -> List[BlockedDate]:
+    """Fechas bloqueadas del worker desde hoy en adelante"""
+    return db.query(BlockedDate).filter(
+        BlockedDate.worker_id == worker_id,
+        BlockedDate.date >= date.today()
+    ).order_by(BlockedDate.date).all()
+
+
+@router.get("", response_model=List[ScheduleItem])
+def get_my_schedule(
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Obtiene el horario de trabajo del worker autenticado.
+    Si no tiene horario configurado, devuelve uno por defecto (9-6 L-S).
+    """
+    return load_schedule(db, current_worker.id)
+
+
 @router.put("", status_code=200)
 def update_schedule(
     data: ScheduleUpdate,
@@ -115,6 +132,7 @@ def update_schedule(
         db.add(new_schedule)
     
     db.commit()
+    availability_cache.invalidate_worker(current_worker.id)
     return {"message": "Horario actualizado correctamente"}
 
 
@@ -123,10 +141,7 @@ def get_blocked_dates(
     db: Session = Depends(get_db),
     current_worker: Worker = Depends(get_current_worker)
 ):
-    return db.query(BlockedDate).filter(
-        BlockedDate.worker_id == current_worker.id,
-        BlockedDate.date >= date.today()
-    ).order_by(BlockedDate.date).all()
+    return load_upcoming_blocks(db, current_worker.id)
 
 
 @router.post("/blocks", response_model=BlockedDateResponse)
@@ -152,6 +167,7 @@ def block_date(
     db.add(new_block)
     db.commit()
     db.refresh(new_block)
+    availability_cache.invalidate_day(current_worker.id, new_block.date)
     return new_block
 
 
@@ -170,4 +186,5 @@ def unblock_date(
         raise HTTPException(status_code=404, detail="Fecha no encontrada")
     
     db.commit()
+    availability_cache.invalidate_day(current_worker.id, date_val)
     return {"message": "Fecha desbloqueada"}
@@ -8,6 +8,7 @@ from app.models.service import Service
 from app.models.user import User
 from app.dependencies import get_current_user, get_current_worker
 from app.models.worker import Worker
+from app.utils.availability_cache import availability_cache
 
 router = APIRouter(
     prefix="/services",
@@ -179,12 +180,22 @@ def update_service(
                 detail=f"Ya existe otro servicio llamado '{update_data['name']}'"
             )
     
+    duration_changed = (
+        'duration_minutes' in update_data
+        and update_data['duration_minutes'] != service.duration_minutes
+    )
+    
     for field, value in update_data.items():
         setattr(service, field, value)
     
     db.commit()
     db.refresh(service)
     
+    # La disponibilidad se cachea por duración total: si cambia la duración
+    # se descarta todo para no dejar entradas que ya no corresponden
+    if duration_changed:
+        availability_cache.clear()
+    
     return service
 
 
@@ -1,9 +1,9 @@
 """
 Router de estadísticas para el dashboard de workers
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, cast, literal_column, select, DateTime
 from typing import Dict, List
 from datetime import datetime, timedelta, date
 from pydantic import BaseModel
@@ -12,6 +12,7 @@ from app.database import get_db
 from app.models.user import User
 from app.models.appointment import Appointment
 from app.models.service import Service
+from app.models.daily_worker_stats import DailyWorkerStats
 from app.dependencies import get_current_user, get_current_worker
 from app.models.worker import Worker
 
@@ -51,61 +52,93 @@ class RevenueStats(BaseModel):
     pending_revenue: int
     total_appointments: int
 
+class SeriesPoint(BaseModel):
+    """Un intervalo (día, semana o mes) de la serie"""
+    period_start: str
+    total_appointments: int
+    pending_appointments: int
+    confirmed_appointments: int
+    completed_appointments: int
+    cancelled_appointments: int
+    estimated_revenue: int
+    actual_revenue: int
+    pending_revenue: int
+
+class StatsSeries(BaseModel):
+    """Serie de tiempo densa: un punto por intervalo, aunque no tenga citas"""
+    granularity: str
+    date_from: str
+    date_to: str
+    points: List[SeriesPoint]
+
+
+# Máximo de puntos de /stats/series (ej. ~3 años por día)
+MAX_SERIES_POINTS = 1100
+
+# Columnas de daily_worker_stats sumadas en cada punto, en el orden de SeriesPoint
+SERIES_COLUMNS = [
+    ("total_appointments", DailyWorkerStats.total_count),
+    ("pending_appointments", DailyWorkerStats.pending_count),
+    ("confirmed_appointments", DailyWorkerStats.confirmed_count),
+    ("completed_appointments", DailyWorkerStats.completed_count),
+    ("cancelled_appointments", DailyWorkerStats.cancelled_count),
+    ("estimated_revenue", DailyWorkerStats.estimated_revenue),
+    ("actual_revenue", DailyWorkerStats.actual_revenue),
+    ("pending_revenue", DailyWorkerStats.pending_revenue),
+]
+
 
 # ═══════════════════════════════════════════════════
-# ENDPOINTS
+# AGREGADOS (leídos de daily_worker_stats, ver app/utils/daily_stats.py)
 # ═══════════════════════════════════════════════════
 
-@router.get("/today", response_model=DailyStats)
-def get_today_stats(
-    db: Session = Depends(get_db),
-    current_worker: Worker = Depends(get_current_worker)
-):
+def sum_rollup(column, condition=None):
+    total = func.sum(column)
+    if condition is not None:
+        total = total.filter(condition)
+    return func.coalesce(total, 0)
+
+
+def week_range(today: date):
+    week_start = today - timedelta(days=today.weekday())
+    return week_start, week_start + timedelta(days=6)
+
+
+def month_range(today: date):
+    month_start = date(today.year, today.month, 1)
+    
+    # Calcular el último día del mes
+    if today.month == 12:
+        month_end = date(today.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        month_end = date(today.year, today.month + 1, 1) - timedelta(days=1)
+    return month_start, month_end
+
+
+def today_columns(today: date) -> list:
     """
-    Obtiene las estadísticas del día actual.
-    Solo para workers.
+    KPIs del día + total GLOBAL de pendientes (pendientes + confirmadas desde
+    hoy en adelante). Requiere filtrar DailyWorkerStats.date >= today.
     """
-    today = date.today()
-    
-    # Obtener todas las citas del día para los KPIs diarios
-    appointments = db.query(Appointment).filter(
-        Appointment.worker_id == current_worker.id,
-        Appointment.date == today
-    ).all()
-    
-    # Calcular estadísticas del DÍA
-    total = len(appointments)
-    confirmed = sum(1 for apt in appointments if apt.status == 'confirmed')
-    pending = sum(1 for apt in appointments if apt.status == 'pending')
-    completed = sum(1 for apt in appointments if apt.status == 'completed')
-    cancelled = sum(1 for apt in appointments if apt.status == 'cancelled')
-    
-    # 🆕 Calcular total GLOBAL de pendientes (pendientes + confirmadas futuras)
-    # Consideramos 'pending' y 'confirmed' como trabajo futuro pendiente
-    global_pending = db.query(func.count(Appointment.id)).filter(
-        Appointment.worker_id == current_worker.id,
-        Appointment.status.in_(['pending', 'confirmed']),
-        Appointment.date >= today
-    ).scalar() or 0
-    
-    # Calcular ingresos del día
-    estimated_revenue = 0
-    actual_revenue = 0
-    
-    for apt in appointments:
-        service = db.query(Service).filter(Service.id == apt.service_id).first()
-        if service:
-            revenue = service.price
-            # Agregar precio del adicional si existe
-            if apt.additional_id:
-                from app.models.additional import Additional
-                additional = db.query(Additional).filter(Additional.id == apt.additional_id).first()
-                if additional:
-                    revenue += additional.price
-            
-            estimated_revenue += revenue
-            if apt.status == 'completed':
-                actual_revenue += revenue
+    is_today = DailyWorkerStats.date == today
+    return [
+        sum_rollup(DailyWorkerStats.total_count, is_today),
+        sum_rollup(DailyWorkerStats.confirmed_count, is_today),
+        sum_rollup(DailyWorkerStats.pending_count, is_today),
+        sum_rollup(DailyWorkerStats.completed_count, is_today),
+        sum_rollup(DailyWorkerStats.cancelled_count, is_today),
+        sum_rollup(DailyWorkerStats.estimated_revenue, is_today),
+        sum_rollup(DailyWorkerStats.actual_revenue, is_today),
+        sum_rollup(
+            DailyWorkerStats.pending_count + DailyWorkerStats.confirmed_count,
+            DailyWorkerStats.date >= today
+        ),
+    ]
+
+
+def daily_stats_from_row(today: date, row) -> DailyStats:
+    (total, confirmed, pending, completed, cancelled,
+     estimated_revenue, actual_revenue, global_pending) = row
     
     return DailyStats(
         date=str(today),
@@ -120,124 +153,74 @@ def get_today_stats(
     )
 
 
-@router.get("/week", response_model=RevenueStats)
-def get_week_stats(
-    db: Session = Depends(get_db),
-    current_worker: Worker = Depends(get_current_worker)
-):
-    """
-    Obtiene las estadísticas de la semana actual.
-    """
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    
-    appointments = db.query(Appointment).filter(
-        Appointment.worker_id == current_worker.id,
-        Appointment.date >= week_start,
-        Appointment.date <= week_end
-    ).all()
-    
-    total_revenue = 0
-    completed_revenue = 0
-    pending_revenue = 0
-    
-    for apt in appointments:
-        service = db.query(Service).filter(Service.id == apt.service_id).first()
-        if service:
-            revenue = service.price
-            if apt.additional_id:
-                from app.models.additional import Additional
-                additional = db.query(Additional).filter(Additional.id == apt.additional_id).first()
-                if additional:
-                    revenue += additional.price
-            
-            total_revenue += revenue
-            if apt.status == 'completed':
-                completed_revenue += revenue
-            elif apt.status in ['pending', 'confirmed']:
-                pending_revenue += revenue
-    
+def period_columns(start: date, end: date) -> list:
+    """Citas e ingresos entre `start` y `end` (incluidos)"""
+    in_period = and_(DailyWorkerStats.date >= start, DailyWorkerStats.date <= end)
+    return [
+        sum_rollup(DailyWorkerStats.total_count, in_period),
+        sum_rollup(DailyWorkerStats.estimated_revenue, in_period),
+        sum_rollup(DailyWorkerStats.actual_revenue, in_period),
+        sum_rollup(DailyWorkerStats.pending_revenue, in_period),
+    ]
+
+
+def revenue_stats_from_row(period: str, row) -> RevenueStats:
+    total_appointments, total_revenue, completed_revenue, pending_revenue = row
     return RevenueStats(
-        period="week",
+        period=period,
         total_revenue=total_revenue,
         completed_revenue=completed_revenue,
         pending_revenue=pending_revenue,
-        total_appointments=len(appointments)
+        total_appointments=total_appointments
     )
 
 
-@router.get("/month", response_model=RevenueStats)
-def get_month_stats(
-    db: Session = Depends(get_db),
-    current_worker: Worker = Depends(get_current_worker)
-):
+def get_period_revenue(db: Session, worker_id: int, start: date, end: date, period: str) -> RevenueStats:
+    """Ingresos de un worker entre `start` y `end` (incluidos) desde daily_worker_stats"""
+    row = db.query(*period_columns(start, end)).filter(
+        DailyWorkerStats.worker_id == worker_id,
+        DailyWorkerStats.date >= start,
+        DailyWorkerStats.date <= end
+    ).one()
+    return revenue_stats_from_row(period, row)
+
+
+def get_summary_stats(db: Session, worker_id: int, today: date):
     """
-    Obtiene las estadísticas del mes actual.
+    Día, semana y mes en UNA consulta al rollup (para /dashboard/summary).
+    Devuelve (DailyStats, RevenueStats semana, RevenueStats mes).
     """
-    today = date.today()
-    month_start = date(today.year, today.month, 1)
+    week_start, week_end = week_range(today)
+    month_start, month_end = month_range(today)
     
-    # Calcular el último día del mes
-    if today.month == 12:
-        month_end = date(today.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        month_end = date(today.year, today.month + 1, 1) - timedelta(days=1)
-    
-    appointments = db.query(Appointment).filter(
-        Appointment.worker_id == current_worker.id,
-        Appointment.date >= month_start,
-        Appointment.date <= month_end
-    ).all()
-    
-    total_revenue = 0
-    completed_revenue = 0
-    pending_revenue = 0
-    
-    for apt in appointments:
-        service = db.query(Service).filter(Service.id == apt.service_id).first()
-        if service:
-            revenue = service.price
-            if apt.additional_id:
-                from app.models.additional import Additional
-                additional = db.query(Additional).filter(Additional.id == apt.additional_id).first()
-                if additional:
-                    revenue += additional.price
-            
-            total_revenue += revenue
-            if apt.status == 'completed':
-                completed_revenue += revenue
-            elif apt.status in ['pending', 'confirmed']:
-                pending_revenue += revenue
+    row = db.query(
+        *today_columns(today),
+        *period_columns(week_start, week_end),
+        *period_columns(month_start, month_end)
+    ).filter(
+        DailyWorkerStats.worker_id == worker_id,
+        DailyWorkerStats.date >= min(week_start, month_start)
+    ).one()
     
-    return RevenueStats(
-        period="month",
-        total_revenue=total_revenue,
-        completed_revenue=completed_revenue,
-        pending_revenue=pending_revenue,
-        total_appointments=len(appointments)
+    return (
+        daily_stats_from_row(today, row[:8]),
+        revenue_stats_from_row("week", row[8:12]),
+        revenue_stats_from_row("month", row[12:16])
     )
 
 
-@router.get("/services-popular", response_model=List[ServicePopularity])
-def get_popular_services(
-    limit: int = 10,
-    db: Session = Depends(get_db),
-    current_worker: Worker = Depends(get_current_worker)
-):
-    """
-    Obtiene los servicios más populares.
-    """
+def get_popular_services_for(db: Session, worker_id: int, limit: int = 10) -> List[ServicePopularity]:
+    """Servicios del worker ordenados por cantidad de reservas"""
     # Agrupar por servicio y contar
     results = db.query(
         Service.id,
         Service.name,
         func.count(Appointment.id).label('total_bookings'),
-        func.sum(Service.price).label('total_revenue')
+        func.sum(Appointment.service_price).label('total_revenue')  # precio guardado en la cita
     ).join(
         Appointment, Appointment.service_id == Service.id
     ).filter(
-        Service.worker_id == current_worker.id
+        Service.worker_id == worker_id
     ).group_by(
         Service.id, Service.name
     ).order_by(
@@ -253,3 +236,180 @@ def get_popular_services(
         )
         for r in results
     ]
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Inicio del intervalo que contiene `day` (semanas desde el lunes, como /stats/week)"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def series_buckets(date_from: date, date_to: date, granularity: str) -> List[date]:
+    """Inicios de todos los intervalos entre `date_from` y `date_to`"""
+    buckets = []
+    current = bucket_start(date_from, granularity)
+    while current <= date_to:
+        buckets.append(current)
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(days=7)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+    return buckets
+
+
+def series_statement(worker_id: int, date_from: date, date_to: date, granularity: str):
+    """
+    PostgreSQL: generate_series arma todos los intervalos y un LEFT JOIN por
+    rango de fechas contra daily_worker_stats los suma en una sola consulta.
+    """
+    step = literal_column(f"interval '1 {granularity}'")
+    bucket = func.generate_series(
+        func.date_trunc(granularity, cast(date_from, DateTime)),
+        cast(date_to, DateTime),
+        step
+    ).label("bucket")
+    buckets = select(bucket).subquery("buckets")
+
+    return select(
+        buckets.c.bucket,
+        *(func.coalesce(func.sum(column), 0) for _, column in SERIES_COLUMNS)
+    ).select_from(
+        buckets.outerjoin(DailyWorkerStats, and_(
+            DailyWorkerStats.worker_id == worker_id,
+            DailyWorkerStats.date >= buckets.c.bucket,
+            DailyWorkerStats.date < buckets.c.bucket + step,
+            DailyWorkerStats.date >= date_from,
+            DailyWorkerStats.date <= date_to
+        ))
+    ).group_by(buckets.c.bucket).order_by(buckets.c.bucket)
+
+
+def get_series_rows(db: Session, worker_id: int, date_from: date, date_to: date, granularity: str) -> list:
+    """Filas (inicio, sumas...) de la serie, una por intervalo"""
+    if db.get_bind().dialect.name == "postgresql":
+        return [
+            (row[0].date(), *row[1:])
+            for row in db.execute(series_statement(worker_id, date_from, date_to, granularity))
+        ]
+
+    # Otras bases (ej. SQLite en pruebas): sin generate_series; una consulta
+    # agrupada por día y los intervalos se completan en Python
+    daily = db.query(
+        DailyWorkerStats.date, *(func.sum(column) for _, column in SERIES_COLUMNS)
+    ).filter(
+        DailyWorkerStats.worker_id == worker_id,
+        DailyWorkerStats.date >= date_from,
+        DailyWorkerStats.date <= date_to
+    ).group_by(DailyWorkerStats.date).all()
+
+    totals = {bucket: [0] * len(SERIES_COLUMNS) for bucket in series_buckets(date_from, date_to, granularity)}
+    for day, *values in daily:
+        point = totals[bucket_start(day, granularity)]
+        for index, value in enumerate(values):
+            point[index] += value or 0
+    return [(bucket, *values) for bucket, values in totals.items()]
+
+
+# ═══════════════════════════════════════════════════
+# ENDPOINTS
+# ═══════════════════════════════════════════════════
+
+@router.get("/today", response_model=DailyStats)
+def get_today_stats(
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Obtiene las estadísticas del día actual.
+    Solo para workers.
+    """
+    today = date.today()
+    
+    # Una sola consulta al rollup
+    row = db.query(*today_columns(today)).filter(
+        DailyWorkerStats.worker_id == current_worker.id,
+        DailyWorkerStats.date >= today
+    ).one()
+    
+    return daily_stats_from_row(today, row)
+
+
+@router.get("/week", response_model=RevenueStats)
+def get_week_stats(
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Obtiene las estadísticas de la semana actual.
+    """
+    week_start, week_end = week_range(date.today())
+    return get_period_revenue(db, current_worker.id, week_start, week_end, "week")
+
+
+@router.get("/month", response_model=RevenueStats)
+def get_month_stats(
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Obtiene las estadísticas del mes actual.
+    """
+    month_start, month_end = month_range(date.today())
+    return get_period_revenue(db, current_worker.id, month_start, month_end, "month")
+
+
+@router.get("/series", response_model=StatsSeries)
+def get_stats_series(
+    date_from: date = Query(..., alias="from", description="Primer día (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Último día, inclusive (YYYY-MM-DD)"),
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="day, week o month"),
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Serie de tiempo de citas e ingresos entre dos fechas, para gráficos.
+    Devuelve un punto por día/semana/mes aunque no haya citas (serie densa).
+    Las semanas empiezan el lunes; el primer y último intervalo solo cuentan
+    los días dentro del rango.
+    """
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=400,
+            detail="La fecha 'to' debe ser igual o posterior a 'from'"
+        )
+
+    if len(series_buckets(date_from, date_to, granularity)) > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La serie no puede tener más de {MAX_SERIES_POINTS} puntos; usa una granularidad mayor"
+        )
+
+    rows = get_series_rows(db, current_worker.id, date_from, date_to, granularity)
+    names = [name for name, _ in SERIES_COLUMNS]
+
+    return StatsSeries(
+        granularity=granularity,
+        date_from=str(date_from),
+        date_to=str(date_to),
+        points=[
+            SeriesPoint(period_start=str(bucket), **dict(zip(names, values)))
+            for bucket, *values in rows
+        ]
+    )
+
+
+@router.get("/services-popular", response_model=List[ServicePopularity])
+def get_popular_services(
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    current_worker: Worker = Depends(get_current_worker)
+):
+    """
+    Obtiene los servicios más populares.
+    """
+    return get_popular_services_for(db, current_worker.id, limit)
@@ -1,6 +1,9 @@
+from contextlib import contextmanager
 from datetime import datetime, time, timedelta, date as date_type
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
+from typing import NamedTuple, Optional
 
 from app.models.appointment import Appointment
 from app.models.service import Service
@@ -85,6 +88,54 @@ def validate_appointment_time(
             )
 
 
+# Restricción de exclusión creada en migrations/004_appointments_no_overlap.sql
+OVERLAP_CONSTRAINT = "appointments_no_overlap"
+EXCLUSION_VIOLATION = "23P01"
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    """Indica si el IntegrityError viene de la restricción anti-solapamiento"""
+    original = getattr(error, "orig", None)
+    if getattr(original, "pgcode", None) == EXCLUSION_VIOLATION:
+        return True
+    return OVERLAP_CONSTRAINT in str(original)
+
+
+@contextmanager
+def overlap_as_conflict(db: Session):
+    """
+    Traduce la violación de la restricción anti-solapamiento al mismo 409 de
+    `validate_appointment_time`. Cualquier IntegrityError deja la sesión en rollback.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        db.rollback()
+        if is_overlap_violation(error):
+            raise HTTPException(
+                status_code=409,
+                detail="Conflicto de horario: ese horario acaba de ser reservado por otra cita"
+            )
+        raise
+
+
+def flush_appointment(db: Session) -> None:
+    """Envía el INSERT/UPDATE pendiente (para obtener el id) sin hacer commit"""
+    with overlap_as_conflict(db):
+        db.flush()
+
+
+def commit_appointment(db: Session) -> None:
+    """
+    Hace commit de una cita nueva o editada.
+
+    Si dos reservas simultáneas pasaron `validate_appointment_time`, la base de
+    datos rechaza la segunda; se traduce al mismo 409 de la validación.
+    """
+    with overlap_as_conflict(db):
+        db.commit()
+
+
 def get_total_duration(service_id: int, additional_id: int = None, db: Session = None) -> int:
     """Calcula la duración total de una cita"""
     service = db.query(Service).filter(Service.id == service_id).first()
@@ -108,4 +159,42 @@ def get_total_duration(service_id: int, additional_id: int = None, db: Session =
         
         total_duration += additional.extra_duration
     
-    return total_duration
\ No newline at end of file
+    return total_duration
+
+
+class PriceSnapshot(NamedTuple):
+    """Precios y duración que se guardan en la cita"""
+    service_price: int
+    additional_price: Optional[int]
+    duration_minutes: int
+
+
+def get_price_snapshot(service_id: int, additional_id: int = None, db: Session = None) -> PriceSnapshot:
+    """
+    Precios actuales del servicio y adicional, y la duración total, para
+    guardarlos en la cita. Mismas validaciones que `get_total_duration`.
+    """
+    service = db.query(Service).filter(Service.id == service_id).first()
+    
+    if not service:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Servicio con ID {service_id} no encontrado"
+        )
+    
+    if not additional_id:
+        return PriceSnapshot(service.price, None, service.duration_minutes)
+    
+    additional = db.query(Additional).filter(Additional.id == additional_id).first()
+    
+    if not additional:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Adicional con ID {additional_id} no encontrado"
+        )
+    
+    return PriceSnapshot(
+        service.price,
+        additional.price,
+        service.duration_minutes + additional.extra_duration
+    )
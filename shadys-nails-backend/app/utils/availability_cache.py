@@ -0,0 +1,181 @@
+"""
+Cache en memoria para la disponibilidad de un worker en un día.
+
+Clave: (worker_id, fecha, duración_total). Como la clave ya incluye la
+duración, el valor no depende de qué servicio/adicional se pidió.
+
+- Expulsión LRU cuando se supera `max_entries`.
+- Cada entrada vence después de `ttl_seconds`.
+- Se invalida desde los routers cuando cambia algo que afecta ese día:
+  citas (crear, editar, cancelar), horario semanal, bloqueos y duraciones
+  de servicios.
+
+Una petición que calculó un día antes de que se confirmara una reserva podría
+guardar su resultado después de la invalidación y dejar el horario "libre"
+hasta el TTL. Para evitarlo cada invalidación lleva un número creciente
+(`generation()`): quien calcula lee el número antes de cargar de la base y
+`set()` descarta el resultado si ese (worker, día) se invalidó después.
+
+Es un cache por proceso: si el servidor corre con varios procesos, cada uno
+tiene el suyo y el TTL acota cuánto puede durar un dato viejo en los demás.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+
+class DayResult(NamedTuple):
+    """Resultado cacheado de un worker en un día"""
+    is_blocked: bool
+    block_reason: Optional[str]
+    # Inicios libres en minutos desde medianoche
+    free_starts: Tuple[int, ...]
+
+
+CacheKey = Tuple[int, date, int]
+
+
+class AvailabilityCache:
+    """LRU con TTL e índice por worker para invalidar sin recorrer todo el cache"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, DayResult]]" = OrderedDict()
+        self._by_worker: Dict[int, Set[CacheKey]] = {}
+        # Número de la última invalidación de cada (worker, día), de cada
+        # worker y de todo el cache
+        self._generation = 0
+        self._day_generations: Dict[Tuple[int, date], int] = {}
+        self._worker_generations: Dict[int, int] = {}
+        self._cleared_generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+
+    def generation(self) -> int:
+        """Leer ANTES de cargar los datos que se van a pasar a `set()`"""
+        with self._lock:
+            return self._generation
+
+    def get(self, worker_id: int, day: date, duration_minutes: int) -> Optional[DayResult]:
+        key = (worker_id, day, duration_minutes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        worker_id: int,
+        day: date,
+        duration_minutes: int,
+        value: DayResult,
+        generation: Optional[int] = None
+    ) -> None:
+        """Guarda un resultado; con `generation` se descarta si el día se invalidó después"""
+        if self.max_entries <= 0:
+            return
+        key = (worker_id, day, duration_minutes)
+        with self._lock:
+            if generation is not None and generation < self._invalidated_at(worker_id, day):
+                self.stale_writes += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._by_worker.setdefault(worker_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_day(self, worker_id: int, day: date) -> None:
+        """Borra todas las duraciones cacheadas de un worker en un día"""
+        with self._lock:
+            keys = [key for key in self._by_worker.get(worker_id, ()) if key[1] == day]
+            for key in keys:
+                self._remove(key)
+            self._generation += 1
+            self._day_generations[(worker_id, day)] = self._generation
+            if len(self._day_generations) > self.max_entries:
+                # Acota la memoria: olvidar los días equivale a invalidar todo
+                # para los cálculos en curso (solo pierden su escritura)
+                self._day_generations.clear()
+                self._cleared_generation = self._generation
+            self.invalidations += 1
+
+    def invalidate_worker(self, worker_id: int) -> None:
+        """Borra todos los días cacheados de un worker (ej. cambió su horario)"""
+        with self._lock:
+            for key in list(self._by_worker.get(worker_id, ())):
+                self._remove(key)
+            self._generation += 1
+            self._worker_generations[worker_id] = self._generation
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_worker.clear()
+            self._generation += 1
+            self._day_generations.clear()
+            self._worker_generations.clear()
+            self._cleared_generation = self._generation
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Hashable]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_writes": self.stale_writes,
+            }
+
+    def _invalidated_at(self, worker_id: int, day: date) -> int:
+        # Debe llamarse con el lock tomado
+        return max(
+            self._cleared_generation,
+            self._worker_generations.get(worker_id, 0),
+            self._day_generations.get((worker_id, day), 0)
+        )
+
+    def _remove(self, key: CacheKey) -> None:
+        # Debe llamarse con el lock tomado
+        self._entries.pop(key, None)
+        worker_keys = self._by_worker.get(key[0])
+        if worker_keys is not None:
+            worker_keys.discard(key)
+            if not worker_keys:
+                del self._by_worker[key[0]]
+
+
+availability_cache = AvailabilityCache(
+    max_entries=int(os.getenv("AVAILABILITY_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "60"))
+)
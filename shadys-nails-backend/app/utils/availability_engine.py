@@ -0,0 +1,179 @@
+"""
+Motor de disponibilidad en minutos desde medianoche.
+
+En lugar de probar cada slot contra cada cita (O(slots × citas) creando
+objetos datetime en cada comparación), convierte todo a enteros una sola vez:
+
+1. Cada intervalo ocupado [inicio, fin) (citas + descanso) prohíbe los
+   inicios `s` que cumplan  inicio - duración < s < fin.
+2. Esos rangos prohibidos se ordenan y fusionan una sola vez.
+3. Un barrido lineal recorre los inicios candidatos y los rangos fusionados
+   a la vez, emitiendo los inicios libres.
+
+Devuelve exactamente los mismos slots que `generate_time_slots` +
+`is_slot_available` de app/routers/availability.py, incluyendo los casos
+borde de citas que terminan después de medianoche.
+"""
+
+from datetime import time
+from typing import Iterable, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def time_to_minutes(value: time) -> int:
+    """Convierte un `time` a minutos desde medianoche (ignora segundos)"""
+    return value.hour * 60 + value.minute
+
+
+def time_to_minutes_ceil(value: time) -> int:
+    """
+    Igual que `time_to_minutes` pero redondea hacia arriba si hay segundos.
+    Se usa para el fin de los intervalos ocupados: un slot que empieza a las
+    10:00 sí choca con una cita que termina a las 10:00:30.
+    """
+    minutes = time_to_minutes(value)
+    if value.second or value.microsecond:
+        minutes += 1
+    return minutes
+
+
+def minutes_to_slot(minutes: int) -> str:
+    """Convierte minutos desde medianoche al formato HH:MM:SS de la API"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def candidate_starts(work_start: int, work_end: int, interval_minutes: int = 15) -> List[int]:
+    """
+    Inicios candidatos del día, equivalente a `generate_time_slots` filtrando
+    los que no son anteriores al cierre.
+    """
+    # Si el cierre es menor que la apertura el turno cruza medianoche
+    end = work_end if work_end >= work_start else work_end + MINUTES_PER_DAY
+    starts = []
+    for minute in range(work_start, end + 1, interval_minutes):
+        minute %= MINUTES_PER_DAY
+        if minute < work_end:
+            starts.append(minute)
+    return starts
+
+
+def merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Fusiona rangos abiertos (lo, hi) ordenándolos una sola vez.
+    Dos rangos abiertos se fusionan si comparten al menos un entero.
+    """
+    merged: List[List[int]] = []
+    for lo, hi in sorted(ranges):
+        if hi - lo < 2:
+            # Rango abierto sin enteros dentro, no prohíbe nada
+            continue
+        if merged and lo < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return [(lo, hi) for lo, hi in merged]
+
+
+def fits_across_midnight(
+    start: int,
+    duration_minutes: int,
+    work_end: int,
+    busy: List[Tuple[int, int]]
+) -> bool:
+    """
+    Evalúa un inicio cuya cita termina en o después de medianoche.
+
+    Replica literalmente la regla histórica de `is_slot_available`, que compara
+    la hora de fin "dada la vuelta" (ej. 01:00) contra el cierre y las citas.
+    """
+    end = (start + duration_minutes) % MINUTES_PER_DAY
+    if end > work_end and end != 0:
+        return False
+    for busy_start, busy_end in busy:
+        if start < busy_end and end > busy_start:
+            return False
+    return True
+
+
+def compute_free_starts(
+    work_start: int,
+    work_end: int,
+    duration_minutes: int,
+    appointments: Iterable[Tuple[int, int]],
+    break_interval: Optional[Tuple[int, int]] = None,
+    interval_minutes: int = 15
+) -> List[int]:
+    """
+    Calcula los inicios libres (minutos desde medianoche) de un día laboral.
+
+    Args:
+        work_start: Apertura en minutos
+        work_end: Cierre en minutos
+        duration_minutes: Duración total de la cita a agendar
+        appointments: Pares (inicio, fin) en minutos de las citas no canceladas
+        break_interval: Par (inicio, fin) del descanso, si existe
+        interval_minutes: Separación entre inicios candidatos
+
+    Returns:
+        Lista ordenada de inicios libres en minutos
+    """
+    busy = list(appointments)
+    if break_interval is not None:
+        busy.append(break_interval)
+
+    forbidden = merge_ranges(
+        (busy_start - duration_minutes, busy_end) for busy_start, busy_end in busy
+    )
+
+    free = []
+    index = 0
+    for start in candidate_starts(work_start, work_end, interval_minutes):
+        if start + duration_minutes >= MINUTES_PER_DAY:
+            if fits_across_midnight(start, duration_minutes, work_end, busy):
+                free.append(start)
+            continue
+
+        # La cita debe terminar antes o a la misma hora del cierre
+        if start + duration_minutes > work_end:
+            continue
+
+        # Avanzar el puntero hasta el primer rango que aún no terminó
+        while index < len(forbidden) and forbidden[index][1] <= start:
+            index += 1
+
+        if index < len(forbidden) and forbidden[index][0] < start:
+            continue
+
+        free.append(start)
+
+    return free
+
+
+def free_slots_for_day(
+    start_time: time,
+    end_time: time,
+    duration_minutes: int,
+    existing_appointments: Iterable,
+    break_start: Optional[time] = None,
+    break_end: Optional[time] = None
+) -> List[str]:
+    """
+    Versión con objetos `time` de `compute_free_starts`.
+    `existing_appointments` solo necesita exponer start_time y end_time.
+    """
+    break_interval = None
+    if break_start and break_end:
+        break_interval = (time_to_minutes(break_start), time_to_minutes_ceil(break_end))
+
+    free = compute_free_starts(
+        work_start=time_to_minutes(start_time),
+        work_end=time_to_minutes(end_time),
+        duration_minutes=duration_minutes,
+        appointments=[
+            (time_to_minutes(appt.start_time), time_to_minutes_ceil(appt.end_time))
+            for appt in existing_appointments
+        ],
+        break_interval=break_interval
+    )
+    return [minutes_to_slot(minute) for minute in free]
@@ -0,0 +1,179 @@
+"""
+Mantenimiento de la tabla daily_worker_stats.
+
+Cada cambio de una cita (crear, editar, confirmar, completar, cancelar) resta
+la contribución anterior y suma la nueva con un UPSERT en la misma
+transacción. `rebuild_daily_stats` recalcula todo desde appointments.
+
+El ingreso de una cita sale de los precios guardados en la propia cita
+(service_price + additional_price), así que no hace falta ningún JOIN y
+cambiar un precio no altera el histórico.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.daily_worker_stats import DailyWorkerStats
+
+# Columna de conteo para cada status conocido
+STATUS_COUNT_COLUMNS = {
+    "pending": "pending_count",
+    "confirmed": "confirmed_count",
+    "completed": "completed_count",
+    "cancelled": "cancelled_count",
+}
+PENDING_STATUSES = ("pending", "confirmed")
+
+
+class StatsContribution(NamedTuple):
+    """Lo que una cita aporta al rollup de su worker y día"""
+    worker_id: int
+    date: date
+    status: str
+    revenue: int
+
+
+# ─────────────────────────────────────────────
+# Expresiones SQL
+# ─────────────────────────────────────────────
+
+def revenue_expression():
+    """
+    Ingreso de una cita con los precios guardados en ella.
+    Si la cita no tiene service_price (servicio inexistente al migrar) es NULL
+    y SUM lo ignora.
+    """
+    return Appointment.service_price + func.coalesce(Appointment.additional_price, 0)
+
+
+def count_where(condition):
+    return func.count(Appointment.id).filter(condition)
+
+
+def sum_where(expression, condition=None):
+    total = func.sum(expression)
+    if condition is not None:
+        total = total.filter(condition)
+    return func.coalesce(total, 0)
+
+
+# ─────────────────────────────────────────────
+# Actualización incremental
+# ─────────────────────────────────────────────
+
+def appointment_revenue(appointment: Appointment) -> int:
+    """Mismo valor que `revenue_expression` para una cita en memoria"""
+    if appointment.service_price is None:
+        return 0
+    return appointment.service_price + (appointment.additional_price or 0)
+
+
+def contribution_of(appointment: Appointment) -> StatsContribution:
+    """Contribución actual de `appointment` al rollup"""
+    return StatsContribution(
+        appointment.worker_id, appointment.date, appointment.status, appointment_revenue(appointment)
+    )
+
+
+def _add_deltas(deltas: Dict[Tuple[int, date], Counter], contribution: StatsContribution, sign: int) -> None:
+    row = deltas.setdefault((contribution.worker_id, contribution.date), Counter())
+    row["total_count"] += sign
+    row["estimated_revenue"] += sign * contribution.revenue
+    if contribution.status in STATUS_COUNT_COLUMNS:
+        row[STATUS_COUNT_COLUMNS[contribution.status]] += sign
+    if contribution.status == "completed":
+        row["actual_revenue"] += sign * contribution.revenue
+    elif contribution.status in PENDING_STATUSES:
+        row["pending_revenue"] += sign * contribution.revenue
+
+
+def _upsert(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(DailyWorkerStats)
+    return postgresql.insert(DailyWorkerStats)
+
+
+def record_stats_change(
+    db: Session,
+    old: Optional[StatsContribution],
+    new: Optional[StatsContribution]
+) -> None:
+    """
+    Aplica al rollup el paso de `old` a `new` (cualquiera puede ser None).
+    No hace commit: se guarda junto con el cambio de la cita.
+    """
+    record_stats_changes(db, [(old, new)])
+
+
+def record_stats_changes(
+    db: Session,
+    changes: Iterable[Tuple[Optional[StatsContribution], Optional[StatsContribution]]]
+) -> None:
+    """
+    Como `record_stats_change` para varias citas a la vez (ej. vencer
+    pendientes en lote): un solo UPSERT por worker y día.
+    """
+    deltas: Dict[Tuple[int, date], Counter] = {}
+    for old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            _add_deltas(deltas, old, -1)
+        if new is not None:
+            _add_deltas(deltas, new, +1)
+
+    for (worker_id, day), row in deltas.items():
+        values = {column: value for column, value in row.items() if value}
+        if not values:
+            continue
+        stmt = _upsert(db).values(worker_id=worker_id, date=day, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyWorkerStats.worker_id, DailyWorkerStats.date],
+            set_={
+                **{column: getattr(DailyWorkerStats, column) + stmt.excluded[column] for column in values},
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+
+# ─────────────────────────────────────────────
+# Recalcular desde cero
+# ─────────────────────────────────────────────
+
+def rebuild_daily_stats(db: Session, worker_id: Optional[int] = None) -> int:
+    """
+    Borra y recalcula el rollup (de un worker o de todos) desde appointments.
+    Devuelve el número de filas (worker, día) generadas. No hace commit.
+    """
+    revenue = revenue_expression()
+    columns = {
+        "worker_id": Appointment.worker_id,
+        "date": Appointment.date,
+        "total_count": func.count(Appointment.id),
+        **{
+            column: count_where(Appointment.status == status)
+            for status, column in STATUS_COUNT_COLUMNS.items()
+        },
+        "estimated_revenue": sum_where(revenue),
+        "actual_revenue": sum_where(revenue, Appointment.status == "completed"),
+        "pending_revenue": sum_where(revenue, Appointment.status.in_(PENDING_STATUSES)),
+    }
+    aggregate = select(
+        *(expression.label(name) for name, expression in columns.items())
+    ).group_by(Appointment.worker_id, Appointment.date)
+
+    clear = delete(DailyWorkerStats)
+    if worker_id is not None:
+        aggregate = aggregate.where(Appointment.worker_id == worker_id)
+        clear = clear.where(DailyWorkerStats.worker_id == worker_id)
+
+    db.execute(clear)
+    result = db.execute(insert(DailyWorkerStats).from_select(list(columns), aggregate))
+    return result.rowcount
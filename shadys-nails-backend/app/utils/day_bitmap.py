@@ -0,0 +1,137 @@
+"""
+Ocupación de un día de trabajo como bitmap de 1440 bits (un bit por minuto).
+
+El bit `m` está encendido si el minuto `m` está libre (dentro del horario
+laboral y sin citas ni descanso). Como el bitmap es un `int` de Python, las
+operaciones sobre todo el día se hacen con unos pocos shifts y ANDs:
+
+- `fit_mask(duracion)` devuelve otro bitmap con el bit `t` encendido si un
+  bloque de `duracion` minutos cabe empezando en `t`. Se calcula con
+  "shift-and" duplicando el tamaño de la ventana, O(log duracion) operaciones
+  para TODOS los inicios a la vez.
+- Combinar días o manicuristas es un OR/AND entre bitmaps.
+
+Los casos raros (citas que cruzan medianoche o duraciones no positivas) se
+delegan al barrido de app/utils/availability_engine.py para conservar
+exactamente la semántica histórica de `is_slot_available`.
+"""
+
+from datetime import time
+from typing import Iterable, List, Optional, Tuple
+
+from app.utils.availability_engine import (
+    MINUTES_PER_DAY,
+    candidate_starts,
+    compute_free_starts,
+    fits_across_midnight,
+    minutes_to_slot,
+    time_to_minutes,
+    time_to_minutes_ceil,
+)
+
+
+def range_mask(start: int, end: int) -> int:
+    """Bitmap con los minutos [start, end) encendidos"""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class DayOccupancy:
+    """
+    Ocupación de un worker en un día concreto.
+
+    Uso:
+        day = DayOccupancy(work_start=540, work_end=1200)
+        day.add_busy(600, 660)
+        day.free_starts(duration_minutes=60)
+    """
+
+    __slots__ = ("work_start", "work_end", "free", "busy", "irregular")
+
+    def __init__(self, work_start: int, work_end: int):
+        self.work_start = work_start
+        self.work_end = work_end
+        # Intervalos ocupados tal cual, para los casos que no caben en el bitmap
+        self.busy: List[Tuple[int, int]] = []
+        # True si hay intervalos que cruzan medianoche o están vacíos
+        self.irregular = False
+
+        if work_end >= work_start:
+            self.free = range_mask(work_start, work_end)
+        else:
+            # Turno que cruza medianoche
+            self.free = range_mask(0, work_end) | range_mask(work_start, MINUTES_PER_DAY)
+
+    @classmethod
+    def from_day(
+        cls,
+        start_time: time,
+        end_time: time,
+        existing_appointments: Iterable = (),
+        break_start: Optional[time] = None,
+        break_end: Optional[time] = None
+    ) -> "DayOccupancy":
+        """
+        Construye la ocupación a partir de un horario (`WorkerSchedule` o defaults),
+        su descanso y las citas del día (objetos con start_time y end_time).
+        """
+        day = cls(time_to_minutes(start_time), time_to_minutes(end_time))
+        if break_start and break_end:
+            day.add_busy(time_to_minutes(break_start), time_to_minutes_ceil(break_end))
+        for appt in existing_appointments:
+            day.add_busy(time_to_minutes(appt.start_time), time_to_minutes_ceil(appt.end_time))
+        return day
+
+    def add_busy(self, start: int, end: int) -> None:
+        """Marca como ocupados los minutos [start, end)"""
+        self.busy.append((start, end))
+        if end <= start:
+            self.irregular = True
+            return
+        self.free &= ~range_mask(start, end)
+
+    def fit_mask(self, duration_minutes: int) -> int:
+        """
+        Bitmap con el bit `t` encendido si los minutos [t, t + duración) están libres.
+        """
+        runs = self.free
+        covered = 1
+        while covered < duration_minutes:
+            step = min(covered, duration_minutes - covered)
+            runs &= runs >> step
+            covered += step
+        return runs
+
+    def is_free(self, start: int, duration_minutes: int) -> bool:
+        """Indica si un bloque de `duration_minutes` cabe empezando en `start`"""
+        if start + duration_minutes > MINUTES_PER_DAY:
+            return False
+        return (self.free & range_mask(start, start + duration_minutes)) == range_mask(
+            start, start + duration_minutes
+        )
+
+    def free_starts(self, duration_minutes: int, interval_minutes: int = 15) -> List[int]:
+        """
+        Inicios libres (minutos desde medianoche) cada `interval_minutes`.
+        Devuelve lo mismo que `compute_free_starts` del motor de barrido.
+        """
+        if self.irregular or duration_minutes <= 0:
+            return compute_free_starts(
+                self.work_start, self.work_end, duration_minutes, self.busy,
+                interval_minutes=interval_minutes
+            )
+
+        fit = self.fit_mask(duration_minutes)
+        free = []
+        for start in candidate_starts(self.work_start, self.work_end, interval_minutes):
+            if start + duration_minutes >= MINUTES_PER_DAY:
+                if fits_across_midnight(start, duration_minutes, self.work_end, self.busy):
+                    free.append(start)
+            elif (fit >> start) & 1:
+                free.append(start)
+        return free
+
+    def free_slots(self, duration_minutes: int, interval_minutes: int = 15) -> List[str]:
+        """Como `free_starts` pero en formato HH:MM:SS"""
+        return [minutes_to_slot(m) for m in self.free_starts(duration_minutes, interval_minutes)]
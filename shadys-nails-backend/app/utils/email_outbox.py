@@ -0,0 +1,327 @@
+"""
+Outbox de correos.
+
+Los routers llaman a `enqueue_email(db, ...)` (o `enqueue_emails` para varios
+correos en un solo INSERT) ANTES del commit: el correo se guarda en
+`email_outbox` en la misma transacción que la cita, así que no se pierde si
+el servidor se reinicia ni se envía si el commit falla.
+
+El sender (`process_outbox_async`, tarea "email-sender" de app/main.py):
+
+1. Reclama un lote con `FOR UPDATE SKIP LOCKED` y lo marca 'sending' con un
+   vencimiento (`EMAIL_OUTBOX_LEASE_SECONDS`). Varios procesos pueden correr
+   el sender sin enviar dos veces la misma fila; si un proceso muere a mitad
+   de envío, la fila se vuelve a reclamar cuando vence el reclamo.
+2. Envía los correos del lote a la vez por el transporte asíncrono de
+   app/utils/email_transport.py (cliente HTTP compartido + semáforo).
+   Con `EMAIL_BATCH_MAX_MESSAGES` > 1 (el Apps Script debe aceptar lotes, ver
+   CONFIGURAR_EMAIL.md) los agrupa: hasta ese número de correos por POST, y
+   antes de reclamar espera a juntar un lote lleno o a que el correo más
+   antiguo lleve `EMAIL_BATCH_MAX_WAIT_SECONDS` listo. Así una ráfaga (una
+   manicurista aceptando diez citas) sale en uno o dos POST en vez de diez.
+3. Guarda el resultado de todo el lote en un commit: 'sent', o reintento con
+   backoff exponencial hasta `EMAIL_OUTBOX_MAX_ATTEMPTS` intentos y después
+   'failed'.
+
+Como mucho una vez cada `EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS`, el sender borra
+los 'sent' con más de `EMAIL_OUTBOX_RETENTION_DAYS` días (`prune_sent_emails`)
+para que la tabla no crezca sin límite. Los 'failed' se conservan para revisarlos.
+"""
+
+import asyncio
+import os
+import threading
+import time as clock
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.utils.email_service import _get_script_url, _is_email_enabled, validate_email
+from app.utils.email_transport import AsyncEmailTransport, email_transport
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", "30"))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_RETRY_MAX_SECONDS", "3600"))
+EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+# 1 = un POST por correo (el Apps Script de siempre)
+EMAIL_BATCH_MAX_MESSAGES = int(os.getenv("EMAIL_BATCH_MAX_MESSAGES", "1"))
+EMAIL_BATCH_MAX_WAIT_SECONDS = float(os.getenv("EMAIL_BATCH_MAX_WAIT_SECONDS", "2"))
+# 0 conserva los enviados para siempre
+EMAIL_OUTBOX_RETENTION_DAYS = float(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "30"))
+EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS = float(os.getenv("EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS", "3600"))
+EMAIL_OUTBOX_PRUNE_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_PRUNE_BATCH_SIZE", "1000"))
+
+# El sender duerme entre pasadas; `wake_email_sender` lo despierta antes
+email_sender_wakeup = threading.Event()
+# Última limpieza de enviados (time.monotonic) en este proceso
+_last_prune_at: Optional[float] = None
+
+
+class OutboxEmail(NamedTuple):
+    subject: str
+    recipient: str
+    body_html: str
+
+
+def enqueue_emails(db: Session, emails: Sequence[OutboxEmail]) -> int:
+    """
+    Agrega correos al outbox en la transacción actual (no hace commit).
+    Todos van en un solo INSERT. Retorna cuántos se encolaron.
+    """
+    if not _is_email_enabled():
+        for email in emails:
+            print(f"📧 [SIMULACIÓN] Email para: {email.recipient} | Asunto: {email.subject} (EMAIL_ENABLED=false)")
+        return 0
+
+    now = datetime.now()
+    rows = []
+    for email in emails:
+        if not validate_email(email.recipient):
+            print(f"❌ Email inválido: {email.recipient}")
+            continue
+        rows.append({
+            "recipient": email.recipient,
+            "subject": email.subject,
+            "body_html": email.body_html,
+            "status": 'pending',
+            "attempts": 0,
+            "next_attempt_at": now,
+        })
+
+    if rows:
+        db.execute(insert(EmailOutbox), rows)
+    return len(rows)
+
+
+def enqueue_email(db: Session, subject: str, recipient: str, body_html: str) -> bool:
+    """
+    Agrega un correo al outbox en la transacción actual (no hace commit).
+    Retorna False si el destinatario no es válido.
+    """
+    queued = enqueue_emails(db, [OutboxEmail(subject, recipient, body_html)])
+    return queued == 1 or not _is_email_enabled()
+
+
+def wake_email_sender() -> None:
+    """Pide al sender que revise el outbox sin esperar al próximo intervalo"""
+    email_sender_wakeup.set()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponencial: base, 2x base, 4x base... con tope"""
+    seconds = EMAIL_OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+
+def due_summary(db: Session) -> Tuple[int, Optional[datetime]]:
+    """Cuántos correos están listos para enviar y desde cuándo espera el más antiguo"""
+    statement = select(func.count(EmailOutbox.id), func.min(EmailOutbox.next_attempt_at)).where(
+        EmailOutbox.status.in_(('pending', 'sending')),
+        EmailOutbox.next_attempt_at <= datetime.now()
+    )
+    count, oldest = db.execute(statement).one()
+    # No dejar la transacción abierta mientras se espera
+    db.commit()
+    return count, oldest
+
+
+async def wait_for_full_batch(
+    db: Session,
+    size: int,
+    max_wait_seconds: float,
+    wakeup: Optional[threading.Event]
+) -> bool:
+    """
+    Espera hasta que haya `size` correos listos o hasta que el más antiguo
+    lleve `max_wait_seconds` esperando. Retorna False si no hay nada que enviar.
+    """
+    while True:
+        count, oldest = await asyncio.to_thread(due_summary, db)
+        if count == 0:
+            return False
+        remaining = max_wait_seconds - (datetime.now() - oldest).total_seconds()
+        if count >= size or remaining <= 0:
+            return True
+        # Cada correo encolado despierta al sender: se vuelve a contar
+        if wakeup is None:
+            await asyncio.sleep(remaining)
+        else:
+            await asyncio.to_thread(wakeup.wait, remaining)
+            wakeup.clear()
+
+
+def claim_batch(db: Session, limit: int) -> List[EmailOutbox]:
+    """Reclama hasta `limit` correos listos para enviar y hace commit del reclamo"""
+    now = datetime.now()
+    statement = (
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.status.in_(('pending', 'sending')),
+            EmailOutbox.next_attempt_at <= now
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    batch = db.execute(statement).scalars().all()
+    for email in batch:
+        email.status = 'sending'
+        email.next_attempt_at = now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS)
+    db.commit()
+    return batch
+
+
+def record_outcomes(db: Session, batch: Sequence[EmailOutbox], errors: Sequence[Optional[str]]) -> None:
+    """Guarda el resultado de cada correo del lote (un solo commit)"""
+    now = datetime.now()
+    for email, error in zip(batch, errors):
+        email.attempts += 1
+        if error is None:
+            email.status = 'sent'
+            email.sent_at = now
+            email.last_error = None
+        elif email.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = 'failed'
+            email.last_error = error
+        else:
+            email.status = 'pending'
+            email.next_attempt_at = now + retry_delay(email.attempts)
+            email.last_error = error
+    db.commit()
+
+
+def prune_sent_emails(
+    db: Session,
+    retention_days: float = EMAIL_OUTBOX_RETENTION_DAYS,
+    batch_size: int = EMAIL_OUTBOX_PRUNE_BATCH_SIZE
+) -> int:
+    """
+    Borra los correos 'sent' más viejos que `retention_days`, de a `batch_size`
+    filas por transacción para no bloquear la tabla. Retorna cuántos borró.
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        expired_ids = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == 'sent', EmailOutbox.sent_at < cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(EmailOutbox).where(EmailOutbox.id.in_(expired_ids)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    if deleted:
+        print(f"🧹 [OUTBOX] Correos enviados hace más de {retention_days:g} días eliminados: {deleted}")
+    return deleted
+
+
+def prune_if_due(db: Session, retention_days: float) -> int:
+    """`prune_sent_emails` como mucho una vez por EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS"""
+    global _last_prune_at
+    now = clock.monotonic()
+    if _last_prune_at is not None and now - _last_prune_at < EMAIL_OUTBOX_PRUNE_INTERVAL_SECONDS:
+        return 0
+    _last_prune_at = now
+    return prune_sent_emails(db, retention_days)
+
+
+async def send_claimed(
+    transport: AsyncEmailTransport,
+    script_url: str,
+    batch: Sequence[EmailOutbox],
+    batch_messages: int
+) -> List[Optional[str]]:
+    """Envía el lote reclamado: un POST por correo, o de a `batch_messages` por POST"""
+    if batch_messages <= 1:
+        return await asyncio.gather(*(
+            transport.send(script_url, email.subject, email.recipient, email.body_html)
+            for email in batch
+        ))
+
+    chunks = [batch[start:start + batch_messages] for start in range(0, len(batch), batch_messages)]
+    results = await asyncio.gather(*(
+        transport.send_batch(script_url, [(email.subject, email.recipient, email.body_html) for email in chunk])
+        for chunk in chunks
+    ))
+    return [error for chunk_errors in results for error in chunk_errors]
+
+
+async def process_outbox_async(
+    session_factory: Callable[[], Session] = SessionLocal,
+    script_url: Optional[str] = None,
+    batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+    transport: AsyncEmailTransport = email_transport,
+    batch_messages: int = EMAIL_BATCH_MAX_MESSAGES,
+    max_wait_seconds: float = EMAIL_BATCH_MAX_WAIT_SECONDS,
+    wakeup: Optional[threading.Event] = email_sender_wakeup,
+    retention_days: float = EMAIL_OUTBOX_RETENTION_DAYS
+) -> int:
+    """
+    Envía los correos pendientes, lote por lote, hasta vaciar el outbox.
+    Los correos de un lote se envían a la vez (con el tope del semáforo del
+    transporte); la base se usa desde un hilo para no bloquear el event loop.
+    Antes, si corresponde, borra los enviados viejos.
+    Retorna cuántos correos se intentaron enviar.
+    """
+    script_url = script_url if script_url is not None else _get_script_url()
+    if not script_url:
+        # Sin URL no se reclama nada: los correos esperan a que se configure
+        return 0
+
+    db = session_factory()
+    # Los objetos se siguen usando después de cada commit
+    db.expire_on_commit = False
+    processed = 0
+    try:
+        await asyncio.to_thread(prune_if_due, db, retention_days)
+
+        if batch_messages > 1 and not await wait_for_full_batch(db, batch_messages, max_wait_seconds, wakeup):
+            return 0
+
+        while True:
+            batch = await asyncio.to_thread(claim_batch, db, batch_size)
+            errors = await send_claimed(transport, script_url, batch, batch_messages)
+            await asyncio.to_thread(record_outcomes, db, batch, errors)
+            for email, error in zip(batch, errors):
+                if error is None:
+                    print(f"✅ [OUTBOX] Email {email.id} enviado a {email.recipient}")
+                else:
+                    print(f"❌ [OUTBOX] Email {email.id} a {email.recipient} (intento {email.attempts}): {error}")
+            processed += len(batch)
+            if len(batch) < batch_size:
+                return processed
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+def process_outbox(
+    session_factory: Callable[[], Session] = SessionLocal,
+    script_url: Optional[str] = None,
+    batch_size: int = EMAIL_OUTBOX_BATCH_SIZE,
+    batch_messages: int = EMAIL_BATCH_MAX_MESSAGES,
+    max_wait_seconds: float = EMAIL_BATCH_MAX_WAIT_SECONDS
+) -> int:
+    """Versión síncrona para scripts y tests: usa su propio event loop y transporte"""
+    async def run() -> int:
+        transport = AsyncEmailTransport()
+        try:
+            return await process_outbox_async(
+                session_factory, script_url, batch_size, transport,
+                batch_messages=batch_messages, max_wait_seconds=max_wait_seconds, wakeup=None
+            )
+        finally:
+            await transport.aclose()
+
+    return asyncio.run(run())
@@ -0,0 +1,220 @@
+"""
+Registro de templates HTML de los correos.
+
+Cada template se compila una sola vez al importar el módulo: el texto se parte
+en trozos estáticos y huecos (`{customer_name}`, `{date}`, ...). `render()`
+solo escapa los valores y une las piezas. Todos los huecos se escapan con
+`html.escape`, así un nombre como `<b>Ana</b>` llega como texto y no como HTML.
+
+Para agregar un template:
+
+    register_template("recordatorio", frame("#fff3cd", '''
+                <h2>...</h2>
+                <p>Hola <strong>{customer_name}</strong>,</p>
+    '''))
+
+y luego `render_template("recordatorio", customer_name=...)`.
+"""
+
+from html import escape
+from operator import itemgetter
+from string import Formatter
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+# Marco común: todos los correos comparten el <html>, el <body> y la tarjeta
+FRAME_START = (
+    "\n    <html>\n"
+    '    <body style="font-family: Arial, sans-serif; color: #333;">\n'
+    '        <div style="max-width: 600px; margin: 0 auto; padding: 20px; '
+    'border: 1px solid {border}; border-radius: 10px;{extra_style}">'
+)
+FRAME_END = "        </div>\n    </body>\n    </html>\n    "
+
+# Lista de detalles de la cita (confirmación, actualización, solicitud)
+APPOINTMENT_DETAILS = """            <ul>
+                <li><strong>Servicio:</strong> {service_name}</li>
+                <li><strong>Fecha:</strong> {date}</li>
+                <li><strong>Hora:</strong> {time}</li>
+            </ul>
+"""
+
+SIGNATURE = """            <br>
+            <p>Atentamente,<br><strong>Shady's Nails</strong></p>
+"""
+
+
+def frame(border: str, content: str, extra_style: str = "") -> str:
+    """Envuelve el contenido en el marco común (se arma antes de compilar)"""
+    return FRAME_START.format(border=border, extra_style=extra_style) + content + FRAME_END
+
+
+def tuple_getter(keys: List[Any]) -> Callable[[Any], Tuple[Any, ...]]:
+    """Como `itemgetter(*keys)`, pero siempre retorna una tupla (también con 0 o 1 claves)"""
+    if len(keys) > 1:
+        return itemgetter(*keys)
+    if keys:
+        key = keys[0]
+        return lambda container: (container[key],)
+    return lambda container: ()
+
+
+class CompiledTemplate:
+    """Template partido en trozos estáticos y huecos que se escapan al renderizar"""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        chunks: List[str] = []
+        fields: List[str] = []
+        # Orden de unión sobre la tupla (trozos..., valores escapados...)
+        order: List[int] = []
+        slot_positions: List[int] = []
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            if literal:
+                order.append(len(chunks))
+                chunks.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise ValueError(f"Hueco inválido '{{{field}}}' en el template '{name}'")
+            if field not in fields:
+                fields.append(field)
+            slot_positions.append(len(order))
+            order.append(fields.index(field))
+
+        for position in slot_positions:
+            order[position] += len(chunks)
+
+        self._chunks: Tuple[str, ...] = tuple(chunks)
+        self._values = tuple_getter(fields)
+        self._assemble = tuple_getter(order)
+        self.slot_names: FrozenSet[str] = frozenset(fields)
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._chunks)
+
+    def render(self, **values) -> str:
+        if len(values) != len(self.slot_names):
+            self._reject(values)
+        try:
+            raw = self._values(values)
+        except KeyError:
+            self._reject(values)
+
+        # Cada valor se escapa una vez aunque aparezca en varios huecos
+        escaped = tuple(map(escape, map(str, raw)))
+        return "".join(self._assemble(self._chunks + escaped))
+
+    def _reject(self, values: Dict[str, Any]) -> None:
+        missing = sorted(self.slot_names - values.keys())
+        unknown = sorted(values.keys() - self.slot_names)
+        raise KeyError(f"Template '{self.name}': faltan {missing}, sobran {unknown}")
+
+
+TEMPLATES: Dict[str, CompiledTemplate] = {}
+
+
+def register_template(name: str, source: str) -> CompiledTemplate:
+    if name in TEMPLATES:
+        raise ValueError(f"El template '{name}' ya está registrado")
+    template = CompiledTemplate(name, source)
+    TEMPLATES[name] = template
+    return template
+
+
+def render_template(name: str, **values) -> str:
+    return TEMPLATES[name].render(**values)
+
+
+register_template("confirmation", frame("#ffccf2", """
+            <h2 style="color: #d63384;">💅 ¡Cita Confirmada!</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Tu cita en <strong>Shady's Nails</strong> ha sido agendada con éxito.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <p><strong>Detalles de tu cita:</strong></p>
+""" + APPOINTMENT_DETAILS + """            <p>Te esperamos para consentirte como te mereces.</p>
+            <p style="font-size: 0.9em; color: #666;">Si necesitas cancelar o reprogramar, por favor inicia sesión en nuestra app.</p>
+""" + SIGNATURE))
+
+register_template("update", frame("#d1ecf1", """
+            <h2 style="color: #0c5460;">📝 Cita Actualizada</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Te informamos que tu cita en <strong>Shady's Nails</strong> ha sido actualizada.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <p><strong>Nuevos detalles de tu cita:</strong></p>
+""" + APPOINTMENT_DETAILS + """            <p style="background-color: #d1ecf1; padding: 10px; border-radius: 5px; font-size: 0.9em;">
+                ℹ️ {changes}
+            </p>
+            <p>Si tienes alguna duda, no dudes en contactarnos.</p>
+""" + SIGNATURE))
+
+register_template("cancellation", frame("#f8d7da", """
+            <h2 style="color: #721c24;">🚫 Cita Cancelada</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Te informamos que tu cita para <strong>{service_name}</strong> el día <strong>{date}</strong> a las <strong>{time}</strong> ha sido cancelada.</p>
+            <p>Si esto fue un error o deseas agendar una nueva cita, puedes hacerlo directamente en nuestra aplicación.</p>
+""" + SIGNATURE))
+
+register_template("request_received", frame("#fff3cd", """
+            <h2 style="color: #856404;">⏳ Solicitud Recibida</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Hemos recibido tu solicitud de cita en <strong>Shady's Nails</strong>.</p>
+            <p>Tu cita está <strong>pendiente de aprobación</strong>. Te notificaremos por correo tan pronto como sea confirmada por nuestro equipo.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <p><strong>Detalles solicitados:</strong></p>
+""" + APPOINTMENT_DETAILS + SIGNATURE))
+
+register_template("new_appointment_request_admin", frame("#d1ecf1", """
+            <h2 style="color: #0c5460;">💅 Nueva Solicitud de Cita</h2>
+            <p>Hola <strong>{worker_name}</strong>,</p>
+            <p>Tienes una nueva solicitud de cita de <strong>{customer_name}</strong>.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <ul>
+                <li><strong>Cliente:</strong> {customer_name}</li>
+                <li><strong>Servicio:</strong> {service_name}</li>
+                <li><strong>Fecha:</strong> {date}</li>
+                <li><strong>Hora:</strong> {time}</li>
+            </ul>
+            <p>Por favor ingresa a tu Dashboard para <strong>Aprobar</strong> o <strong>Rechazar</strong> esta solicitud.</p>
+"""))
+
+register_template("completion", frame("#d4edda", """
+            <h2 style="color: #155724;">✨ ¡Gracias por tu visita!</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Esperamos que hayas disfrutado tu servicio de <strong>{service_name}</strong>.</p>
+            <p>Tu cita ha sido marcada como <strong>completada</strong>.</p>
+            <p>Nos encantaría verte de nuevo pronto para seguir cuidando de ti.</p>
+            <br>
+            <p>¡Hasta la próxima!</p>
+            <p>Atentamente,<br><strong>Shady's Nails Team</strong></p>
+"""))
+
+register_template("reset_password", frame("#d1ecf1", """
+            <h2 style="color: #6f42c1;">🔐 Recuperación de Contraseña</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Has solicitado restablecer tu contraseña en <strong>Shady's Nails</strong>.</p>
+            <p>Usa el siguiente código para completar el proceso:</p>
+            <div style="background-color: #f8f9fa; padding: 20px; font-size: 2rem; font-weight: bold; letter-spacing: 5px; color: #6f42c1; border-radius: 8px; margin: 20px 0;">
+                {code}
+            </div>
+            <p>Este código expirará en <strong>15 minutos</strong>.</p>
+            <p style="font-size: 0.8em; color: #888;">Si no solicitaste este cambio, puedes ignorar este correo.</p>
+            <br>
+            <p>Atentamente,<br><strong>Shady's Nails Team</strong></p>
+""", extra_style=" text-align: center;"))
+
+register_template("reminder", frame("#ffccf2", """
+            <h2 style="color: #d63384;">⏰ Recordatorio de tu Cita</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Te recordamos que tu cita en <strong>Shady's Nails</strong> es <strong>{when}</strong>.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <p><strong>Detalles de tu cita:</strong></p>
+""" + APPOINTMENT_DETAILS + """            <p style="font-size: 0.9em; color: #666;">Si no puedes asistir, por favor cancela desde nuestra app con al menos 2 horas de anticipación.</p>
+""" + SIGNATURE))
+
+register_template("request_expired", frame("#f8d7da", """
+            <h2 style="color: #721c24;">⌛ Solicitud Vencida</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Tu solicitud de cita para <strong>{service_name}</strong> el día <strong>{date}</strong> a las <strong>{time}</strong> no pudo ser confirmada a tiempo y fue cancelada.</p>
+            <p>El horario quedó libre nuevamente. Si todavía quieres tu cita, puedes solicitar un nuevo horario en nuestra aplicación.</p>
+""" + SIGNATURE))
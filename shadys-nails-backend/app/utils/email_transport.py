@@ -0,0 +1,189 @@
+"""
+Transporte HTTP asíncrono para los correos (POST al Google Apps Script).
+
+Un solo `httpx.AsyncClient` con pool de conexiones: los envíos reutilizan la
+conexión TLS con script.google.com (y la del redirect) en vez de abrir una
+nueva por correo. Cuántos correos se envían a la vez lo decide un semáforo
+(`EMAIL_SEND_CONCURRENCY`), no la cantidad de hilos.
+
+- `await email_transport.send(...)`: lo usa el sender del outbox.
+- `await email_transport.send_batch(...)`: varios correos en un solo POST
+  (`{"messages": [...]}`); el Apps Script los recorre y responde
+  `{"results": [{"ok": true}, {"ok": false, "error": "..."}]}` en el mismo orden.
+- `email_transport.submit(...)`: para código síncrono (`send_email`); agenda
+  el envío en el event loop del servidor desde cualquier hilo.
+
+El cliente y el semáforo se crean en el event loop donde se usan por primera
+vez y quedan atados a él: usarlos desde otro loop mientras el primero sigue
+abierto lanza RuntimeError (desde otro hilo va `submit()`, o un transporte
+propio como hace `process_outbox`). El lifespan de app/main.py llama a
+`start()` y `aclose()`.
+"""
+
+import asyncio
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import httpx
+
+EMAIL_SEND_CONCURRENCY = int(os.getenv("EMAIL_SEND_CONCURRENCY", "8"))
+EMAIL_HTTP_POOL_SIZE = int(os.getenv("EMAIL_HTTP_POOL_SIZE", str(EMAIL_SEND_CONCURRENCY)))
+EMAIL_SEND_TIMEOUT_SECONDS = float(os.getenv("EMAIL_SEND_TIMEOUT_SECONDS", "25"))
+
+
+def message_payload(subject: str, recipient: str, body_html: str) -> dict:
+    return {
+        "to": recipient,
+        "subject": subject,
+        "htmlBody": body_html,
+        "body": "Por favor, visualice este correo en un cliente que soporte HTML."
+    }
+
+
+class AsyncEmailTransport:
+    """Cliente HTTP compartido con un tope de envíos simultáneos"""
+
+    def __init__(
+        self,
+        concurrency: int = EMAIL_SEND_CONCURRENCY,
+        pool_size: int = EMAIL_HTTP_POOL_SIZE,
+        timeout_seconds: float = EMAIL_SEND_TIMEOUT_SECONDS
+    ):
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.timeout_seconds = timeout_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        """Asocia el transporte al event loop actual (el del servidor)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._bind(loop)
+
+    async def aclose(self) -> None:
+        client, loop = self._client, self._loop
+        self._loop = self._client = self._semaphore = None
+        if client is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await client.aclose()
+        elif loop.is_running():
+            # El cliente se cierra en su propio event loop
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+
+    async def send(self, script_url: str, subject: str, recipient: str, body_html: str) -> Optional[str]:
+        """
+        Hace el POST al Google Apps Script.
+
+        Returns:
+            None si se envió, o la descripción del error
+        """
+        _, error = await self._post(script_url, message_payload(subject, recipient, body_html))
+        return error
+
+    async def send_batch(
+        self,
+        script_url: str,
+        messages: Sequence[Tuple[str, str, str]]
+    ) -> List[Optional[str]]:
+        """
+        Envía varios correos `(subject, recipient, body_html)` en un solo POST.
+
+        Returns:
+            Por cada correo, None si se envió o la descripción del error
+        """
+        payload = {"messages": [message_payload(*message) for message in messages]}
+        response, error = await self._post(script_url, payload)
+        if error is not None:
+            return [error] * len(messages)
+
+        # Un script sin soporte de lotes responde 200 con otra cosa: no es éxito
+        try:
+            results = response.json()["results"]
+        except (ValueError, KeyError, TypeError):
+            results = None
+        if not isinstance(results, list) or len(results) != len(messages):
+            return [f"Respuesta de lote inválida: {response.text[:300]}"] * len(messages)
+
+        errors: List[Optional[str]] = []
+        for result in results:
+            if isinstance(result, dict) and result.get("ok") is True:
+                errors.append(None)
+            else:
+                detail = result.get("error") if isinstance(result, dict) else None
+                errors.append(f"Error del script: {detail or result}")
+        return errors
+
+    async def _post(self, script_url: str, payload: dict) -> Tuple[Optional[httpx.Response], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._bind(loop)
+
+        async with self._semaphore:
+            try:
+                # Google Apps Script redirige las peticiones
+                response = await self._client.post(script_url, json=payload, follow_redirects=True)
+            except httpx.TimeoutException:
+                return None, f"Timeout: Google Script no respondió en {self.timeout_seconds:g} segundos"
+            except httpx.HTTPError as e:
+                return None, f"Error de conexión: {e!r}"
+
+        if response.status_code != 200:
+            return response, f"Status {response.status_code}: {response.text[:300]}"
+        return response, None
+
+    def submit(self, script_url: str, subject: str, recipient: str, body_html: str) -> None:
+        """
+        Agenda un envío desde código síncrono sin esperar el resultado.
+        Sin event loop iniciado (scripts), envía en un hilo aparte.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(
+                self._send_and_log(script_url, subject, recipient, body_html), loop
+            )
+        else:
+            once = AsyncEmailTransport(self.concurrency, self.pool_size, self.timeout_seconds)
+            threading.Thread(
+                target=asyncio.run,
+                args=(once._send_once(script_url, subject, recipient, body_html),),
+                daemon=True
+            ).start()
+
+    async def _send_and_log(self, script_url: str, subject: str, recipient: str, body_html: str) -> None:
+        error = await self.send(script_url, subject, recipient, body_html)
+        if error is None:
+            print(f"✅ Email enviado con éxito a {recipient} vía Google Script")
+        else:
+            print(f"❌ Error enviando email a {recipient}: {error}")
+
+    async def _send_once(self, script_url: str, subject: str, recipient: str, body_html: str) -> None:
+        try:
+            await self._send_and_log(script_url, subject, recipient, body_html)
+        finally:
+            await self.aclose()
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        # El cliente y el semáforo pertenecen a un event loop. Si ese loop ya
+        # se cerró, sus conexiones no sirven y se crea otro cliente; si sigue
+        # abierto, cambiarlo dejaría el cliente anterior sin cerrar
+        if self._loop is not None and self._loop is not loop and not self._loop.is_closed():
+            raise RuntimeError(
+                "El transporte de correo está asociado a otro event loop: "
+                "usar submit() o un AsyncEmailTransport propio"
+            )
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            )
+        )
+
+
+email_transport = AsyncEmailTransport()
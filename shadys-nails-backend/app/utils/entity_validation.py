@@ -4,8 +4,9 @@ Verifica que worker, customer, service y additional existan en la BD
 """
 
 from sqlalchemy.orm import Session
+from sqlalchemy import select, literal
 from fastapi import HTTPException
-from typing import Optional
+from typing import NamedTuple, Optional
 
 from app.models.worker import Worker
 from app.models.customer import Customer
@@ -158,3 +159,82 @@ def validate_all_entities(
     
     if additional_id is not None:
         validate_additional_exists(additional_id, db)
+
+
+
+class AppointmentEntities(NamedTuple):
+    """Entidades de una cita cargadas en una sola consulta"""
+    worker: Optional[Worker]
+    customer: Optional[Customer]
+    service: Optional[Service]
+    additional: Optional[Additional]
+
+    @property
+    def total_duration(self) -> int:
+        """Duración total (servicio + adicional) sin volver a consultar la BD"""
+        total = self.service.duration_minutes
+        if self.additional:
+            total += self.additional.extra_duration
+        return total
+
+
+def load_appointment_entities(
+    worker_id: int,
+    customer_id: int,
+    service_id: int,
+    additional_id: Optional[int],
+    db: Session
+) -> AppointmentEntities:
+    """
+    Carga worker, customer, service y additional en UNA sola consulta.
+
+    Parte de una fila fija (SELECT 1) y hace LEFT JOIN contra cada tabla por su
+    ID, así siempre vuelve una fila y las entidades inexistentes llegan como None.
+    No valida nada: usar `validate_loaded_entities` después.
+    """
+    anchor = select(literal(1).label("anchor")).subquery()
+    statement = (
+        select(Worker, Customer, Service, Additional)
+        .select_from(anchor)
+        .outerjoin(Worker, Worker.id == worker_id)
+        .outerjoin(Customer, Customer.id == customer_id)
+        .outerjoin(Service, Service.id == service_id)
+        .outerjoin(Additional, Additional.id == additional_id)
+    )
+    worker, customer, service, additional = db.execute(statement).one()
+    return AppointmentEntities(worker, customer, service, additional)
+
+
+def validate_loaded_entities(
+    entities: AppointmentEntities,
+    worker_id: int,
+    customer_id: int,
+    service_id: int,
+    additional_id: Optional[int]
+) -> None:
+    """
+    Mismas reglas y mensajes que `validate_all_entities`, pero sobre entidades
+    ya cargadas con `load_appointment_entities` (sin consultas extra).
+    
+    Raises:
+        HTTPException 404: Si alguna entidad no existe
+        HTTPException 400: Si alguna entidad está inactiva
+    """
+    if not entities.worker:
+        raise HTTPException(status_code=404, detail=f"Worker con ID {worker_id} no encontrado")
+    if not entities.worker.state:
+        raise HTTPException(status_code=400, detail=f"Worker con ID {worker_id} está inactivo")
+
+    if not entities.customer:
+        raise HTTPException(status_code=404, detail=f"Customer con ID {customer_id} no encontrado")
+
+    if not entities.service:
+        raise HTTPException(status_code=404, detail=f"Service con ID {service_id} no encontrado")
+    if not entities.service.state:
+        raise HTTPException(status_code=400, detail=f"Service con ID {service_id} está inactivo")
+
+    if additional_id is not None:
+        if not entities.additional:
+            raise HTTPException(status_code=404, detail=f"Additional con ID {additional_id} no encontrado")
+        if not entities.additional.state:
+            raise HTTPException(status_code=400, detail=f"Additional con ID {additional_id} está inactivo")
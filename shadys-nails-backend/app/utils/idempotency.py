@@ -0,0 +1,90 @@
+"""
+Soporte para el header Idempotency-Key en POST /appointments.
+
+Los clientes móviles reintentan cuando la red falla. Con la misma clave y el
+mismo body se devuelve la respuesta guardada, sin validar de nuevo ni volver
+a enviar correos. La respuesta se guarda en la misma transacción que la cita.
+
+Las claves se buscan por (customer_id, clave): la misma clave enviada para
+otro customer es otra petición y nunca devuelve la cita de alguien más.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+
+def hash_request(data: BaseModel) -> str:
+    """Hash estable del body de la petición"""
+    canonical = json.dumps(data.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_stored_response(db: Session, customer_id: int, key: str, request_hash: str) -> Optional[JSONResponse]:
+    """
+    Devuelve la respuesta guardada para `key` de ese customer, o None si no
+    existe o ya venció.
+
+    Raises:
+        HTTPException 422: Si la clave ya se usó con un body distinto
+    """
+    stored = db.get(IdempotencyKey, (customer_id, key))
+    if not stored:
+        return None
+
+    if stored.expires_at < datetime.now():
+        # Vencida: se libera la clave para esta nueva petición
+        db.delete(stored)
+        db.flush()
+        return None
+
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="La Idempotency-Key ya fue usada con otros datos"
+        )
+
+    return JSONResponse(
+        status_code=stored.status_code,
+        content=json.loads(stored.response_body),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def store_response(db: Session, customer_id: int, key: str, request_hash: str, status_code: int, body: dict) -> None:
+    """Agrega la respuesta a la sesión; se guarda con el commit de la cita"""
+    db.add(IdempotencyKey(
+        customer_id=customer_id,
+        key=key,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=json.dumps(body),
+        expires_at=datetime.now() + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    ))
+
+
+def purge_expired_keys() -> int:
+    """Borra las claves vencidas. Se ejecuta periódicamente desde main.py"""
+    db = SessionLocal()
+    try:
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at < datetime.now()
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            print(f"🧹 Idempotency keys vencidas eliminadas: {deleted}")
+        return deleted
+    finally:
+        db.close()
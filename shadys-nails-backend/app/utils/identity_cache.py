@@ -0,0 +1,177 @@
+"""
+Cache en memoria de la identidad resuelta por las dependencias de auth.
+
+Clave: el `sub` del token (email del usuario). Cada entrada guarda una copia
+de las columnas del `User` y, si se pidió, del `Worker` con el mismo email,
+para que `get_current_user` y `get_current_worker` no consulten la base en
+cada request. Las credenciales y tokens (`SECRET_COLUMNS`) no se copian: si
+algo las lee, se cargan de la base en ese momento.
+
+- Expulsión LRU cuando se supera `max_entries`.
+- Cada entrada vence después de `ttl_seconds` (corto a propósito: es lo
+  máximo que tarda en notarse un cambio hecho fuera de este proceso).
+- Se invalida sola al confirmar (commit) cualquier UPDATE o DELETE de un
+  `User` o `Worker` hecho con el ORM: `update_me`, reset de contraseña,
+  desactivación (`is_active = False`) o cambios de perfil del worker.
+
+Es un cache por proceso, igual que el de disponibilidad.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple, Type
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.user import User
+from app.models.worker import Worker
+
+Snapshot = Dict[str, Any]
+
+# Columnas que no se guardan en el cache
+SECRET_COLUMNS = frozenset({"password_hash", "reset_token", "reset_token_expires"})
+
+# Clave de session.info donde se acumulan los emails a invalidar hasta el commit
+PENDING_INVALIDATIONS_KEY = "identity_cache_pending"
+
+
+class IdentityCache:
+    """LRU con TTL de snapshots de User/Worker por sujeto del token"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Snapshot]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, subject: str, kind: str) -> Optional[Snapshot]:
+        """Devuelve el snapshot `kind` ("user" o "worker") del sujeto, o None"""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, snapshots = entry
+            if expires_at < time.monotonic():
+                del self._entries[subject]
+                self.misses += 1
+                return None
+
+            snapshot = snapshots.get(kind)
+            if snapshot is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return snapshot
+
+    def set(self, subject: str, kind: str, snapshot: Snapshot) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] < time.monotonic():
+                # El TTL corre desde que se resolvió el usuario
+                entry = (time.monotonic() + self.ttl_seconds, {})
+                self._entries[subject] = entry
+            entry[1][kind] = snapshot
+            self._entries.move_to_end(subject)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._entries.pop(subject, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Hashable]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+identity_cache = IdentityCache(
+    max_entries=int(os.getenv("IDENTITY_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "30"))
+)
+
+
+def snapshot_of(instance) -> Snapshot:
+    """Copia las columnas de un objeto ORM ya cargado, salvo `SECRET_COLUMNS`"""
+    mapper = inspect(instance).mapper
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in mapper.column_attrs
+        if attr.key not in SECRET_COLUMNS
+    }
+
+
+def attach_snapshot(db: Session, model: Type, snapshot: Snapshot):
+    """
+    Reconstruye el objeto desde el snapshot y lo asocia a la sesión sin
+    hacer SELECT. Queda como si se hubiera cargado de la base, así que los
+    cambios que se le hagan (ej. `update_me`) se guardan con un UPDATE normal.
+    Las columnas que faltan en el snapshot quedan sin cargar (lazy load).
+    """
+    instance = model(**snapshot)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+# ─────────────────────────────
+# Invalidación automática
+# ─────────────────────────────
+
+def _queue_invalidation(mapper, connection, target) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        return
+    pending: Set[str] = session.info.setdefault(PENDING_INVALIDATIONS_KEY, set())
+    history = inspect(target).attrs.email.history
+    for email in (target.email, *history.deleted):
+        if email:
+            pending.add(email)
+
+
+def _flush_invalidations(session: Session) -> None:
+    for email in session.info.pop(PENDING_INVALIDATIONS_KEY, ()):
+        identity_cache.invalidate(email)
+
+
+def _discard_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+
+
+for _model in (User, Worker):
+    event.listen(_model, "after_update", _queue_invalidation)
+    event.listen(_model, "after_delete", _queue_invalidation)
+
+# Se invalida recién en el commit: invalidar en el flush dejaría que otra
+# request vuelva a cachear el dato viejo antes de que se confirme el cambio.
+event.listen(Session, "after_commit", _flush_invalidations)
+event.listen(Session, "after_rollback", _discard_invalidations)
@@ -0,0 +1,34 @@
+"""
+Cursor opaco para paginar por keyset.
+
+El cursor codifica la última fila devuelta como (fecha, hora_inicio, id); la
+siguiente página pide las filas estrictamente posteriores en ese orden. A
+diferencia de OFFSET, el costo no crece con el número de páginas.
+"""
+
+import base64
+from datetime import date, time
+from typing import Tuple
+
+from fastapi import HTTPException
+
+AppointmentCursor = Tuple[date, time, int]
+
+
+def encode_cursor(day: date, start_time: time, appointment_id: int) -> str:
+    raw = f"{day.isoformat()}|{start_time.isoformat()}|{appointment_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> AppointmentCursor:
+    """
+    Raises:
+        HTTPException 400: Si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        day, start_time, appointment_id = raw.split("|")
+        return date.fromisoformat(day), time.fromisoformat(start_time), int(appointment_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
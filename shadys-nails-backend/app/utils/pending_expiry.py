@@ -0,0 +1,122 @@
+"""
+Vencimiento de solicitudes de cita pendientes.
+
+Una cita 'pending' bloquea su horario (disponibilidad y validación de cruces)
+hasta que la manicurista la confirma. Si nadie la confirma en
+`PENDING_TTL_HOURS`, la tarea "pending-expiry" de app/main.py la cancela:
+
+1. Toma un lote de pendientes viejas por (status, created_at) (índice
+   ix_appointments_status_created) con FOR UPDATE SKIP LOCKED.
+2. Las cancela con un solo UPDATE, ajusta daily_worker_stats (un UPSERT por
+   worker y día) y encola el aviso a cada cliente en un solo INSERT al
+   outbox, todo en la misma transacción.
+3. Después del commit invalida la disponibilidad de cada (worker, día)
+   tocado y despierta al sender de correos.
+"""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.utils.availability_cache import availability_cache
+from app.utils.daily_stats import contribution_of, record_stats_changes
+from app.utils.email_outbox import OutboxEmail, enqueue_emails, wake_email_sender
+from app.utils.email_service import get_request_expired_template
+
+# 0 desactiva el vencimiento
+PENDING_TTL_HOURS = float(os.getenv("PENDING_TTL_HOURS", "24"))
+PENDING_EXPIRY_BATCH_SIZE = int(os.getenv("PENDING_EXPIRY_BATCH_SIZE", "200"))
+
+
+class ExpiredBatch(NamedTuple):
+    taken: int  # pendientes leídas (si es < límite, no quedan más)
+    expired: int  # canceladas de verdad
+    touched_days: Set[Tuple[int, date]]  # (worker, día) a invalidar
+
+
+def expire_batch(db: Session, cutoff: datetime, limit: int) -> ExpiredBatch:
+    """Cancela hasta `limit` pendientes creadas antes de `cutoff` y hace commit"""
+    candidates = db.execute(
+        select(Appointment)
+        .options(joinedload(Appointment.customer), joinedload(Appointment.service))
+        .where(Appointment.status == 'pending', Appointment.created_at < cutoff)
+        .order_by(Appointment.created_at, Appointment.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=Appointment)
+    ).unique().scalars().all()
+    if not candidates:
+        return ExpiredBatch(0, 0, set())
+
+    # Solo las que siguen pendientes (una confirmación pudo ganar la carrera)
+    expired_ids = set(db.execute(
+        update(Appointment)
+        .where(Appointment.id.in_([appointment.id for appointment in candidates]), Appointment.status == 'pending')
+        .values(status='cancelled')
+        .returning(Appointment.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    expired = [appointment for appointment in candidates if appointment.id in expired_ids]
+
+    record_stats_changes(db, [
+        (contribution_of(appointment), contribution_of(appointment)._replace(status='cancelled'))
+        for appointment in expired
+    ])
+
+    emails: List[OutboxEmail] = []
+    for appointment in expired:
+        customer = appointment.customer
+        if not customer or not customer.email:
+            continue
+        emails.append(OutboxEmail(
+            subject="⌛ Tu solicitud de cita venció - Shady's Nails",
+            recipient=customer.email,
+            body_html=get_request_expired_template(
+                customer_name=customer.name,
+                service_name=appointment.service.name if appointment.service else "Servicio",
+                date=str(appointment.date),
+                time=str(appointment.start_time)
+            )
+        ))
+    enqueue_emails(db, emails)
+
+    # Se lee antes del commit: después los objetos quedan expirados
+    touched_days = {(appointment.worker_id, appointment.date) for appointment in expired}
+    db.commit()
+    return ExpiredBatch(len(candidates), len(expired), touched_days)
+
+
+def expire_stale_pending(
+    session_factory: Callable[[], Session] = SessionLocal,
+    ttl_hours: float = PENDING_TTL_HOURS,
+    batch_size: int = PENDING_EXPIRY_BATCH_SIZE,
+    now: Optional[datetime] = None
+) -> int:
+    """Cancela las solicitudes pendientes vencidas. Se ejecuta periódicamente desde main.py"""
+    if ttl_hours <= 0:
+        return 0
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=ttl_hours)
+
+    expired = 0
+    touched_days: Set[Tuple[int, date]] = set()
+    db = session_factory()
+    try:
+        while True:
+            batch = expire_batch(db, cutoff, batch_size)
+            expired += batch.expired
+            touched_days |= batch.touched_days
+            if batch.taken < batch_size:
+                break
+    finally:
+        db.close()
+
+    for worker_id, day in touched_days:
+        availability_cache.invalidate_day(worker_id, day)
+    if expired:
+        wake_email_sender()
+        print(f"⌛ Solicitudes pendientes vencidas: {expired} ({len(touched_days)} día(s) de agenda liberados)")
+    return expired
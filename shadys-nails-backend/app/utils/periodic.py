@@ -0,0 +1,38 @@
+"""
+Tareas periódicas en segundo plano.
+
+Se arrancan en el lifespan de app/main.py. Cada tarea ejecuta una función
+síncrona en un hilo (para no bloquear el event loop) cada `interval_seconds`;
+si la función es `async` se espera directamente en el event loop.
+Si se pasa `wakeup`, un `wakeup.set()` desde cualquier hilo adelanta la
+siguiente ejecución.
+"""
+
+import asyncio
+import threading
+import traceback
+from typing import Callable, Optional
+
+
+async def run_periodically(
+    name: str,
+    interval_seconds: float,
+    fn: Callable[[], object],
+    wakeup: Optional[threading.Event] = None
+) -> None:
+    """Ejecuta `fn` para siempre cada `interval_seconds`; los errores se registran y no detienen el ciclo"""
+    print(f"⏱️ Tarea periódica '{name}' iniciada (cada {interval_seconds}s)")
+    while True:
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                await fn()
+            else:
+                await asyncio.to_thread(fn)
+        except Exception as e:
+            print(f"❌ [{name}] Error: {e}")
+            print(traceback.format_exc())
+        if wakeup is None:
+            await asyncio.sleep(interval_seconds)
+        else:
+            await asyncio.to_thread(wakeup.wait, interval_seconds)
+            wakeup.clear()
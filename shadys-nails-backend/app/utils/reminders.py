@@ -0,0 +1,271 @@
+"""
+Recordatorios de citas confirmadas: "tu cita es mañana" (24 h antes) y
+"tu cita es en 2 horas".
+
+No se recorre la tabla de citas en cada tick:
+
+- `refill()` carga las citas confirmadas de las próximas
+  `REMINDER_HORIZON_HOURS` con una consulta por (status, date) (índice
+  ix_appointments_status_date_start) y arma un min-heap ordenado por la hora
+  en que toca cada recordatorio. Se repite cada `REMINDER_REFILL_SECONDS`.
+- Los routers llaman a `appointment_changed()` después de cada commit (crear,
+  editar, cancelar, confirmar, completar): la cita se agenda con su hora
+  nueva o deja de estar agendada.
+- `tick()` (tarea "reminders" de app/main.py) solo mira la cima del heap. Lo
+  que vence se revisa contra la base (otro proceso pudo cambiar la cita) y se
+  envía por el outbox junto con una marca en appointment_reminders, en la
+  misma transacción: un reinicio no repite recordatorios y dos procesos no
+  envían el mismo.
+
+Las entradas de una cita reprogramada o cancelada no se buscan dentro del
+heap: se descartan al salir, comparando con la hora agendada de la cita.
+"""
+
+import heapq
+import os
+import threading
+import time as clock
+from datetime import datetime, timedelta
+from typing import Callable, Collection, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import SessionLocal
+from app.models.appointment import Appointment
+from app.models.appointment_reminder import AppointmentReminder
+from app.utils.email_outbox import enqueue_email, wake_email_sender
+from app.utils.email_service import get_reminder_template
+
+REMINDER_HORIZON_HOURS = float(os.getenv("REMINDER_HORIZON_HOURS", "48"))
+REMINDER_REFILL_SECONDS = float(os.getenv("REMINDER_REFILL_SECONDS", "3600"))
+
+# Tipo de recordatorio → cuánto antes del inicio se envía (de mayor a menor).
+# Cada uno vale hasta que toca el siguiente: si una cita se confirma 1 hora
+# antes, solo se envía el de "2 horas".
+REMINDER_OFFSETS: Tuple[Tuple[str, timedelta], ...] = (
+    ("day_before", timedelta(hours=24)),
+    ("two_hours", timedelta(hours=2)),
+)
+
+
+class ReminderEntry(NamedTuple):
+    due_at: datetime
+    appointment_id: int
+    kind: str
+    starts_at: datetime
+
+
+def appointment_start(appointment: Appointment) -> datetime:
+    return datetime.combine(appointment.date, appointment.start_time)
+
+
+def reminder_window(starts_at: datetime, kind: str) -> Tuple[datetime, datetime]:
+    """Desde cuándo y hasta cuándo tiene sentido enviar el recordatorio `kind`"""
+    offsets = dict(REMINDER_OFFSETS)
+    later = [offset for _, offset in REMINDER_OFFSETS if offset < offsets[kind]]
+    return starts_at - offsets[kind], starts_at - max(later, default=timedelta(0))
+
+
+def when_text(starts_at: datetime, now: datetime) -> str:
+    hour = starts_at.strftime("%H:%M")
+    if starts_at.date() == now.date():
+        return f"hoy a las {hour}"
+    if starts_at.date() == now.date() + timedelta(days=1):
+        return f"mañana a las {hour}"
+    return f"el {starts_at.date()} a las {hour}"
+
+
+def schedule_into(
+    heap: List[ReminderEntry],
+    scheduled: Dict[int, datetime],
+    appointment_id: int,
+    starts_at: Optional[datetime],
+    now: datetime,
+    horizon_end: datetime,
+    sent: Collection[str] = ()
+) -> None:
+    """Agenda (o desagenda con `starts_at=None`) los recordatorios de una cita"""
+    if starts_at is None or not (now < starts_at <= horizon_end):
+        scheduled.pop(appointment_id, None)
+        return
+    if scheduled.get(appointment_id) == starts_at:
+        return
+
+    scheduled[appointment_id] = starts_at
+    for kind, _ in REMINDER_OFFSETS:
+        due_at, expires_at = reminder_window(starts_at, kind)
+        if kind not in sent and expires_at > now:
+            heapq.heappush(heap, ReminderEntry(due_at, appointment_id, kind, starts_at))
+
+
+class ReminderScheduler:
+    """Min-heap de recordatorios de las próximas horas"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        horizon_hours: float = REMINDER_HORIZON_HOURS,
+        refill_seconds: float = REMINDER_REFILL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.horizon = timedelta(hours=horizon_hours)
+        self.refill_seconds = refill_seconds
+        self._heap: List[ReminderEntry] = []
+        # Cita → inicio con el que está agendada; lo demás en el heap está viejo
+        self._scheduled: Dict[int, datetime] = {}
+        # Cambios que llegan mientras corre `refill()` (se aplican al terminar)
+        self._changes_during_refill: Optional[Dict[int, Optional[datetime]]] = None
+        self._last_refill: Optional[float] = None
+        self._lock = threading.Lock()
+        self.sent = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def appointment_changed(self, appointment: Appointment) -> None:
+        """Llamar después del commit de cualquier cambio en una cita"""
+        starts_at = appointment_start(appointment) if appointment.status == 'confirmed' else None
+        now = datetime.now()
+        with self._lock:
+            if self._changes_during_refill is not None:
+                self._changes_during_refill[appointment.id] = starts_at
+            schedule_into(self._heap, self._scheduled, appointment.id, starts_at, now, now + self.horizon)
+
+    def refill(self, now: Optional[datetime] = None) -> int:
+        """Rearma el heap con las citas confirmadas del horizonte. Retorna cuántas citas cargó"""
+        now = now or datetime.now()
+        horizon_end = now + self.horizon
+        with self._lock:
+            self._changes_during_refill = {}
+        try:
+            db = self.session_factory()
+            try:
+                upcoming = load_upcoming(db, now, horizon_end)
+                sent = load_sent_kinds(db, upcoming)
+            finally:
+                db.close()
+
+            heap: List[ReminderEntry] = []
+            scheduled: Dict[int, datetime] = {}
+            for appointment_id, starts_at in upcoming.items():
+                schedule_into(
+                    heap, scheduled, appointment_id, starts_at, now, horizon_end,
+                    sent.get((appointment_id, starts_at), ())
+                )
+            with self._lock:
+                for appointment_id, starts_at in self._changes_during_refill.items():
+                    scheduled.pop(appointment_id, None)
+                    schedule_into(heap, scheduled, appointment_id, starts_at, now, horizon_end)
+                self._heap, self._scheduled = heap, scheduled
+        finally:
+            with self._lock:
+                self._changes_during_refill = None
+        self._last_refill = clock.monotonic()
+        return len(upcoming)
+
+    def pop_due(self, now: datetime) -> List[ReminderEntry]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0].due_at <= now:
+                entry = heapq.heappop(self._heap)
+                if self._scheduled.get(entry.appointment_id) == entry.starts_at:
+                    due.append(entry)
+        return due
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Envía los recordatorios que vencieron. Retorna cuántos se encolaron"""
+        now = now or datetime.now()
+        if self._last_refill is None or clock.monotonic() - self._last_refill >= self.refill_seconds:
+            self.refill(now)
+
+        due = self.pop_due(now)
+        if not due:
+            return 0
+
+        db = self.session_factory()
+        try:
+            queued = sum(send_reminder(db, entry, now) for entry in due)
+        finally:
+            db.close()
+        if queued:
+            self.sent += queued
+            wake_email_sender()
+        return queued
+
+
+def load_upcoming(db: Session, now: datetime, horizon_end: datetime) -> Dict[int, datetime]:
+    """Citas confirmadas que empiezan entre `now` y `horizon_end` (cita → inicio)"""
+    rows = db.execute(
+        select(Appointment.id, Appointment.date, Appointment.start_time).where(
+            Appointment.status == 'confirmed',
+            Appointment.date >= now.date(),
+            Appointment.date <= horizon_end.date()
+        )
+    ).all()
+    return {
+        appointment_id: datetime.combine(day, start)
+        for appointment_id, day, start in rows
+        if now < datetime.combine(day, start) <= horizon_end
+    }
+
+
+def load_sent_kinds(db: Session, upcoming: Dict[int, datetime]) -> Dict[Tuple[int, datetime], Set[str]]:
+    """Recordatorios ya enviados de esas citas, por (cita, inicio)"""
+    if not upcoming:
+        return {}
+    rows = db.execute(
+        select(AppointmentReminder.appointment_id, AppointmentReminder.starts_at, AppointmentReminder.kind)
+        .where(AppointmentReminder.appointment_id.in_(list(upcoming)))
+    ).all()
+    sent: Dict[Tuple[int, datetime], Set[str]] = {}
+    for appointment_id, starts_at, kind in rows:
+        sent.setdefault((appointment_id, starts_at), set()).add(kind)
+    return sent
+
+
+def send_reminder(db: Session, entry: ReminderEntry, now: datetime) -> bool:
+    """Encola el correo y guarda la marca en una transacción. Retorna False si no correspondía"""
+    appointment = (
+        db.query(Appointment)
+        .options(joinedload(Appointment.customer), joinedload(Appointment.service))
+        .filter(Appointment.id == entry.appointment_id)
+        .first()
+    )
+    # Otro proceso pudo cancelarla o reprogramarla sin pasar por este heap
+    if appointment is None or appointment.status != 'confirmed' or appointment_start(appointment) != entry.starts_at:
+        return False
+    if now >= reminder_window(entry.starts_at, entry.kind)[1]:
+        return False
+    customer = appointment.customer
+    if not customer or not customer.email:
+        return False
+
+    try:
+        db.add(AppointmentReminder(appointment_id=appointment.id, kind=entry.kind, starts_at=entry.starts_at))
+        db.flush()
+    except IntegrityError:
+        # Ya enviado (antes de un reinicio, o por otro proceso)
+        db.rollback()
+        return False
+
+    when = when_text(entry.starts_at, now)
+    enqueue_email(
+        db,
+        subject=f"⏰ Tu cita es {when} - Shady's Nails",
+        recipient=customer.email,
+        body_html=get_reminder_template(
+            customer_name=customer.name,
+            service_name=appointment.service.name if appointment.service else "Servicio",
+            date=str(appointment.date),
+            time=str(appointment.start_time),
+            when=when
+        )
+    )
+    db.commit()
+    print(f"⏰ [RECORDATORIO] {entry.kind} de la cita {appointment.id} encolado para {customer.email}")
+    return True
+
+
+reminder_scheduler = ReminderScheduler()
@@ -1,11 +1,13 @@
 """
 Utilidades de seguridad para autenticación
-- Hashing de contraseñas con bcrypt
+- Hashing de contraseñas con bcrypt (en un pool acotado de hilos)
 - Creación y verificación de JWT tokens
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple, TypeVar
 import os
 from dotenv import load_dotenv
 from jose import JWTError, jwt
@@ -56,8 +58,26 @@ def decode_refresh_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+# Costo de bcrypt (2^rounds iteraciones). Si se cambia, los hashes con otro
+# costo se rehashean solos en el siguiente login exitoso.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 # Contexto para hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Pool dedicado para bcrypt: como mucho PASSWORD_HASH_WORKERS hashes a la vez,
+# el resto espera en cola sin ocupar el event loop ni el threadpool de FastAPI.
+# Alcanza con hilos porque bcrypt libera el GIL mientras calcula.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+T = TypeVar("T")
+
+
+def _truncate_password(password: str) -> str:
+    """Bcrypt tiene un límite de 72 bytes: se trunca siempre igual al hashear y al verificar"""
+    password_bytes = password.encode('utf-8')[:72]
+    return password_bytes.decode('utf-8', errors='ignore')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -66,10 +86,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     
     Trunca la contraseña a 72 bytes para mantener consistencia con el hashing.
     """
-    # Truncar a 72 bytes para mantener consistencia
-    password_bytes = plain_password.encode('utf-8')[:72]
-    password_truncated = password_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.verify(password_truncated, hashed_password)
+    return pwd_context.verify(_truncate_password(plain_password), hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica la contraseña y, si el hash usa otro costo que BCRYPT_ROUNDS,
+    devuelve también el hash nuevo para guardarlo.
+
+    Returns:
+        (es_valida, hash_nuevo_o_None)
+    """
+    return pwd_context.verify_and_update(_truncate_password(plain_password), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -79,10 +107,21 @@ def get_password_hash(password: str) -> str:
     Bcrypt tiene un límite de 72 bytes, así que truncamos la contraseña
     si es necesario para evitar errores.
     """
-    # Truncar a 72 bytes para cumplir con el límite de bcrypt
-    password_bytes = password.encode('utf-8')[:72]
-    password_truncated = password_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.hash(password_truncated)
+    return pwd_context.hash(_truncate_password(password))
+
+
+async def run_in_password_pool(fn: Callable[..., T], *args) -> T:
+    """Ejecuta `fn` en el pool de bcrypt sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_pool, fn, *args)
+
+
+def hash_password_in_pool(password: str) -> str:
+    """
+    Versión para handlers síncronos: el hilo de la request espera, pero el
+    cálculo respeta el tope de PASSWORD_HASH_WORKERS.
+    """
+    return password_pool.submit(get_password_hash, password).result()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,86 @@
+"""
+Configuración que se puede cambiar sin reiniciar el servidor.
+
+Antes el envío de correos llamaba a `load_dotenv(override=True)` en cada
+correo para ver el `.env` más reciente. Ahora la configuración se lee una vez
+al arrancar y queda en memoria (`get_settings()`); la tarea periódica
+"settings-watcher" de app/main.py revisa el mtime del `.env` y, si cambió,
+vuelve a cargarla.
+
+Igual que `load_dotenv(override=True)`, los valores del `.env` tienen
+prioridad sobre las variables de entorno del proceso.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import dotenv_values, find_dotenv
+
+# .env en la raíz del backend si no se encuentra otro al arrancar
+DEFAULT_DOTENV_PATH = Path(__file__).resolve().parents[2] / ".env"
+
+
+@dataclass(frozen=True)
+class Settings:
+    google_script_url: str
+    email_enabled: bool
+
+    @classmethod
+    def from_values(cls, values: Dict[str, str]) -> "Settings":
+        return cls(
+            google_script_url=values.get("GOOGLE_SCRIPT_URL", ""),
+            email_enabled=values.get("EMAIL_ENABLED", "true").lower() == "true",
+        )
+
+
+class SettingsStore:
+    """Guarda la configuración actual y la recarga cuando cambia el `.env`"""
+
+    def __init__(self, dotenv_path: Path):
+        self.dotenv_path = Path(dotenv_path)
+        self._lock = threading.Lock()
+        self._mtime = self._read_mtime()
+        self._settings = self._load()
+
+    def get(self) -> Settings:
+        # Leer una referencia es atómico: no hace falta el lock
+        return self._settings
+
+    def reload(self) -> Settings:
+        with self._lock:
+            self._mtime = self._read_mtime()
+            self._settings = self._load()
+            return self._settings
+
+    def reload_if_changed(self) -> bool:
+        """Recarga si el `.env` cambió (o apareció/desapareció). Retorna True si recargó"""
+        if self._read_mtime() == self._mtime:
+            return False
+        self.reload()
+        print(f"🔄 Configuración recargada desde {self.dotenv_path}")
+        return True
+
+    def _read_mtime(self) -> Optional[int]:
+        try:
+            return self.dotenv_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> Settings:
+        values = dict(os.environ)
+        if self.dotenv_path.exists():
+            values.update({
+                key: value for key, value in dotenv_values(self.dotenv_path).items()
+                if value is not None
+            })
+        return Settings.from_values(values)
+
+
+settings_store = SettingsStore(find_dotenv() or DEFAULT_DOTENV_PATH)
+
+
+def get_settings() -> Settings:
+    return settings_store.get()
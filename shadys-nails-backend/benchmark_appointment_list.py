@@ -0,0 +1,101 @@
+"""
+Benchmark de GET /appointments: vista completa (ORM + joinedload + Pydantic)
+contra la vista compacta (SELECT de Core serializado desde tuplas).
+
+Carga N citas en una base SQLite en memoria y mide, para cada vista, el tiempo
+de consulta + serialización a JSON y el pico de memoria (tracemalloc).
+
+Uso:
+    python benchmark_appointment_list.py [N]    (por defecto 10000)
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import json
+import sys
+import time as timer
+import tracemalloc
+from datetime import date, time, timedelta
+
+from fastapi import Response
+
+from app.models.appointment import Appointment
+from app.routers.appointment import AppointmentResponse, list_appointments
+from conftest import make_session
+
+REPEAT = 5
+
+
+def seed(Session, count):
+    db = Session()
+    start = date(2030, 1, 1)
+    db.bulk_insert_mappings(Appointment, [
+        {
+            "worker_id": 1, "customer_id": 1, "service_id": 1,
+            "additional_id": 1 if index % 3 == 0 else None,
+            "date": start + timedelta(days=index // 40),
+            "start_time": time(9 + (index % 40) // 4, (index % 4) * 15),
+            "end_time": time(10 + (index % 40) // 4, (index % 4) * 15),
+            "status": "confirmed",
+            "notes": "Nota de prueba" if index % 2 else None,
+        }
+        for index in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+def full_view(Session):
+    db = Session()
+    try:
+        rows = list_appointments(
+            Response(), worker_id=1, date=None, date_from=None, date_to=None, status=None,
+            limit=None, cursor=None, view=None, fields=None, db=db, current_user=None
+        )
+        # Lo mismo que hace FastAPI con response_model
+        return json.dumps([AppointmentResponse.model_validate(row).model_dump(mode="json") for row in rows])
+    finally:
+        db.close()
+
+
+def compact_view(Session):
+    db = Session()
+    try:
+        return list_appointments(
+            Response(), worker_id=1, date=None, date_from=None, date_to=None, status=None,
+            limit=None, cursor=None, view="compact", fields=None, db=db, current_user=None
+        ).body
+    finally:
+        db.close()
+
+
+def measure(fn, Session):
+    timings = []
+    for _ in range(REPEAT):
+        started = timer.perf_counter()
+        fn(Session)
+        timings.append(timer.perf_counter() - started)
+
+    tracemalloc.start()
+    body = fn(Session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, len(body)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    engine, Session = make_session()
+    seed(Session, count)
+
+    print(f"{count} citas")
+    print(f"{'vista':>8} | {'tiempo (ms)':>11} | {'pico memoria (MB)':>17} | {'JSON (KB)':>9}")
+    print("-" * 56)
+    for name, fn in (("full", full_view), ("compact", compact_view)):
+        seconds, peak, size = measure(fn, Session)
+        print(f"{name:>8} | {seconds * 1000:>11.1f} | {peak / 1024 / 1024:>17.1f} | {size / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark del cálculo de slots libres de un día.
+
+Compara:
+- legacy: `generate_time_slots` + `is_slot_available` (cada slot contra cada cita)
+- sweep:  barrido lineal de app/utils/availability_engine.py
+- bitmap: `DayOccupancy` de app/utils/day_bitmap.py
+
+Uso:
+    python benchmark_availability.py
+"""
+import timeit
+from datetime import time
+from types import SimpleNamespace
+
+from app.routers.availability import generate_time_slots, is_slot_available
+from app.utils.availability_engine import free_slots_for_day
+from app.utils.day_bitmap import DayOccupancy
+
+REPEAT = 5
+NUMBER = 300
+
+
+def legacy(start_time, end_time, duration, appointments, break_start, break_end):
+    slots = []
+    for slot in generate_time_slots(start_time, end_time, 15):
+        if slot >= end_time:
+            continue
+        if is_slot_available(slot, duration, appointments, end_time, break_start, break_end):
+            slots.append(slot.strftime("%H:%M:%S"))
+    return slots
+
+
+def bitmap(start_time, end_time, duration, appointments, break_start, break_end):
+    day = DayOccupancy.from_day(start_time, end_time, appointments, break_start, break_end)
+    return day.free_slots(duration)
+
+
+def build_day(appointment_count):
+    """Día de 9:00 a 20:00 con descanso y `appointment_count` citas de 30 minutos"""
+    appointments = []
+    for index in range(appointment_count):
+        # Una cita cada 45 minutos; al llegar al cierre vuelve a empezar (se solapan)
+        minute = 9 * 60 + (index * 45) % (10 * 60 + 30)
+        appointments.append(SimpleNamespace(
+            start_time=time(minute // 60, minute % 60),
+            end_time=time((minute + 30) // 60, (minute + 30) % 60)
+        ))
+    return (time(9, 0), time(20, 0), 60, appointments, time(13, 0), time(14, 0))
+
+
+def main():
+    print(f"{'citas':>6} | {'legacy (µs)':>12} | {'sweep (µs)':>11} | {'bitmap (µs)':>12}")
+    print("-" * 52)
+    for appointment_count in (0, 4, 8, 14, 40):
+        case = build_day(appointment_count)
+        assert legacy(*case) == free_slots_for_day(*case) == bitmap(*case)
+
+        results = []
+        for fn in (legacy, free_slots_for_day, bitmap):
+            best = min(timeit.repeat(lambda: fn(*case), repeat=REPEAT, number=NUMBER))
+            results.append(best / NUMBER * 1_000_000)
+
+        print(f"{appointment_count:>6} | {results[0]:>12.1f} | {results[1]:>11.1f} | {results[2]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark del costo de encolar un correo con `send_email`.
+
+Compara la lectura de configuración de antes (`load_dotenv(override=True)`
+en cada llamada: buscar el `.env`, leerlo y parsearlo) con la configuración
+en memoria de app/utils/settings.py. El transporte de envío se reemplaza por
+uno que no hace nada, así se mide solo el encolado.
+
+Uso:
+    python benchmark_email_enqueue.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import contextlib
+import io
+import tempfile
+import timeit
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from app.utils import email_service
+from app.utils import settings as settings_module
+from app.utils.settings import SettingsStore
+
+REPEAT = 5
+NUMBER = 2000
+
+
+class NoopTransport:
+    def submit(self, *args, **kwargs):
+        return None
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        # .env de tamaño realista (unas 15 variables)
+        dotenv_path = Path(folder) / ".env"
+        lines = [f"SETTING_{index}=valor-{index}" for index in range(12)]
+        lines += ["EMAIL_ENABLED=true", "GOOGLE_SCRIPT_URL=https://script.google.com/macros/s/ejemplo/exec"]
+        dotenv_path.write_text("\n".join(lines) + "\n")
+
+        settings_module.settings_store = SettingsStore(dotenv_path)
+        email_service.email_transport = NoopTransport()
+
+        def legacy_get_script_url():
+            load_dotenv(dotenv_path, override=True)
+            return os.getenv("GOOGLE_SCRIPT_URL", "")
+
+        def enqueue():
+            email_service.send_email("Asunto", "cliente@example.com", "<p>Hola</p>")
+
+        results = {}
+        current_get_script_url = email_service._get_script_url
+        for name, get_script_url in (("load_dotenv", legacy_get_script_url), ("en memoria", current_get_script_url)):
+            email_service._get_script_url = get_script_url
+            # send_email imprime en cada llamada: se descarta para medir solo el encolado
+            with contextlib.redirect_stdout(io.StringIO()):
+                best = min(timeit.repeat(enqueue, repeat=REPEAT, number=NUMBER))
+            results[name] = best / NUMBER * 1_000_000
+        email_service._get_script_url = current_get_script_url
+
+    print(f"{'configuración':>14} | {'µs por send_email':>18}")
+    print("-" * 36)
+    for name, micros in results.items():
+        print(f"{name:>14} | {micros:>18.1f}")
+    print(f"\n{results['load_dotenv'] / results['en memoria']:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
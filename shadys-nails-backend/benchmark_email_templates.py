@@ -0,0 +1,95 @@
+"""
+Benchmark del render de los templates de correo.
+
+Compara, para el template de confirmación:
+
+- f-string: el template de antes (sin escapar los valores)
+- f-string + escape: el mismo f-string escapando cada valor con `html.escape`
+- compilado: `render_template` de app/utils/email_templates.py (trozos
+  estáticos precompilados y huecos escapados)
+
+Casi todo el costo está en escapar los valores; el f-string sin escapar es
+más rápido, pero inseguro. El render compilado cuesta unos microsegundos por
+correo, nada frente al INSERT en el outbox o al POST al Apps Script.
+
+Uso:
+    python benchmark_email_templates.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import timeit
+from html import escape
+
+from app.utils.email_templates import TEMPLATES, render_template
+
+REPEAT = 5
+NUMBER = 20000
+
+VALUES = {
+    "customer_name": "Ana García",
+    "service_name": "Manicure Gel",
+    "date": "2025-01-25",
+    "time": "10:00:00",
+}
+
+
+def legacy_confirmation(customer_name, service_name, date, time):
+    return f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ffccf2; border-radius: 10px;">
+            <h2 style="color: #d63384;">💅 ¡Cita Confirmada!</h2>
+            <p>Hola <strong>{customer_name}</strong>,</p>
+            <p>Tu cita en <strong>Shady's Nails</strong> ha sido agendada con éxito.</p>
+            <hr style="border: 0; border-top: 1px solid #eee;">
+            <p><strong>Detalles de tu cita:</strong></p>
+            <ul>
+                <li><strong>Servicio:</strong> {service_name}</li>
+                <li><strong>Fecha:</strong> {date}</li>
+                <li><strong>Hora:</strong> {time}</li>
+            </ul>
+            <p>Te esperamos para consentirte como te mereces.</p>
+            <p style="font-size: 0.9em; color: #666;">Si necesitas cancelar o reprogramar, por favor inicia sesión en nuestra app.</p>
+            <br>
+            <p>Atentamente,<br><strong>Shady's Nails</strong></p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def escaped_legacy_confirmation(customer_name, service_name, date, time):
+    return legacy_confirmation(escape(customer_name), escape(service_name), escape(date), escape(time))
+
+
+def compiled_confirmation(**values):
+    return render_template("confirmation", **values)
+
+
+def main():
+    assert legacy_confirmation(**VALUES) == compiled_confirmation(**VALUES)
+
+    candidates = (
+        ("f-string", legacy_confirmation),
+        ("f-string + escape", escaped_legacy_confirmation),
+        ("compilado", compiled_confirmation),
+    )
+    results = {}
+    for name, render in candidates:
+        best = min(timeit.repeat(lambda: render(**VALUES), repeat=REPEAT, number=NUMBER))
+        results[name] = best / NUMBER * 1_000_000
+
+    print(f"{'render':>18} | {'µs por correo':>13}")
+    print("-" * 34)
+    for name, micros in results.items():
+        print(f"{name:>18} | {micros:>13.2f}")
+
+    print("\nTemplates registrados:")
+    for name, template in TEMPLATES.items():
+        print(f"   {name:<30} {template.chunk_count:>2} trozos, {len(template.slot_names)} huecos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark del transporte de correos contra un Google Apps Script simulado.
+
+Un servidor HTTP local responde cada POST después de una latencia fija
+(`LATENCY_SECONDS`, parecida a la del Apps Script real). Compara:
+
+- antes: 3 hilos, cada correo con `requests.post` (conexión nueva por envío)
+- ahora: `AsyncEmailTransport` (un cliente con pool) con distintas
+  concurrencias (`EMAIL_SEND_CONCURRENCY`)
+
+Sirve para elegir la concurrencia: el throughput sube con ella hasta que el
+Apps Script (o su cuota) pasa a ser el límite.
+
+Uso:
+    python benchmark_email_transport.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.utils.email_transport import AsyncEmailTransport
+
+LATENCY_SECONDS = 0.05
+MESSAGES = 200
+CONCURRENCY_LEVELS = (1, 4, 8, 16, 32)
+
+
+class SlowServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # El backlog por defecto (5) rechaza conexiones con concurrencia alta
+    request_queue_size = 128
+
+
+class SlowScript(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers y body salen en dos escrituras: sin esto la conexión keep-alive
+    # suma el ACK retrasado (~40 ms) a cada respuesta
+    disable_nagle_algorithm = True
+    connections = set()
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        json.loads(self.rfile.read(length))
+        SlowScript.connections.add(self.client_address)
+        time.sleep(LATENCY_SECONDS)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def email(index):
+    return ("Asunto", f"cliente{index}@example.com", f"<p>Cita {index}</p>")
+
+
+def legacy_send(script_url):
+    """El envío de antes: 3 hilos y `requests.post` sin sesión"""
+    def send(index):
+        subject, recipient, body_html = email(index)
+        payload = {"to": recipient, "subject": subject, "htmlBody": body_html}
+        response = requests.post(script_url, json=payload, timeout=25, allow_redirects=True)
+        return response.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        return sum(executor.map(send, range(MESSAGES)))
+
+
+def async_send(script_url, concurrency):
+    async def run():
+        transport = AsyncEmailTransport(concurrency=concurrency, pool_size=concurrency)
+        try:
+            errors = await asyncio.gather(*(
+                transport.send(script_url, *email(index)) for index in range(MESSAGES)
+            ))
+        finally:
+            await transport.aclose()
+        return sum(error is None for error in errors)
+
+    return asyncio.run(run())
+
+
+def measure(send):
+    SlowScript.connections = set()
+    started = time.perf_counter()
+    sent = send()
+    elapsed = time.perf_counter() - started
+    assert sent == MESSAGES, f"solo {sent} de {MESSAGES} correos respondieron 200"
+    return MESSAGES / elapsed, len(SlowScript.connections)
+
+
+def main():
+    server = SlowServer(("127.0.0.1", 0), SlowScript)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    script_url = f"http://127.0.0.1:{server.server_port}/exec"
+
+    results = [("requests, 3 hilos", *measure(lambda: legacy_send(script_url)))]
+    for concurrency in CONCURRENCY_LEVELS:
+        results.append((
+            f"httpx, concurrencia {concurrency}",
+            *measure(lambda: async_send(script_url, concurrency))
+        ))
+    server.shutdown()
+
+    print(f"{MESSAGES} correos, {LATENCY_SECONDS * 1000:.0f} ms de latencia por POST\n")
+    print(f"{'transporte':>24} | {'correos/s':>9} | {'conexiones':>10}")
+    print("-" * 50)
+    for name, throughput, connections in results:
+        print(f"{name:>24} | {throughput:>9.1f} | {connections:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark de throughput de POST /auth/login.
+
+Lanza ráfagas de logins concurrentes contra la app (ASGI en memoria, base
+SQLite) y, para cada tamaño del pool de bcrypt, reporta:
+
+- logins por segundo
+- latencia p50/p95 de los logins
+- peor latencia de un endpoint trivial medido durante la ráfaga (muestra
+  que el event loop sigue respondiendo mientras se calculan hashes)
+
+Uso:
+    python benchmark_login.py [LOGINS] [ROUNDS]    (por defecto 32 y 10)
+"""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+if len(sys.argv) > 2:
+    os.environ["BCRYPT_ROUNDS"] = sys.argv[2]
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+import asyncio
+import statistics
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from fastapi import FastAPI
+
+from app.database import get_db
+from app.models.user import User
+from app.routers.auth import router as auth_router
+from app.utils import security
+from conftest import make_session
+
+POOL_SIZES = (1, 2, 4, 8)
+PASSWORD = "secreta1"
+
+
+def build_app():
+    engine, Session = make_session()
+    db = Session()
+    db.add(User(
+        id=10, email="gina@example.com", password_hash=security.get_password_hash(PASSWORD),
+        name="Gina", role="worker", is_active=True
+    ))
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    return app
+
+
+async def burst(app, logins):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        latencies = []
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def login():
+            started = timer.perf_counter()
+            response = await client.post(
+                "/auth/login", json={"email": "gina@example.com", "password": PASSWORD}
+            )
+            assert response.status_code == 200, response.text
+            latencies.append(timer.perf_counter() - started)
+
+        async def probe():
+            while not done.is_set():
+                started = timer.perf_counter()
+                await client.post("/auth/logout")
+                probe_latencies.append(timer.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = timer.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = timer.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return elapsed, latencies, probe_latencies
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    app = build_app()
+    print(f"bcrypt rounds={security.BCRYPT_ROUNDS}, {logins} logins concurrentes, {os.cpu_count()} CPU")
+    print(f"{'pool':>5} | {'logins/s':>9} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'loop máx (ms)':>14}")
+    print("-" * 58)
+
+    for size in POOL_SIZES:
+        security.password_pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="bcrypt")
+        elapsed, latencies, probe_latencies = asyncio.run(burst(app, logins))
+        security.password_pool.shutdown()
+
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        probe_max = max(probe_latencies) * 1000 if probe_latencies else 0.0
+        print(f"{size:>5} | {logins / elapsed:>9.1f} | {p50:>9.1f} | {p95:>9.1f} | {probe_max:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
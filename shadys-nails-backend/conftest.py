@@ -0,0 +1,70 @@
+"""
+Helpers compartidos por las pruebas que corren sin servidor.
+
+- `make_session()`: base SQLite en memoria (u otro `engine`) con todas las
+  tablas y un worker, un customer, un servicio y un adicional de ejemplo
+  (todos con id=1).
+- `count_queries()`: ejecuta una función y devuelve las sentencias SQL que
+  envió a la base de datos.
+
+Los archivos de prueba los importan con `from conftest import ...`, así
+también funcionan con `python test_xxx.py`. Los imports de `app` van dentro
+de las funciones: pytest carga este archivo antes que cualquier prueba, y
+app.database crea su engine con DATABASE_URL al importarse (las pruebas que
+usan la base real, como test_db.py, no deben quedar apuntando a SQLite).
+"""
+
+
+def make_session(engine=None):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.database import Base
+    # Registrar todas las tablas en Base.metadata antes de create_all
+    import app.models  # noqa: F401
+    import app.models.appointment_reminder  # noqa: F401
+    import app.models.email_outbox  # noqa: F401
+    import app.models.idempotency  # noqa: F401
+    import app.models.schedule  # noqa: F401
+    import app.models.user  # noqa: F401
+    from app.models.additional import Additional
+    from app.models.customer import Customer
+    from app.models.service import Service
+    from app.models.worker import Worker
+
+    if engine is None:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    db = Session()
+    db.add_all([
+        Worker(id=1, name="Gina", email="gina@example.com", state=True),
+        Customer(id=1, name="Cliente", email="cliente@example.com"),
+        Service(id=1, worker_id=1, name="Manicure", duration_minutes=60, price=30000, state=True),
+        Additional(id=1, name="Decoración", extra_duration=30, price=10000, state=True),
+    ])
+    db.commit()
+    db.close()
+    return engine, Session
+
+
+def count_queries(engine, fn):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, statements
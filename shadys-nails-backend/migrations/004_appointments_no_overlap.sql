@@ -0,0 +1,42 @@
+-- Migración 004: Evitar citas solapadas a nivel de base de datos
+--
+-- `create_appointment` valida los cruces con una lectura y luego inserta.
+-- Con dos reservas simultáneas para el mismo horario ambas podían pasar la
+-- validación. Esta restricción de exclusión hace que PostgreSQL rechace
+-- (SQLSTATE 23P01) cualquier cita no cancelada que se cruce con otra del
+-- mismo worker; la API la traduce al mismo 409 de siempre.
+
+-- 1. btree_gist permite combinar "worker_id WITH =" con rangos en un índice GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- 2. Columna con el rango [inicio, fin) de la cita.
+--    Si end_time < start_time la cita termina después de medianoche.
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS time_range tsrange
+    GENERATED ALWAYS AS (
+        tsrange(
+            date + start_time,
+            date + end_time + CASE WHEN end_time < start_time THEN interval '1 day' ELSE interval '0' END,
+            '[)'
+        )
+    ) STORED;
+
+-- 3. Revisar si ya existen cruces (la restricción no se puede crear si los hay)
+SELECT a.id AS appointment_id, b.id AS conflicting_id, a.worker_id, a.date, a.start_time, a.end_time
+FROM appointments a
+JOIN appointments b
+  ON a.worker_id = b.worker_id
+ AND a.id < b.id
+ AND a.time_range && b.time_range
+WHERE a.status <> 'cancelled'
+  AND b.status <> 'cancelled';
+
+-- 4. Restricción de exclusión (ignora las citas canceladas)
+ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap;
+ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (worker_id WITH =, time_range WITH &&)
+    WHERE (status <> 'cancelled');
+
+-- Verificación
+SELECT conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conname = 'appointments_no_overlap';
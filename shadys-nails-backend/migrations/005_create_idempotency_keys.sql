@@ -0,0 +1,21 @@
+-- Migración 005: Tabla para el header Idempotency-Key de POST /appointments
+--
+-- Guarda la respuesta de cada creación de cita con clave. Un reintento con la
+-- misma clave devuelve la respuesta guardada. Las filas vencidas las borra la
+-- tarea periódica "idempotency-sweep" (app/main.py).
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER NOT NULL,
+    response_body TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- Verificación
+SELECT column_name, data_type FROM information_schema.columns
+WHERE table_name = 'idempotency_keys'
+ORDER BY ordinal_position;
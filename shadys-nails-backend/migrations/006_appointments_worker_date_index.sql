@@ -0,0 +1,12 @@
+-- Migración 006: Índice para listar citas por worker en orden de fecha/hora
+--
+-- GET /appointments ahora pagina por keyset sobre (date, start_time, id) con
+-- filtros por worker y rango de fechas. Con este índice cada página es un
+-- recorrido corto del índice aunque el historial crezca.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointments_worker_date_start
+    ON appointments (worker_id, date, start_time);
+
+-- Verificación
+SELECT indexname, indexdef FROM pg_indexes
+WHERE tablename = 'appointments' AND indexname = 'ix_appointments_worker_date_start';
@@ -0,0 +1,48 @@
+-- Migración 007: Rollup diario de citas por worker
+--
+-- /stats/today, /stats/week y /stats/month leen esta tabla en lugar de
+-- recorrer appointments. La API la mantiene al crear, editar, confirmar,
+-- completar y cancelar citas (app/utils/daily_stats.py). Para recalcularla:
+--     python rebuild_daily_stats.py
+
+CREATE TABLE IF NOT EXISTS daily_worker_stats (
+    worker_id INTEGER NOT NULL REFERENCES workers(id),
+    date DATE NOT NULL,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    confirmed_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    cancelled_count INTEGER NOT NULL DEFAULT 0,
+    estimated_revenue INTEGER NOT NULL DEFAULT 0,
+    actual_revenue INTEGER NOT NULL DEFAULT 0,
+    pending_revenue INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (worker_id, date)
+);
+
+-- Carga inicial (equivalente a rebuild_daily_stats.py)
+BEGIN;
+DELETE FROM daily_worker_stats;
+INSERT INTO daily_worker_stats (
+    worker_id, date, total_count, pending_count, confirmed_count, completed_count,
+    cancelled_count, estimated_revenue, actual_revenue, pending_revenue
+)
+SELECT
+    a.worker_id,
+    a.date,
+    COUNT(a.id),
+    COUNT(a.id) FILTER (WHERE a.status = 'pending'),
+    COUNT(a.id) FILTER (WHERE a.status = 'confirmed'),
+    COUNT(a.id) FILTER (WHERE a.status = 'completed'),
+    COUNT(a.id) FILTER (WHERE a.status = 'cancelled'),
+    COALESCE(SUM(s.price + COALESCE(ad.price, 0)), 0),
+    COALESCE(SUM(s.price + COALESCE(ad.price, 0)) FILTER (WHERE a.status = 'completed'), 0),
+    COALESCE(SUM(s.price + COALESCE(ad.price, 0)) FILTER (WHERE a.status IN ('pending', 'confirmed')), 0)
+FROM appointments a
+LEFT JOIN services s ON s.id = a.service_id
+LEFT JOIN additionals ad ON ad.id = a.additional_id
+GROUP BY a.worker_id, a.date;
+COMMIT;
+
+-- Verificación
+SELECT COUNT(*) AS filas, SUM(total_count) AS citas FROM daily_worker_stats;
@@ -0,0 +1,41 @@
+-- Migración 008: Guardar precios y duración en cada cita
+--
+-- Las estadísticas usaban el precio ACTUAL de services/additionals, así que
+-- cambiar un precio reescribía el histórico. Desde ahora la API guarda en la
+-- cita los precios y la duración al reservar o editar el servicio.
+
+-- 1. Columnas nuevas
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS service_price INTEGER;
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS additional_price INTEGER;
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS duration_minutes INTEGER;
+
+-- 2. Backfill de citas existentes con los precios actuales (lo mejor que se conoce)
+UPDATE appointments a
+SET service_price = s.price
+FROM services s
+WHERE s.id = a.service_id
+  AND a.service_price IS NULL;
+
+UPDATE appointments a
+SET additional_price = ad.price
+FROM additionals ad
+WHERE ad.id = a.additional_id
+  AND a.additional_price IS NULL;
+
+-- 3. Duración real de cada cita (las que terminan después de medianoche suman un día)
+UPDATE appointments
+SET duration_minutes = (
+    EXTRACT(EPOCH FROM (end_time - start_time)) / 60
+    + CASE WHEN end_time < start_time THEN 1440 ELSE 0 END
+)::INTEGER
+WHERE duration_minutes IS NULL;
+
+-- daily_worker_stats ya se calculó con estos mismos precios; no hace falta
+-- recalcularlo. Si hay dudas: python rebuild_daily_stats.py
+
+-- Verificación
+SELECT
+    COUNT(*) AS citas,
+    COUNT(*) FILTER (WHERE service_price IS NULL) AS sin_precio,
+    COUNT(*) FILTER (WHERE duration_minutes IS NULL) AS sin_duracion
+FROM appointments;
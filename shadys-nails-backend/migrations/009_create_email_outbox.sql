@@ -0,0 +1,29 @@
+-- Migración 009: Outbox de correos
+--
+-- Los correos de citas (crear, editar, cancelar, confirmar, completar) y de
+-- recuperación de contraseña se insertan aquí en la misma transacción que el
+-- cambio, en vez de ir a un pool de hilos en memoria. La tarea periódica
+-- "email-sender" (app/main.py) los reclama con FOR UPDATE SKIP LOCKED, los
+-- envía y guarda el resultado.
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id SERIAL PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body_html TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',   -- pending | sending | sent | failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    sent_at TIMESTAMP
+);
+
+-- Consulta del sender: WHERE status IN ('pending', 'sending') AND next_attempt_at <= now
+CREATE INDEX IF NOT EXISTS ix_email_outbox_status_next_attempt
+    ON email_outbox (status, next_attempt_at);
+
+-- Verificación
+SELECT column_name, data_type FROM information_schema.columns
+WHERE table_name = 'email_outbox'
+ORDER BY ordinal_position;
@@ -0,0 +1,24 @@
+-- Migración 010: Recordatorios de citas
+--
+-- El scheduler de recordatorios (app/utils/reminders.py) envía "tu cita es
+-- mañana" y "tu cita es en 2 horas" a las citas confirmadas. Cada envío deja
+-- una marca en appointment_reminders (en la misma transacción que el correo
+-- del outbox) para no repetirlo después de un reinicio.
+
+CREATE TABLE IF NOT EXISTS appointment_reminders (
+    id SERIAL PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL,        -- day_before | two_hours
+    starts_at TIMESTAMP NOT NULL,     -- inicio de la cita cuando se envió
+    sent_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_appointment_reminders_kind_start UNIQUE (appointment_id, kind, starts_at)
+);
+
+-- Carga del horizonte: WHERE status = 'confirmed' AND date BETWEEN hoy AND hoy + N
+-- (sin recorrer toda la tabla de citas)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointments_status_date_start
+    ON appointments (status, date, start_time);
+
+-- Verificación
+SELECT indexname, indexdef FROM pg_indexes
+WHERE tablename IN ('appointments', 'appointment_reminders');
@@ -0,0 +1,14 @@
+-- Migración 011: Índice para vencer solicitudes pendientes
+--
+-- Una cita 'pending' bloquea su horario hasta que la manicurista la confirma.
+-- La tarea "pending-expiry" (app/utils/pending_expiry.py) cancela las que
+-- llevan más de PENDING_TTL_HOURS sin confirmarse:
+--     WHERE status = 'pending' AND created_at < ahora - TTL ORDER BY created_at
+-- Con este índice la consulta lee solo las pendientes viejas.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointments_status_created
+    ON appointments (status, created_at);
+
+-- Verificación
+SELECT indexname, indexdef FROM pg_indexes
+WHERE tablename = 'appointments' AND indexname = 'ix_appointments_status_created';
@@ -0,0 +1,26 @@
+-- Migración 012: Idempotency-Key por customer
+--
+-- Con la clave como PRIMARY KEY global, otro customer que enviara la misma
+-- Idempotency-Key (y el mismo body) recibía la cita del primero. Ahora la
+-- clave se busca por (customer_id, key) y la unicidad es la misma.
+
+-- 1. Columna nueva; las filas existentes la toman de la respuesta guardada
+ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS customer_id INTEGER;
+
+UPDATE idempotency_keys
+SET customer_id = (response_body::json ->> 'customer_id')::integer
+WHERE customer_id IS NULL;
+
+-- Respuestas sin customer_id (no debería haber): se descartan, duran 24 h
+DELETE FROM idempotency_keys WHERE customer_id IS NULL;
+
+ALTER TABLE idempotency_keys ALTER COLUMN customer_id SET NOT NULL;
+
+-- 2. Unicidad por (customer_id, key) en lugar de solo key
+ALTER TABLE idempotency_keys DROP CONSTRAINT IF EXISTS idempotency_keys_pkey;
+ALTER TABLE idempotency_keys ADD CONSTRAINT idempotency_keys_pkey PRIMARY KEY (customer_id, key);
+
+-- Verificación
+SELECT conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE conname = 'idempotency_keys_pkey';
@@ -0,0 +1,14 @@
+-- Migración 013: Índice para limpiar el outbox de correos
+--
+-- Las filas 'sent' no se borraban y email_outbox crecía sin límite. El sender
+-- (app/utils/email_outbox.py, `prune_sent_emails`) ahora borra las enviadas
+-- hace más de EMAIL_OUTBOX_RETENTION_DAYS días:
+--     WHERE status = 'sent' AND sent_at < ahora - retención LIMIT n
+-- Con este índice la limpieza no recorre la tabla completa.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_email_outbox_status_sent_at
+    ON email_outbox (status, sent_at);
+
+-- Verificación
+SELECT indexname, indexdef FROM pg_indexes
+WHERE tablename = 'email_outbox' AND indexname = 'ix_email_outbox_status_sent_at';
@@ -0,0 +1,49 @@
+"""
+Recalcula desde cero la tabla daily_worker_stats a partir de appointments.
+
+Úsalo después de cargar datos por fuera de la API (scripts, SQL manual), si se
+cambiaron precios y se quiere alinear el histórico, o ante cualquier duda
+sobre los números del dashboard.
+
+Uso:
+    python rebuild_daily_stats.py               # todos los workers
+    python rebuild_daily_stats.py --worker-id 1
+"""
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv()
+
+from app.database import SessionLocal, engine
+from app.models.daily_worker_stats import DailyWorkerStats
+from app.utils.daily_stats import rebuild_daily_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcular daily_worker_stats")
+    parser.add_argument("--worker-id", type=int, default=None, help="Solo este worker")
+    args = parser.parse_args()
+
+    DailyWorkerStats.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        target = f"worker {args.worker_id}" if args.worker_id else "todos los workers"
+        print(f"🔄 Recalculando daily_worker_stats ({target})...")
+        rows = rebuild_daily_stats(db, worker_id=args.worker_id)
+        db.commit()
+        print(f"✅ {rows} filas (worker, día) generadas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
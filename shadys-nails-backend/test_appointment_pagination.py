@@ -0,0 +1,186 @@
+"""
+Paginación por keyset de GET /appointments.
+
+Uso:
+    python test_appointment_pagination.py
+    pytest test_appointment_pagination.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import json
+from datetime import date, time, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
+
+from app.models.appointment import Appointment
+from app.routers.appointment import AppointmentResponse, list_appointments, router
+from conftest import make_session
+
+START = date(2030, 3, 1)
+
+
+def seed(Session):
+    db = Session()
+    for index in range(23):
+        day = START + timedelta(days=index // 4)
+        db.add(Appointment(
+            worker_id=1, customer_id=1, service_id=1,
+            date=day,
+            # Varias citas a la misma hora para que el id desempate
+            start_time=time(9 + (index % 4) // 2, 0),
+            end_time=time(11, 0),
+            status="cancelled" if index % 5 == 0 else "confirmed"
+        ))
+    db.commit()
+    db.close()
+
+
+def fetch(db, **filters):
+    response = Response()
+    filters.setdefault("worker_id", 1)
+    for name in ("date", "date_from", "date_to", "status", "limit", "cursor", "view", "fields"):
+        filters.setdefault(name, None)
+    rows = list_appointments(response, db=db, current_user=None, **filters)
+    if isinstance(rows, JSONResponse):
+        return [row["id"] for row in json.loads(rows.body)], rows.headers.get("X-Next-Cursor")
+    return [row.id for row in rows], response.headers.get("X-Next-Cursor")
+
+
+def test_pages_cover_everything_in_order():
+    engine, Session = make_session()
+    seed(Session)
+    db = Session()
+
+    everything, next_cursor = fetch(db)
+    assert next_cursor is None
+    assert len(everything) == 23
+
+    expected = [
+        a.id for a in sorted(db.query(Appointment).all(), key=lambda a: (a.date, a.start_time, a.id))
+    ]
+    assert everything == expected
+
+    pages, cursor = [], None
+    while True:
+        ids, cursor = fetch(db, limit=5, cursor=cursor)
+        pages.append(ids)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert sum(pages, []) == expected
+    db.close()
+
+
+def test_filters_combine_with_cursor():
+    engine, Session = make_session()
+    seed(Session)
+    db = Session()
+
+    filters = dict(date_from=START + timedelta(days=1), date_to=START + timedelta(days=3), status="confirmed")
+    expected = [
+        a.id for a in sorted(
+            db.query(Appointment).filter(
+                Appointment.date >= filters["date_from"],
+                Appointment.date <= filters["date_to"],
+                Appointment.status == "confirmed"
+            ).all(),
+            key=lambda a: (a.date, a.start_time, a.id)
+        )
+    ]
+
+    first, cursor = fetch(db, limit=4, **filters)
+    rest, last_cursor = fetch(db, limit=50, cursor=cursor, **filters)
+
+    assert first + rest == expected
+    assert last_cursor is None
+    db.close()
+
+
+def test_compact_view_matches_full_view():
+    engine, Session = make_session()
+    seed(Session)
+    db = Session()
+
+    full = list_appointments(
+        Response(), worker_id=1, date=None, date_from=None, date_to=None, status=None,
+        limit=None, cursor=None, view=None, fields=None, db=db, current_user=None
+    )
+    compact = list_appointments(
+        Response(), worker_id=1, date=None, date_from=None, date_to=None, status=None,
+        limit=None, cursor=None, view="compact", fields=None, db=db, current_user=None
+    )
+    rows = json.loads(compact.body)
+
+    assert len(rows) == len(full)
+    for row, appointment in zip(rows, full):
+        expected = AppointmentResponse.model_validate(appointment).model_dump(mode="json")
+        for name in ("id", "worker_id", "customer_id", "service_id", "additional_id",
+                     "date", "start_time", "end_time", "status", "notes", "worker_name"):
+            assert row[name] == expected[name]
+        assert row["customer_name"] == expected["customer"]["name"]
+        assert row["service_name"] == expected["service"]["name"]
+        assert row["additional_name"] is None
+    db.close()
+
+
+def test_compact_fields_and_paging():
+    engine, Session = make_session()
+    seed(Session)
+    db = Session()
+
+    full_pages, compact_pages = [], []
+    for pages, extra in ((full_pages, {}), (compact_pages, {"fields": "id,start_time"})):
+        cursor = None
+        while True:
+            ids, cursor = fetch(db, limit=6, cursor=cursor, **extra)
+            pages.append(ids)
+            if cursor is None:
+                break
+    assert compact_pages == full_pages
+
+    response = list_appointments(
+        Response(), worker_id=1, date=None, date_from=None, date_to=None, status=None,
+        limit=2, cursor=None, view=None, fields="service_name, start_time", db=db, current_user=None
+    )
+    assert json.loads(response.body) == [
+        {"service_name": "Manicure", "start_time": "09:00:00"},
+        {"service_name": "Manicure", "start_time": "09:00:00"},
+    ]
+
+    with pytest.raises(HTTPException) as error:
+        fetch(db, fields="id,password_hash")
+    assert error.value.status_code == 400
+    db.close()
+
+
+def test_openapi_documents_both_shapes():
+    app = FastAPI()
+    app.include_router(router)
+    schema = app.openapi()["paths"]["/appointments"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    items = sorted(option["items"]["$ref"].rsplit("/", 1)[-1] for option in schema["anyOf"])
+    assert items == ["AppointmentCompact", "AppointmentResponse"]
+
+
+def test_invalid_cursor():
+    engine, Session = make_session()
+    db = Session()
+    with pytest.raises(HTTPException) as error:
+        fetch(db, cursor="no-es-un-cursor")
+    assert error.value.status_code == 400
+    db.close()
+
+
+if __name__ == "__main__":
+    test_pages_cover_everything_in_order()
+    test_filters_combine_with_cursor()
+    test_compact_view_matches_full_view()
+    test_compact_fields_and_paging()
+    test_openapi_documents_both_shapes()
+    test_invalid_cursor()
+    print("✅ Paginación de citas OK")
@@ -0,0 +1,185 @@
+"""
+Scheduler de recordatorios de citas (app/utils/reminders.py).
+
+- Carga solo las citas confirmadas del horizonte, en una consulta indexada.
+- Cada recordatorio se envía una vez, también después de un reinicio.
+- Reprogramar o cancelar actualiza el heap sin recargarlo.
+- Antes de enviar se revisa la cita en la base.
+
+Uso:
+    python test_appointment_reminders.py
+    pytest test_appointment_reminders.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import datetime, timedelta
+
+from fastapi import BackgroundTasks
+
+from app.models.appointment import Appointment
+from app.models.appointment_reminder import AppointmentReminder
+from app.models.email_outbox import EmailOutbox
+from app.models.worker import Worker
+from app.routers import appointment as appointment_router
+from app.utils.reminders import ReminderScheduler
+from conftest import count_queries, make_session
+
+
+def add_appointment(Session, appointment_id, starts_at, status='confirmed'):
+    db = Session()
+    db.add(Appointment(
+        id=appointment_id, worker_id=1, customer_id=1, service_id=1,
+        date=starts_at.date(), start_time=starts_at.time(),
+        end_time=(starts_at + timedelta(hours=1)).time(), status=status
+    ))
+    db.commit()
+    db.close()
+
+
+def update_appointment(Session, appointment_id, **changes):
+    db = Session()
+    appointment = db.get(Appointment, appointment_id)
+    for field, value in changes.items():
+        setattr(appointment, field, value)
+    db.commit()
+    db.refresh(appointment)
+    db.expunge(appointment)
+    db.close()
+    return appointment
+
+
+def outbox_subjects(Session):
+    db = Session()
+    try:
+        return [email.subject for email in db.query(EmailOutbox).order_by(EmailOutbox.id)]
+    finally:
+        db.close()
+
+
+def markers(Session):
+    db = Session()
+    try:
+        return sorted((marker.appointment_id, marker.kind) for marker in db.query(AppointmentReminder))
+    finally:
+        db.close()
+
+
+def current_minute():
+    return datetime.now().replace(second=0, microsecond=0)
+
+
+def test_refill_loads_only_confirmed_appointments_in_the_horizon():
+    engine, Session = make_session()
+    now = current_minute()
+    add_appointment(Session, 1, now + timedelta(hours=3))
+    add_appointment(Session, 2, now + timedelta(hours=30))
+    add_appointment(Session, 3, now + timedelta(days=5))
+    add_appointment(Session, 4, now + timedelta(hours=4), status='pending')
+    add_appointment(Session, 5, now + timedelta(hours=5), status='cancelled')
+    add_appointment(Session, 6, now - timedelta(days=1))
+
+    scheduler = ReminderScheduler(session_factory=Session, horizon_hours=48)
+    loaded, statements = count_queries(engine, lambda: scheduler.refill(now))
+
+    assert loaded == 2
+    # Citas del horizonte + marcas de esas citas; nada más
+    assert len(statements) == 2
+    assert "appointments.status = " in statements[0] and "appointments.date >= " in statements[0]
+    # Cita 1: "mañana" (atrasado pero vigente) y "2 horas"; cita 2: los dos
+    assert len(scheduler) == 4
+
+
+def test_each_reminder_is_sent_once_across_restarts():
+    engine, Session = make_session()
+    now = current_minute()
+    starts_at = now + timedelta(hours=30)
+    add_appointment(Session, 1, starts_at)
+
+    scheduler = ReminderScheduler(session_factory=Session)
+    assert scheduler.tick(now) == 0
+    assert scheduler.tick(starts_at - timedelta(hours=24)) == 1
+    assert scheduler.tick(starts_at - timedelta(hours=23)) == 0
+    assert markers(Session) == [(1, 'day_before')]
+
+    # Reinicio: el heap nuevo sale de la base y respeta la marca
+    restarted = ReminderScheduler(session_factory=Session)
+    assert restarted.tick(starts_at - timedelta(hours=23)) == 0
+    assert restarted.tick(starts_at - timedelta(hours=2)) == 1
+
+    assert markers(Session) == [(1, 'day_before'), (1, 'two_hours')]
+    subjects = outbox_subjects(Session)
+    assert len(subjects) == 2
+    assert "⏰ Tu cita es" in subjects[0] and starts_at.strftime("%H:%M") in subjects[0]
+
+
+def test_reschedule_and_cancel_update_the_heap():
+    engine, Session = make_session()
+    now = current_minute()
+    first_start = now + timedelta(hours=30)
+    add_appointment(Session, 1, first_start)
+    add_appointment(Session, 2, now + timedelta(hours=30))
+
+    scheduler = ReminderScheduler(session_factory=Session)
+    scheduler.refill(now)
+
+    new_start = now + timedelta(hours=40)
+    scheduler.appointment_changed(update_appointment(
+        Session, 1, date=new_start.date(), start_time=new_start.time()
+    ))
+    scheduler.appointment_changed(update_appointment(Session, 2, status='cancelled'))
+
+    # A la hora vieja no sale nada (ni para la reprogramada ni para la cancelada)
+    assert scheduler.tick(first_start - timedelta(hours=24)) == 0
+    assert scheduler.tick(new_start - timedelta(hours=24)) == 1
+    assert markers(Session) == [(1, 'day_before')]
+
+
+def test_appointment_is_checked_before_sending():
+    engine, Session = make_session()
+    now = current_minute()
+    starts_at = now + timedelta(hours=30)
+    add_appointment(Session, 1, starts_at)
+
+    scheduler = ReminderScheduler(session_factory=Session)
+    scheduler.refill(now)
+    # Cancelada por otro proceso: este heap no se enteró
+    update_appointment(Session, 1, status='cancelled')
+
+    assert scheduler.tick(starts_at - timedelta(hours=24)) == 0
+    assert markers(Session) == []
+    assert outbox_subjects(Session) == []
+
+
+def test_late_confirmation_only_sends_the_latest_reminder():
+    engine, Session = make_session()
+    now = current_minute()
+    add_appointment(Session, 1, now + timedelta(hours=1))
+
+    scheduler = ReminderScheduler(session_factory=Session)
+    assert scheduler.tick(now) == 1
+    assert markers(Session) == [(1, 'two_hours')]
+    assert "hoy a las" in outbox_subjects(Session)[0] or "mañana a las" in outbox_subjects(Session)[0]
+
+
+def test_confirming_from_the_router_schedules_reminders(monkeypatch):
+    engine, Session = make_session()
+    now = current_minute()
+    add_appointment(Session, 1, now + timedelta(hours=30), status='pending')
+
+    scheduler = ReminderScheduler(session_factory=Session)
+    scheduler.refill(now)
+    assert len(scheduler) == 0
+    monkeypatch.setattr(appointment_router, "reminder_scheduler", scheduler)
+
+    db = Session()
+    appointment_router.confirm_appointment_status(1, BackgroundTasks(), db, db.get(Worker, 1))
+    db.close()
+
+    assert len(scheduler) == 2
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,102 @@
+"""
+Cache de disponibilidad (app/utils/availability_cache.py).
+
+- Un resultado calculado antes de una invalidación no se guarda.
+- Un día bloqueado responde como bloqueado aunque el servicio no exista.
+
+Uso:
+    python test_availability_cache.py
+    pytest test_availability_cache.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.schedule import BlockedDate
+from app.routers import availability
+from app.utils.availability_cache import AvailabilityCache, DayResult, availability_cache
+from conftest import make_session
+
+# Un lunes: ese día y el siguiente son laborales con el horario por defecto
+DAY = date.today() + timedelta(days=7 - date.today().weekday())
+FREE = DayResult(False, None, (600, 615))
+
+
+def test_write_computed_before_an_invalidation_is_dropped():
+    cache = AvailabilityCache()
+    generation = cache.generation()
+    cache.invalidate_day(1, DAY)
+    cache.set(1, DAY, 60, FREE, generation=generation)
+    assert cache.get(1, DAY, 60) is None
+    assert cache.stats()["stale_writes"] == 1
+
+    # Otro día del mismo worker no se ve afectado
+    cache.set(1, DAY + timedelta(days=1), 60, FREE, generation=generation)
+    assert cache.get(1, DAY + timedelta(days=1), 60) == FREE
+
+    cache.set(1, DAY, 60, FREE, generation=cache.generation())
+    assert cache.get(1, DAY, 60) == FREE
+
+
+def test_worker_invalidation_and_clear_also_drop_stale_writes():
+    cache = AvailabilityCache()
+    generation = cache.generation()
+    cache.invalidate_worker(1)
+    cache.set(1, DAY, 60, FREE, generation=generation)
+    cache.set(2, DAY, 60, FREE, generation=generation)
+    assert cache.get(1, DAY, 60) is None
+    assert cache.get(2, DAY, 60) == FREE
+
+    generation = cache.generation()
+    cache.clear()
+    cache.set(2, DAY, 60, FREE, generation=generation)
+    assert cache.get(2, DAY, 60) is None
+
+
+def test_booking_during_the_computation_is_not_cached(monkeypatch):
+    engine, Session = make_session()
+    load = availability.load_availability_window
+
+    def load_then_book(*args, **kwargs):
+        window = load(*args, **kwargs)
+        # Una reserva se confirma mientras esta petición calcula el día
+        availability_cache.invalidate_day(1, DAY)
+        return window
+
+    monkeypatch.setattr(availability, "load_availability_window", load_then_book)
+    db = Session()
+    try:
+        availability.get_availability(worker_id=1, date=DAY, service_id=1, additional_id=None, db=db)
+        assert availability_cache.get(1, DAY, 60) is None
+    finally:
+        db.close()
+        availability_cache.clear()
+
+
+def test_blocked_day_wins_over_unknown_service():
+    engine, Session = make_session()
+    db = Session()
+    db.add(BlockedDate(worker_id=1, date=DAY, reason="Vacaciones"))
+    db.commit()
+    try:
+        response = availability.get_availability(worker_id=1, date=DAY, service_id=999, additional_id=None, db=db)
+        assert response.is_blocked and response.block_reason == "Vacaciones"
+        assert response.available_slots == []
+
+        with pytest.raises(HTTPException) as error:
+            availability.get_availability(
+                worker_id=1, date=DAY + timedelta(days=1), service_id=999, additional_id=None, db=db
+            )
+        assert error.value.status_code == 404
+    finally:
+        db.close()
+        availability_cache.clear()
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
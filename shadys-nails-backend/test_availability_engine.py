@@ -0,0 +1,115 @@
+"""
+Prueba de equivalencia del motor de disponibilidad.
+
+Genera miles de días aleatorios (horarios, descansos, citas y duraciones) y
+verifica que el barrido lineal de app/utils/availability_engine.py y el
+bitmap de app/utils/day_bitmap.py devuelvan exactamente los mismos slots que
+la implementación original (`generate_time_slots` + `is_slot_available`).
+
+Uso:
+    python test_availability_engine.py
+    pytest test_availability_engine.py
+"""
+import random
+from datetime import time
+from types import SimpleNamespace
+
+from app.routers.availability import generate_time_slots, is_slot_available
+from app.utils.availability_engine import free_slots_for_day
+from app.utils.day_bitmap import DayOccupancy
+
+CASES = 3000
+
+
+def legacy_slots(start_time, end_time, duration, appointments, break_start, break_end):
+    """Implementación original: cada slot contra cada cita"""
+    slots = []
+    for slot in generate_time_slots(start_time, end_time, 15):
+        if slot >= end_time:
+            continue
+        if is_slot_available(slot, duration, appointments, end_time, break_start, break_end):
+            slots.append(slot.strftime("%H:%M:%S"))
+    return slots
+
+
+# Minutos alrededor de la grilla de 15 minutos, donde viven los errores de borde
+EDGE_MINUTES = [0, 1, 14, 15, 16, 29, 30, 31, 44, 45, 46, 59]
+
+
+def random_time(rng, with_seconds=False):
+    second = rng.choice([0, 0, 0, 30]) if with_seconds else 0
+    minute = rng.choice(EDGE_MINUTES) if rng.random() < 0.5 else rng.randrange(60)
+    return time(rng.randrange(24), minute, second)
+
+
+def random_case(rng):
+    # Horarios en punto, a veces cruzando medianoche
+    start_time = time(rng.randrange(6, 13), rng.choice([0, 15, 30, 45, 10]))
+    if rng.random() < 0.1:
+        end_time = random_time(rng)
+    else:
+        end_time = time(rng.randrange(14, 24), rng.choice([0, 15, 30, 45, 50]))
+
+    break_start = break_end = None
+    if rng.random() < 0.5:
+        break_start = random_time(rng)
+        break_end = random_time(rng, with_seconds=True)
+
+    # La mayoría de los días son "normales"; el resto incluye citas que
+    # cruzan medianoche u otros datos raros
+    realistic = rng.random() < 0.7
+
+    appointments = []
+    for _ in range(rng.randrange(0, 12)):
+        appt_start = random_time(rng, with_seconds=True)
+        length = rng.choice([30, 45, 60, 90, 120, 150, 240, rng.randrange(0, 600)])
+        if realistic:
+            appt_start = appt_start.replace(hour=rng.randrange(8, 20))
+            length = rng.choice([30, 45, 60, 90, 120, 150, 240])
+        appt_end_minutes = (appt_start.hour * 60 + appt_start.minute + length) % (24 * 60)
+        appt_end = time(appt_end_minutes // 60, appt_end_minutes % 60, rng.choice([0, 0, 30]))
+        appointments.append(SimpleNamespace(start_time=appt_start, end_time=appt_end))
+
+    duration = rng.choice([30, 45, 60, 90, 150, 255, 300, rng.randrange(0, 900)])
+    return start_time, end_time, duration, appointments, break_start, break_end
+
+
+def test_engine_matches_legacy():
+    rng = random.Random(20240601)
+    for case_number in range(CASES):
+        case = random_case(rng)
+        expected = legacy_slots(*case)
+        actual = free_slots_for_day(*case)
+        assert actual == expected, f"Caso {case_number} distinto: {case}\n{expected}\n{actual}"
+
+
+def bitmap_slots(start_time, end_time, duration, appointments, break_start, break_end):
+    day = DayOccupancy.from_day(start_time, end_time, appointments, break_start, break_end)
+    return day.free_slots(duration)
+
+
+def test_bitmap_matches_legacy():
+    rng = random.Random(20240602)
+    for case_number in range(CASES):
+        case = random_case(rng)
+        expected = legacy_slots(*case)
+        actual = bitmap_slots(*case)
+        assert actual == expected, f"Caso {case_number} distinto: {case}\n{expected}\n{actual}"
+
+
+def test_engine_matches_legacy_on_busy_day():
+    appointments = [
+        SimpleNamespace(start_time=time(9, 0), end_time=time(10, 30)),
+        SimpleNamespace(start_time=time(10, 30), end_time=time(11, 0)),
+        SimpleNamespace(start_time=time(15, 10), end_time=time(16, 40)),
+    ]
+    case = (time(9, 0), time(20, 0), 60, appointments, time(13, 0), time(14, 0))
+    assert free_slots_for_day(*case) == legacy_slots(*case)
+    assert bitmap_slots(*case) == legacy_slots(*case)
+
+
+if __name__ == "__main__":
+    test_engine_matches_legacy()
+    test_bitmap_matches_legacy()
+    test_engine_matches_legacy_on_busy_day()
+    print(f"✅ Motor de disponibilidad equivalente en {CASES} casos aleatorios")
@@ -0,0 +1,89 @@
+"""
+GET /availability/next (`get_next_availability`).
+
+- Un `after` con zona (ej. ...Z) se interpreta en hora local.
+- Un `after` en el pasado no devuelve horarios que ya pasaron.
+- AVAILABILITY_NEXT_HORIZON_DAYS se acota al máximo del endpoint.
+
+Uso:
+    python test_availability_next.py
+    pytest test_availability_next.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import importlib
+import time as clock
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from app.routers import availability
+from app.utils.availability_cache import availability_cache
+from conftest import make_session
+
+# Un lunes laboral con el horario por defecto (9:00 a 20:00)
+MONDAY = date.today() + timedelta(days=7 - date.today().weekday())
+
+
+def next_slots(db, after, limit=3):
+    return availability.get_next_availability(
+        service_id=1, additional_id=None, worker_id=1, after=after, limit=limit,
+        horizon_days=availability.NEXT_DEFAULT_HORIZON_DAYS, db=db
+    ).slots
+
+
+@pytest.fixture
+def bogota_time():
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "America/Bogota"
+    clock.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    clock.tzset()
+
+
+def test_aware_after_is_read_as_local_time(bogota_time):
+    engine, Session = make_session()
+    db = Session()
+    try:
+        # 15:00 UTC = 10:00 en Bogotá (UTC-5)
+        after = datetime.combine(MONDAY, time(15, 0), tzinfo=timezone.utc)
+        slots = next_slots(db, after)
+        assert (slots[0].date, slots[0].time) == (MONDAY, "10:00:00")
+    finally:
+        db.close()
+        availability_cache.clear()
+
+
+def test_past_after_only_returns_future_slots():
+    engine, Session = make_session()
+    db = Session()
+    try:
+        now = datetime.now()
+        slots = next_slots(db, now - timedelta(days=2), limit=10)
+        assert slots
+        for slot in slots:
+            assert datetime.combine(slot.date, time.fromisoformat(slot.time)) >= now.replace(microsecond=0)
+    finally:
+        db.close()
+        availability_cache.clear()
+
+
+def test_default_horizon_is_clamped(monkeypatch):
+    monkeypatch.setenv("AVAILABILITY_NEXT_HORIZON_DAYS", "365")
+    try:
+        assert importlib.reload(availability).NEXT_DEFAULT_HORIZON_DAYS == availability.NEXT_MAX_HORIZON_DAYS
+        monkeypatch.setenv("AVAILABILITY_NEXT_HORIZON_DAYS", "0")
+        assert importlib.reload(availability).NEXT_DEFAULT_HORIZON_DAYS == 1
+    finally:
+        monkeypatch.delenv("AVAILABILITY_NEXT_HORIZON_DAYS")
+        importlib.reload(availability)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
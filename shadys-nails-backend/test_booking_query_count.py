@@ -0,0 +1,65 @@
+"""
+Fija la cantidad de consultas SQL de POST /appointments.
+
+Crea una base SQLite en memoria, llama a `create_appointment` directamente y
+cuenta las sentencias enviadas a la base de datos. El camino feliz debe usar:
+
+1. SELECT de worker + customer + service + additional (una sola consulta)
+2. SELECT de citas del día para validar cruces
+3. UPSERT del resumen diario (daily_worker_stats)
+4. INSERT de los correos en email_outbox (uno solo para ambos)
+5. INSERT de la cita (+ COMMIT)
+
+Uso:
+    python test_booking_query_count.py
+    pytest test_booking_query_count.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, time, timedelta
+
+from fastapi import BackgroundTasks
+
+from app.routers.appointment import AppointmentCreate, AppointmentResponse, create_appointment
+from conftest import count_queries, make_session
+
+MAX_BOOKING_QUERIES = 5
+
+
+def test_create_appointment_query_count():
+    engine, Session = make_session()
+    db = Session()
+
+    data = AppointmentCreate(
+        worker_id=1,
+        customer_id=1,
+        service_id=1,
+        additional_id=1,
+        date=date.today() + timedelta(days=7),
+        start_time=time(10, 0)
+    )
+
+    def book():
+        appointment = create_appointment(data, BackgroundTasks(), db=db, current_user=None)
+        # Serializar como lo haría FastAPI (no debe disparar lazy-loads)
+        return AppointmentResponse.model_validate(appointment)
+
+    response, statements = count_queries(engine, book)
+
+    assert response.end_time == time(11, 30)
+    assert response.customer.name == "Cliente"
+    assert response.additional.name == "Decoración"
+    assert (response.service_price, response.additional_price, response.duration_minutes) == (30000, 10000, 90)
+    assert len(statements) <= MAX_BOOKING_QUERIES, (
+        f"POST /appointments usó {len(statements)} consultas:\n" + "\n---\n".join(statements)
+    )
+    # La sesión compartida de la petición queda como estaba
+    assert db.expire_on_commit is True
+    db.close()
+
+
+if __name__ == "__main__":
+    test_create_appointment_query_count()
+    print(f"✅ POST /appointments usa como máximo {MAX_BOOKING_QUERIES} consultas")
@@ -0,0 +1,133 @@
+"""
+daily_worker_stats mantenido en cada cambio de cita debe coincidir con un
+recálculo completo (`rebuild_daily_stats`). Cada cambio lee la cita con
+FOR UPDATE antes de calcular el delta.
+
+Uso:
+    python test_daily_stats_rollup.py
+    pytest test_daily_stats_rollup.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from fastapi import BackgroundTasks
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from app.models.daily_worker_stats import DailyWorkerStats
+from app.models.service import Service
+from app.models.worker import Worker
+from app.routers.appointment import (
+    AppointmentCreate,
+    AppointmentUpdate,
+    cancel_appointment,
+    complete_appointment_status,
+    confirm_appointment_status,
+    create_appointment,
+    update_appointment,
+)
+from app.utils.daily_stats import rebuild_daily_stats
+from conftest import make_session
+
+COLUMNS = [
+    "total_count", "pending_count", "confirmed_count", "completed_count", "cancelled_count",
+    "estimated_revenue", "actual_revenue", "pending_revenue",
+]
+WORKER = SimpleNamespace(id=1, role="worker")
+
+
+def rollup(db):
+    """Filas del rollup sin las que quedaron en cero"""
+    rows = {}
+    for row in db.query(DailyWorkerStats).all():
+        values = tuple(getattr(row, column) for column in COLUMNS)
+        if any(values):
+            rows[(row.worker_id, row.date)] = values
+    return rows
+
+
+def book(db, day, hour, worker_id=1, service_id=1, additional_id=None):
+    return create_appointment(
+        AppointmentCreate(
+            worker_id=worker_id, customer_id=1, service_id=service_id,
+            additional_id=additional_id, date=day, start_time=time(hour, 0)
+        ),
+        BackgroundTasks(), db=db, current_user=None
+    )
+
+
+def test_incremental_rollup_matches_rebuild():
+    engine, Session = make_session()
+    db = Session()
+    db.add_all([
+        Worker(id=2, name="Otra", email="otra@example.com", state=True),
+        Service(id=2, worker_id=1, name="Pedicure", duration_minutes=45, price=25000, state=True),
+    ])
+    db.commit()
+
+    day = date.today() + timedelta(days=7)
+    other_day = day + timedelta(days=1)
+
+    first = book(db, day, 9, additional_id=1)
+    second = book(db, day, 12)
+    third = book(db, day, 15, service_id=2)
+    fourth = book(db, other_day, 10, worker_id=2)
+
+    assert rollup(db)[(1, day)] == (3, 3, 0, 0, 0, 95000, 0, 95000)
+
+    confirm_appointment_status(first.id, BackgroundTasks(), db=db, current_worker=WORKER)
+    complete_appointment_status(first.id, BackgroundTasks(), db=db, current_worker=WORKER)
+    confirm_appointment_status(second.id, BackgroundTasks(), db=db, current_worker=WORKER)
+    cancel_appointment(third.id, db=db, current_user=WORKER)
+
+    # Cambiar servicio, adicional, día y worker. `model_construct` porque en
+    # AppointmentUpdate el campo `date` tapa al tipo `date` y la validación lo rechaza
+    update_appointment(second.id, AppointmentUpdate(service_id=2, additional_id=1), db=db, current_user=WORKER)
+    update_appointment(fourth.id, AppointmentUpdate.model_construct(worker_id=1, date=other_day), db=db, current_user=WORKER)
+    update_appointment(
+        second.id, AppointmentUpdate.model_construct(date=other_day, start_time=time(16, 0)), db=db, current_user=WORKER
+    )
+
+    incremental = rollup(db)
+    rebuild_daily_stats(db)
+    db.commit()
+
+    assert incremental == rollup(db)
+    assert incremental[(1, day)] == (2, 0, 0, 1, 1, 65000, 40000, 0)
+    db.close()
+
+
+def test_every_change_locks_the_appointment_first():
+    engine, Session = make_session()
+    db = Session()
+    day = date.today() + timedelta(days=7)
+    appointment_ids = [book(db, day, hour).id for hour in (9, 12, 15)]
+
+    # SQLite no tiene FOR UPDATE: se revisa la consulta compilada para PostgreSQL
+    locked_reads = []
+
+    def record(state):
+        if state.is_select:
+            sql = str(state.statement.compile(dialect=postgresql.dialect()))
+            if "FOR UPDATE" in sql:
+                locked_reads.append(sql)
+
+    event.listen(db, "do_orm_execute", record)
+    update_appointment(appointment_ids[0], AppointmentUpdate(notes="Nota"), db=db, current_user=WORKER)
+    confirm_appointment_status(appointment_ids[0], BackgroundTasks(), db=db, current_worker=WORKER)
+    complete_appointment_status(appointment_ids[0], BackgroundTasks(), db=db, current_worker=WORKER)
+    cancel_appointment(appointment_ids[1], db=db, current_user=WORKER)
+    event.remove(db, "do_orm_execute", record)
+
+    assert len(locked_reads) == 4
+    assert all("FROM appointments" in sql for sql in locked_reads)
+    db.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
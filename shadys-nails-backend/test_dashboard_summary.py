@@ -0,0 +1,102 @@
+"""
+GET /dashboard/summary: mismo contenido que las llamadas sueltas del dashboard
+en una sola petición y con pocas consultas.
+
+Uso:
+    python test_dashboard_summary.py
+    pytest test_dashboard_summary.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, time, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.appointment import Appointment
+from app.models.schedule import BlockedDate
+from app.models.user import User
+from app.routers.appointment import router as appointment_router
+from app.routers.dashboard import router as dashboard_router
+from app.routers.schedule import router as schedule_router
+from app.routers.stats import router as stats_router
+from app.utils.daily_stats import rebuild_daily_stats
+from app.utils.security import create_access_token
+from conftest import count_queries, make_session
+
+# 2 de autenticación (user + worker) + rollup + servicios + horario + bloqueos + citas
+MAX_SUMMARY_QUERIES = 7
+
+
+def make_client():
+    engine, Session = make_session()
+    db = Session()
+    db.add(User(id=10, email="gina@example.com", password_hash="x", name="Gina", role="worker", is_active=True))
+    db.add(BlockedDate(worker_id=1, date=date.today() + timedelta(days=3), reason="Vacaciones"))
+    today = date.today()
+    for index in range(30):
+        db.add(Appointment(
+            worker_id=1, customer_id=1, service_id=1,
+            additional_id=1 if index % 2 else None,
+            date=today + timedelta(days=index - 15),
+            start_time=time(10, 0), end_time=time(11, 0),
+            status=["pending", "confirmed", "completed", "cancelled"][index % 4],
+            service_price=30000, additional_price=10000 if index % 2 else None
+        ))
+    db.commit()
+    rebuild_daily_stats(db)
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    for router in (dashboard_router, stats_router, schedule_router, appointment_router):
+        app.include_router(router)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    token = create_access_token({"sub": "gina@example.com", "user_id": 10, "role": "worker"})
+    return engine, TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_summary_matches_individual_endpoints():
+    engine, client = make_client()
+
+    response, statements = count_queries(engine, lambda: client.get("/dashboard/summary?appointments_limit=20"))
+    assert response.status_code == 200
+    summary = response.json()
+
+    assert summary["today"] == client.get("/stats/today").json()
+    assert summary["week"] == client.get("/stats/week").json()
+    assert summary["month"] == client.get("/stats/month").json()
+    assert summary["popular_services"] == client.get("/stats/services-popular").json()
+    assert summary["schedules"] == client.get("/schedules").json()
+    assert summary["blocked_dates"] == client.get("/schedules/blocks").json()
+
+    page = client.get("/appointments?limit=20")
+    assert summary["appointments"] == page.json()
+    assert summary["next_cursor"] == page.headers["X-Next-Cursor"]
+
+    assert len(statements) <= MAX_SUMMARY_QUERIES, (
+        f"/dashboard/summary usó {len(statements)} consultas:\n" + "\n---\n".join(statements)
+    )
+
+
+def test_summary_requires_worker():
+    engine, client = make_client()
+    client.headers.pop("Authorization")
+    assert client.get("/dashboard/summary").status_code == 401
+
+
+if __name__ == "__main__":
+    test_summary_matches_individual_endpoints()
+    test_summary_requires_worker()
+    print(f"✅ /dashboard/summary usa como máximo {MAX_SUMMARY_QUERIES} consultas")
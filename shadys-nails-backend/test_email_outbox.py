@@ -0,0 +1,455 @@
+"""
+Outbox de correos contra un servidor HTTP local que imita al Google Apps Script.
+
+- Los correos se guardan en la transacción del cambio (rollback = sin correo).
+- El sender reutiliza conexiones, respeta el tope de concurrencia y marca 'sent'.
+- Los errores reintentan con backoff exponencial y terminan en 'failed'.
+- Un reclamo vencido ('sending' de un proceso caído) se vuelve a enviar.
+- Con lotes, varios correos van en un POST y cada uno guarda su resultado.
+- Los enviados viejos se borran; los 'failed' se conservan.
+- El transporte no cambia de event loop mientras el suyo sigue abierto.
+
+Uso:
+    python test_email_outbox.py
+    pytest test_email_outbox.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+import json
+import threading
+import time as clock
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.models.email_outbox import EmailOutbox
+from app.utils import email_outbox
+from app.utils.email_outbox import (
+    OutboxEmail, enqueue_email, enqueue_emails, process_outbox, process_outbox_async, prune_sent_emails, retry_delay
+)
+from app.utils.email_transport import AsyncEmailTransport
+from conftest import make_session
+
+
+class StubScript(BaseHTTPRequestHandler):
+    """
+    POST /exec responde con los status de `statuses` (200 cuando se acaban).
+    Un lote (`{"messages": [...]}`) responde un resultado por correo; los
+    destinatarios que empiezan con "rebota" fallan.
+    """
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    received = []
+    posts = 0
+    batch_support = True
+    connections = set()
+    delay = 0.0
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        payload = json.loads(self.rfile.read(length))
+        StubScript.connections.add(self.client_address)
+        if self.path == "/redirect":
+            # Como Apps Script: redirige y el cliente sigue con GET
+            self.respond(302, b"", location="/exec")
+            return
+
+        with StubScript.lock:
+            StubScript.in_flight += 1
+            StubScript.peak = max(StubScript.peak, StubScript.in_flight)
+        clock.sleep(StubScript.delay)
+        messages = payload.get("messages", [payload])
+        with StubScript.lock:
+            StubScript.in_flight -= 1
+            StubScript.posts += 1
+            StubScript.received.extend(messages)
+            status = StubScript.statuses.pop(0) if StubScript.statuses else 200
+
+        if "messages" in payload and status == 200 and StubScript.batch_support:
+            results = [
+                {"ok": False, "error": "buzón lleno"} if message["to"].startswith("rebota") else {"ok": True}
+                for message in messages
+            ]
+            self.respond(200, json.dumps({"results": results}).encode())
+            return
+        self.respond(status, b"ok" if status == 200 else b"error")
+
+    def do_GET(self):
+        StubScript.connections.add(self.client_address)
+        self.respond(200, b"ok")
+
+    def respond(self, status, body, location=None):
+        self.send_response(status)
+        if location:
+            self.send_header("Location", location)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(statuses=(), delay=0.0, batch_support=True):
+    StubScript.statuses = list(statuses)
+    StubScript.received = []
+    StubScript.posts = 0
+    StubScript.batch_support = batch_support
+    StubScript.connections = set()
+    StubScript.delay = delay
+    StubScript.in_flight = StubScript.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubScript)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_outbox(Session, script_url, concurrency):
+    """Una pasada del sender con un transporte propio"""
+    async def run():
+        transport = AsyncEmailTransport(concurrency=concurrency)
+        try:
+            return await process_outbox_async(Session, script_url=script_url, transport=transport)
+        finally:
+            await transport.aclose()
+
+    return asyncio.run(run())
+
+
+def queue(Session, count=1, prefix="cliente"):
+    db = Session()
+    enqueue_emails(db, [
+        OutboxEmail(f"Asunto {index}", f"{prefix}{index}@example.com", f"<p>{index}</p>")
+        for index in range(count)
+    ])
+    db.commit()
+    db.close()
+
+
+def rows(Session):
+    db = Session()
+    try:
+        return db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    finally:
+        db.close()
+
+
+def make_due(Session):
+    db = Session()
+    for email in db.query(EmailOutbox).all():
+        email.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    db.commit()
+    db.close()
+
+
+def test_enqueue_belongs_to_the_transaction():
+    engine, Session = make_session()
+    db = Session()
+
+    assert enqueue_email(db, "Hola", "cliente@example.com", "<p>Hola</p>")
+    db.rollback()
+    assert db.query(EmailOutbox).count() == 0
+
+    assert not enqueue_email(db, "Hola", "no-es-un-email", "<p>Hola</p>")
+    assert enqueue_email(db, "Hola", "cliente@example.com", "<p>Hola</p>")
+    db.commit()
+    assert db.query(EmailOutbox).count() == 1
+    db.close()
+
+
+def test_sender_delivers_over_one_connection():
+    engine, Session = make_session()
+    queue(Session, 3)
+    server, url = start_stub()
+    try:
+        assert run_outbox(Session, f"{url}/exec", concurrency=1) == 3
+    finally:
+        server.shutdown()
+
+    assert sorted(payload["to"] for payload in StubScript.received) == [
+        "cliente0@example.com", "cliente1@example.com", "cliente2@example.com"
+    ]
+    assert len(StubScript.connections) == 1
+    for email in rows(Session):
+        assert (email.status, email.attempts, email.last_error) == ('sent', 1, None)
+        assert email.sent_at is not None
+
+    # Nada más que enviar
+    assert process_outbox(Session, script_url=f"{url}/exec") == 0
+
+
+def test_sender_caps_concurrency():
+    engine, Session = make_session()
+    queue(Session, 8)
+    server, url = start_stub(delay=0.05)
+    try:
+        assert run_outbox(Session, f"{url}/exec", concurrency=3) == 8
+    finally:
+        server.shutdown()
+
+    # Envía en paralelo, pero nunca más de 3 a la vez
+    assert 1 < StubScript.peak <= 3
+    assert len(StubScript.connections) <= 3
+    assert [email.status for email in rows(Session)] == ['sent'] * 8
+
+
+def test_sender_follows_redirects():
+    engine, Session = make_session()
+    queue(Session)
+    server, url = start_stub()
+    try:
+        process_outbox(Session, script_url=f"{url}/redirect")
+    finally:
+        server.shutdown()
+
+    assert rows(Session)[0].status == 'sent'
+
+
+def test_failure_backs_off_then_succeeds():
+    engine, Session = make_session()
+    queue(Session)
+    server, url = start_stub(statuses=[500])
+    try:
+        before = datetime.now()
+        process_outbox(Session, script_url=f"{url}/exec")
+        email = rows(Session)[0]
+        assert (email.status, email.attempts) == ('pending', 1)
+        assert "500" in email.last_error
+        assert email.next_attempt_at >= before + retry_delay(1)
+
+        # Todavía no toca: no se reclama
+        assert process_outbox(Session, script_url=f"{url}/exec") == 0
+
+        make_due(Session)
+        process_outbox(Session, script_url=f"{url}/exec")
+    finally:
+        server.shutdown()
+
+    email = rows(Session)[0]
+    assert (email.status, email.attempts, email.last_error) == ('sent', 2, None)
+
+
+def test_gives_up_after_max_attempts():
+    engine, Session = make_session()
+    queue(Session)
+    server, url = start_stub(statuses=[503] * email_outbox.EMAIL_OUTBOX_MAX_ATTEMPTS)
+    try:
+        for _ in range(email_outbox.EMAIL_OUTBOX_MAX_ATTEMPTS):
+            make_due(Session)
+            process_outbox(Session, script_url=f"{url}/exec")
+        make_due(Session)
+        assert process_outbox(Session, script_url=f"{url}/exec") == 0
+    finally:
+        server.shutdown()
+
+    email = rows(Session)[0]
+    assert (email.status, email.attempts) == ('failed', email_outbox.EMAIL_OUTBOX_MAX_ATTEMPTS)
+    assert len(StubScript.received) == email_outbox.EMAIL_OUTBOX_MAX_ATTEMPTS
+
+
+def test_expired_claim_is_sent_again():
+    engine, Session = make_session()
+    queue(Session, 2)
+    db = Session()
+    stuck, claimed = db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    stuck.status = claimed.status = 'sending'
+    stuck.next_attempt_at = datetime.now() - timedelta(seconds=1)
+    claimed.next_attempt_at = datetime.now() + timedelta(minutes=5)
+    db.commit()
+    db.close()
+
+    server, url = start_stub()
+    try:
+        assert process_outbox(Session, script_url=f"{url}/exec") == 1
+    finally:
+        server.shutdown()
+
+    assert [email.status for email in rows(Session)] == ['sent', 'sending']
+
+
+def test_without_script_url_nothing_is_claimed():
+    engine, Session = make_session()
+    queue(Session)
+    assert process_outbox(Session, script_url="") == 0
+    assert rows(Session)[0].status == 'pending'
+
+
+def test_batch_sends_many_recipients_per_post():
+    engine, Session = make_session()
+    queue(Session, 12)
+    server, url = start_stub()
+    try:
+        assert process_outbox(Session, script_url=f"{url}/exec", batch_messages=5, max_wait_seconds=0) == 12
+    finally:
+        server.shutdown()
+
+    # 12 correos de a 5 por POST: 3 llamadas en vez de 12
+    assert StubScript.posts == 3
+    assert len(StubScript.received) == 12
+    assert [email.status for email in rows(Session)] == ['sent'] * 12
+
+
+def test_batch_records_each_result():
+    engine, Session = make_session()
+    queue(Session, 2)
+    queue(Session, 1, prefix="rebota")
+    server, url = start_stub()
+    try:
+        process_outbox(Session, script_url=f"{url}/exec", batch_messages=10, max_wait_seconds=0)
+    finally:
+        server.shutdown()
+
+    assert StubScript.posts == 1
+    sent, also_sent, bounced = rows(Session)
+    assert sent.status == also_sent.status == 'sent'
+    assert (bounced.status, bounced.attempts) == ('pending', 1)
+    assert "buzón lleno" in bounced.last_error
+
+
+def test_batch_without_script_support_is_retried():
+    engine, Session = make_session()
+    queue(Session, 2)
+    server, url = start_stub(batch_support=False)
+    try:
+        process_outbox(Session, script_url=f"{url}/exec", batch_messages=10, max_wait_seconds=0)
+    finally:
+        server.shutdown()
+
+    # Un 200 sin "results" no cuenta como enviado
+    for email in rows(Session):
+        assert (email.status, email.attempts) == ('pending', 1)
+        assert "lote inválida" in email.last_error
+
+
+def test_batch_flushes_on_size_or_time():
+    engine, Session = make_session()
+    server, url = start_stub()
+    try:
+        # Nada listo: no espera
+        started = clock.monotonic()
+        assert process_outbox(Session, script_url=f"{url}/exec", batch_messages=5, max_wait_seconds=30) == 0
+        assert clock.monotonic() - started < 5
+
+        # Lote lleno: sale sin esperar el tiempo máximo
+        queue(Session, 5)
+        started = clock.monotonic()
+        assert process_outbox(Session, script_url=f"{url}/exec", batch_messages=5, max_wait_seconds=30) == 5
+        assert clock.monotonic() - started < 5
+
+        # Un solo correo: espera a que cumpla el tiempo máximo y sale solo
+        queue(Session, 1, prefix="tarde")
+        started = clock.monotonic()
+        assert process_outbox(Session, script_url=f"{url}/exec", batch_messages=5, max_wait_seconds=0.3) == 1
+        assert clock.monotonic() - started >= 0.25
+    finally:
+        server.shutdown()
+
+    assert StubScript.posts == 2
+
+
+def age_rows(Session, statuses, sent_days_ago):
+    """Pone status y sent_at (hace N días; None = sin enviar) a cada fila"""
+    db = Session()
+    for email, status, days in zip(db.query(EmailOutbox).order_by(EmailOutbox.id), statuses, sent_days_ago):
+        email.status = status
+        email.sent_at = None if days is None else datetime.now() - timedelta(days=days)
+    db.commit()
+    db.close()
+
+
+def test_old_sent_emails_are_pruned_in_batches():
+    engine, Session = make_session()
+    queue(Session, 5)
+    age_rows(Session, ['sent', 'sent', 'sent', 'failed', 'pending'], [40, 31, 2, None, None])
+
+    db = Session()
+    assert prune_sent_emails(db, retention_days=30, batch_size=1) == 2
+    assert prune_sent_emails(db, retention_days=0) == 0
+    db.close()
+    assert [email.status for email in rows(Session)] == ['sent', 'failed', 'pending']
+
+
+def test_sender_pass_prunes_sent_emails():
+    engine, Session = make_session()
+    queue(Session, 2)
+    age_rows(Session, ['sent', 'sent'], [40, 1])
+    # Como si el proceso recién arrancara
+    email_outbox._last_prune_at = None
+
+    # Nada pendiente: no se contacta al script, pero igual se limpia
+    assert process_outbox(Session, script_url="http://127.0.0.1:9/exec") == 0
+    assert len(rows(Session)) == 1
+
+    # Dentro del intervalo no se vuelve a limpiar
+    age_rows(Session, ['sent'], [40])
+    process_outbox(Session, script_url="http://127.0.0.1:9/exec")
+    assert len(rows(Session)) == 1
+
+
+def test_retry_delay_is_exponential_and_capped():
+    base = email_outbox.EMAIL_OUTBOX_RETRY_BASE_SECONDS
+    assert retry_delay(1) == timedelta(seconds=base)
+    assert retry_delay(3) == timedelta(seconds=base * 4)
+    assert retry_delay(50) == timedelta(seconds=email_outbox.EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+
+
+def test_transport_stays_on_its_event_loop():
+    server, url = start_stub()
+    # El event loop "del servidor", en otro hilo
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    transport = AsyncEmailTransport()
+
+    async def start():
+        transport.start()
+
+    try:
+        asyncio.run_coroutine_threadsafe(start(), loop).result(5)
+        client = transport._client
+
+        # Desde otro loop no se reemplaza el cliente; para eso está submit()
+        try:
+            asyncio.run(transport.send(f"{url}/exec", "Asunto", "a@example.com", "<p>a</p>"))
+            raise AssertionError("Se esperaba RuntimeError")
+        except RuntimeError:
+            pass
+        assert transport._client is client and transport._loop is loop
+
+        transport.submit(f"{url}/exec", "Asunto", "b@example.com", "<p>b</p>")
+        deadline = clock.monotonic() + 5
+        while not StubScript.received and clock.monotonic() < deadline:
+            clock.sleep(0.01)
+        assert [message["to"] for message in StubScript.received] == ["b@example.com"]
+
+        # aclose desde otro loop cierra el cliente en el suyo
+        asyncio.run(transport.aclose())
+        assert client.is_closed and transport._client is None
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_enqueue_belongs_to_the_transaction()
+    test_sender_delivers_over_one_connection()
+    test_sender_caps_concurrency()
+    test_sender_follows_redirects()
+    test_failure_backs_off_then_succeeds()
+    test_gives_up_after_max_attempts()
+    test_expired_claim_is_sent_again()
+    test_without_script_url_nothing_is_claimed()
+    test_batch_sends_many_recipients_per_post()
+    test_batch_records_each_result()
+    test_batch_without_script_support_is_retried()
+    test_batch_flushes_on_size_or_time()
+    test_old_sent_emails_are_pruned_in_batches()
+    test_sender_pass_prunes_sent_emails()
+    test_retry_delay_is_exponential_and_capped()
+    test_transport_stays_on_its_event_loop()
+    print("✅ Outbox de correos OK")
@@ -0,0 +1,76 @@
+"""
+Templates de correo compilados: huecos escapados y registro.
+
+Uso:
+    python test_email_templates.py
+    pytest test_email_templates.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+from app.utils import email_service
+from app.utils.email_templates import TEMPLATES, CompiledTemplate, register_template, render_template
+
+
+def test_customer_names_are_escaped():
+    body = email_service.get_new_appointment_request_admin_template(
+        worker_name="Gina",
+        customer_name='<script>alert("x")</script> & Co',
+        service_name="Gel",
+        date="2025-01-25",
+        time="10:00:00"
+    )
+    assert "<script>" not in body
+    # El nombre aparece dos veces y se escapa en ambas
+    assert body.count("&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; Co") == 2
+    # El HTML propio del template no se toca
+    assert "<strong>Gina</strong>" in body
+
+
+def test_every_helper_renders_its_values():
+    bodies = [
+        email_service.get_confirmation_template("Ana", "Gel", "2025-01-25", "10:00:00"),
+        email_service.get_update_template("Ana", "Gel", "2025-01-25", "10:00:00", "Hora actualizada"),
+        email_service.get_cancellation_template("Ana", "Gel", "2025-01-25", "10:00:00"),
+        email_service.get_request_received_template("Ana", "Gel", "2025-01-25", "10:00:00"),
+        email_service.get_completion_template("Ana", "Gel"),
+    ]
+    for body in bodies:
+        assert "<strong>Ana</strong>" in body and "Gel" in body
+        assert body.strip().startswith("<html>") and body.strip().endswith("</html>")
+        assert "{" not in body
+
+    assert "Hora actualizada" in bodies[1]
+    assert "123456" in email_service.get_reset_password_template("Ana", "123456")
+
+
+def test_template_is_split_once_into_chunks_and_slots():
+    template = CompiledTemplate("prueba", "<p>{a}</p><p>{b}{a}</p>")
+    assert template.slot_names == {"a", "b"}
+    assert template.chunk_count == 3
+    assert template.render(a="<1>", b=2) == "<p>&lt;1&gt;</p><p>2&lt;1&gt;</p>"
+
+    assert CompiledTemplate("uno", "{a}").render(a="x") == "x"
+    assert CompiledTemplate("fijo", "<p>fijo</p>").render() == "<p>fijo</p>"
+
+
+def test_missing_or_unknown_values_fail():
+    with pytest.raises(KeyError):
+        render_template("completion", customer_name="Ana")
+    with pytest.raises(KeyError):
+        render_template("completion", customer_name="Ana", service_name="Gel", extra="x")
+
+
+def test_registry_rejects_duplicates_and_bad_slots():
+    assert {"confirmation", "update", "cancellation", "reset_password"} <= TEMPLATES.keys()
+    with pytest.raises(ValueError):
+        register_template("confirmation", "<p>{customer_name}</p>")
+    with pytest.raises(ValueError):
+        CompiledTemplate("formato", "<p>{price:.2f}</p>")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+"""
+Idempotency-Key en POST /appointments.
+
+Usa la base SQLite en memoria de conftest.py y llama a
+`create_appointment` directamente.
+
+Uso:
+    python test_idempotency_key.py
+    pytest test_idempotency_key.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import json
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from fastapi.responses import JSONResponse
+
+from app.models.appointment import Appointment
+from app.models.customer import Customer
+from app.models.email_outbox import EmailOutbox
+from app.models.idempotency import IdempotencyKey
+from app.routers.appointment import AppointmentCreate, AppointmentResponse, create_appointment
+from conftest import make_session
+
+
+def booking(hour=10, customer_id=1):
+    return AppointmentCreate(
+        worker_id=1,
+        customer_id=customer_id,
+        service_id=1,
+        additional_id=1,
+        date=date.today() + timedelta(days=7),
+        start_time=time(hour, 0)
+    )
+
+
+def test_retry_returns_stored_response():
+    engine, Session = make_session()
+    db = Session()
+
+    first_tasks = BackgroundTasks()
+    first = create_appointment(booking(), first_tasks, db=db, current_user=None, idempotency_key="abc-1")
+    first_body = AppointmentResponse.model_validate(first).model_dump(mode="json")
+    assert len(first_tasks.tasks) == 1
+
+    retry_tasks = BackgroundTasks()
+    retry = create_appointment(booking(), retry_tasks, db=db, current_user=None, idempotency_key="abc-1")
+
+    assert isinstance(retry, JSONResponse)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert json.loads(retry.body) == first_body
+    # Ni correos ni una segunda cita
+    assert retry_tasks.tasks == []
+    assert db.query(Appointment).count() == 1
+    assert db.query(EmailOutbox).count() == 2
+    db.close()
+
+
+def test_same_key_with_other_data_is_rejected():
+    engine, Session = make_session()
+    db = Session()
+
+    create_appointment(booking(10), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-2")
+    with pytest.raises(HTTPException) as error:
+        create_appointment(booking(15), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-2")
+
+    assert error.value.status_code == 422
+    assert db.query(Appointment).count() == 1
+    db.close()
+
+
+def test_expired_key_is_processed_again():
+    engine, Session = make_session()
+    db = Session()
+
+    create_appointment(booking(10), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-3")
+    stored = db.get(IdempotencyKey, (1, "abc-3"))
+    stored.expires_at = datetime.now() - timedelta(minutes=1)
+    db.commit()
+
+    tasks = BackgroundTasks()
+    again = create_appointment(booking(15), tasks, db=db, current_user=None, idempotency_key="abc-3")
+
+    assert not isinstance(again, JSONResponse)
+    assert len(tasks.tasks) == 1
+    assert db.query(Appointment).count() == 2
+    db.close()
+
+
+def test_same_key_from_another_customer_is_a_new_booking():
+    engine, Session = make_session()
+    db = Session()
+    db.add(Customer(id=2, name="Otra Cliente", email="otra@example.com"))
+    db.commit()
+
+    first = create_appointment(booking(10), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-4")
+    other = create_appointment(booking(15, customer_id=2), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-4")
+
+    assert not isinstance(other, JSONResponse)
+    assert (other.customer_id, other.id) == (2, first.id + 1)
+    assert db.query(IdempotencyKey).count() == 2
+
+    # El reintento de cada uno devuelve su propia cita
+    retry = create_appointment(booking(15, customer_id=2), BackgroundTasks(), db=db, current_user=None, idempotency_key="abc-4")
+    assert json.loads(retry.body)["id"] == other.id
+    db.close()
+
+
+def test_without_key_nothing_is_stored():
+    engine, Session = make_session()
+    db = Session()
+
+    create_appointment(booking(), BackgroundTasks(), db=db, current_user=None, idempotency_key=None)
+
+    assert db.query(IdempotencyKey).count() == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_retry_returns_stored_response()
+    test_same_key_with_other_data_is_rejected()
+    test_expired_key_is_processed_again()
+    test_same_key_from_another_customer_is_a_new_booking()
+    test_without_key_nothing_is_stored()
+    print("✅ Idempotency-Key OK")
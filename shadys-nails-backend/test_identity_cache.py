@@ -0,0 +1,199 @@
+"""
+Cache de identidad de las dependencias de auth.
+
+- El login incluye `worker_id` en el token.
+- Con el cache caliente, una ruta de worker no consulta `users` ni `workers`.
+- `update_me`, el reset de contraseña y la desactivación invalidan el cache.
+- El cache no guarda credenciales ni tokens; se cargan de la base si se leen.
+
+Uso:
+    python test_identity_cache.py
+    pytest test_identity_cache.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import time as clock
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.user import User
+from app.routers.auth import router as auth_router
+from app.routers.stats import router as stats_router
+from app.utils.identity_cache import SECRET_COLUMNS, IdentityCache, attach_snapshot, identity_cache
+from app.utils.security import decode_access_token, get_password_hash
+from conftest import count_queries, make_session
+
+PASSWORD = "secreta1"
+
+
+def make_client():
+    identity_cache.clear()
+    engine, Session = make_session()
+    db = Session()
+    db.add(User(
+        id=10, email="gina@example.com", password_hash=get_password_hash(PASSWORD),
+        name="Gina", role="worker", is_active=True
+    ))
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.include_router(stats_router)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    client = TestClient(app)
+    response = client.post("/auth/login", json={"email": "gina@example.com", "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    token = response.json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+    return engine, Session, client, token
+
+
+def identity_queries(statements):
+    return [
+        statement for statement in statements
+        if "FROM users" in statement or "FROM workers" in statement
+    ]
+
+
+def test_login_includes_worker_id():
+    engine, Session, client, token = make_client()
+    assert decode_access_token(token)["worker_id"] == 1
+
+
+def test_cached_request_skips_identity_queries():
+    engine, Session, client, token = make_client()
+
+    response, statements = count_queries(engine, lambda: client.get("/stats/today"))
+    assert response.status_code == 200
+    cold = identity_queries(statements)
+    # users por email + workers por clave primaria (claim worker_id)
+    assert len(cold) == 2, cold
+    assert "WHERE workers.id = " in cold[1]
+
+    response, statements = count_queries(engine, lambda: client.get("/stats/today"))
+    assert response.status_code == 200
+    assert identity_queries(statements) == []
+
+
+def test_update_me_invalidates_cache():
+    engine, Session, client, token = make_client()
+    assert client.get("/auth/me").json()["name"] == "Gina"
+
+    response = client.put("/auth/me", json={"name": "Gina R."})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Gina R."
+
+    assert identity_cache.get("gina@example.com", "user") is None
+    assert client.get("/auth/me").json()["name"] == "Gina R."
+
+
+def test_password_reset_invalidates_cache():
+    engine, Session, client, token = make_client()
+    client.get("/auth/me")
+
+    db = Session()
+    user = db.get(User, 10)
+    user.reset_token = "123456"
+    user.reset_token_expires = datetime.now() + timedelta(minutes=15)
+    db.commit()
+    db.close()
+    client.get("/auth/me")
+    assert identity_cache.get("gina@example.com", "user") is not None
+
+    response = client.post("/auth/reset-password", json={
+        "email": "gina@example.com", "code": "123456", "new_password": "otra-clave"
+    })
+    assert response.status_code == 200
+    assert identity_cache.get("gina@example.com", "user") is None
+
+
+def test_deactivation_invalidates_cache():
+    engine, Session, client, token = make_client()
+    assert client.get("/stats/today").status_code == 200
+
+    db = Session()
+    db.get(User, 10).is_active = False
+    db.commit()
+    db.close()
+
+    assert client.get("/stats/today").status_code == 403
+
+
+def test_rollback_keeps_cache():
+    engine, Session, client, token = make_client()
+    client.get("/auth/me")
+
+    db = Session()
+    db.get(User, 10).name = "Otra"
+    db.flush()
+    db.rollback()
+    db.close()
+
+    assert identity_cache.get("gina@example.com", "user")["name"] == "Gina"
+
+
+def test_credentials_are_not_cached():
+    engine, Session, client, token = make_client()
+    db = Session()
+    db.get(User, 10).reset_token = "123456"
+    db.commit()
+    db.close()
+    assert client.get("/stats/today").status_code == 200
+
+    for kind in ("user", "worker"):
+        snapshot = identity_cache.get("gina@example.com", kind)
+        assert snapshot is not None
+        assert not SECRET_COLUMNS & set(snapshot), kind
+    assert "password_hash" not in identity_cache.get("gina@example.com", "user")
+    assert "reset_token" not in identity_cache.get("gina@example.com", "user")
+
+    # El objeto reconstruido los carga de la base al leerlos
+    db = Session()
+    user, statements = count_queries(
+        engine, lambda: attach_snapshot(db, User, identity_cache.get("gina@example.com", "user"))
+    )
+    assert statements == []
+    assert user.reset_token == "123456"
+    assert user.password_hash.startswith("$")
+    db.close()
+
+
+def test_lru_and_ttl():
+    cache = IdentityCache(max_entries=2, ttl_seconds=0.05)
+    cache.set("a", "user", {"id": 1})
+    cache.set("b", "user", {"id": 2})
+    cache.get("a", "user")
+    cache.set("c", "user", {"id": 3})
+    assert cache.get("b", "user") is None
+    assert cache.get("a", "user") == {"id": 1}
+    assert cache.get("a", "worker") is None
+    assert cache.stats()["evictions"] == 1
+
+    clock.sleep(0.06)
+    assert cache.get("a", "user") is None
+
+
+if __name__ == "__main__":
+    test_login_includes_worker_id()
+    test_cached_request_skips_identity_queries()
+    test_update_me_invalidates_cache()
+    test_password_reset_invalidates_cache()
+    test_deactivation_invalidates_cache()
+    test_rollback_keeps_cache()
+    test_credentials_are_not_cached()
+    test_lru_and_ttl()
+    print("✅ Cache de identidad OK")
@@ -0,0 +1,119 @@
+"""
+Hashing de contraseñas: pool acotado y rehash al cambiar el costo de bcrypt.
+
+- Un login con un hash de otro costo guarda un hash nuevo con BCRYPT_ROUNDS.
+- Un login fallido no toca el hash.
+- El pool nunca corre más de PASSWORD_HASH_WORKERS tareas a la vez.
+
+Uso:
+    python test_password_hashing.py
+    pytest test_password_hashing.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import threading
+import time as clock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from app.database import get_db
+from app.models.user import User
+from app.routers.auth import router as auth_router
+from app.utils import security
+from conftest import make_session
+
+PASSWORD = "secreta1"
+# Costo distinto al configurado (y barato para el test)
+OLD_ROUNDS = 4 if security.BCRYPT_ROUNDS != 4 else 5
+
+
+def make_client():
+    engine, Session = make_session()
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=OLD_ROUNDS).hash(PASSWORD)
+    db = Session()
+    db.add(User(
+        id=10, email="gina@example.com", password_hash=old_hash,
+        name="Gina", role="worker", is_active=True
+    ))
+    db.commit()
+    db.close()
+
+    app = FastAPI()
+    app.include_router(auth_router)
+
+    def override_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_db
+    return Session, TestClient(app), old_hash
+
+
+def stored_hash(Session):
+    db = Session()
+    try:
+        return db.get(User, 10).password_hash
+    finally:
+        db.close()
+
+
+def rounds_of(password_hash):
+    return int(password_hash.split("$")[2])
+
+
+def test_login_rehashes_when_cost_changes():
+    Session, client, old_hash = make_client()
+
+    response = client.post("/auth/login", json={"email": "gina@example.com", "password": PASSWORD})
+    assert response.status_code == 200, response.text
+
+    new_hash = stored_hash(Session)
+    assert new_hash != old_hash
+    assert rounds_of(new_hash) == security.BCRYPT_ROUNDS
+    assert security.verify_password(PASSWORD, new_hash)
+
+    # Con el costo ya al día no se vuelve a escribir
+    assert client.post("/auth/login", json={"email": "gina@example.com", "password": PASSWORD}).status_code == 200
+    assert stored_hash(Session) == new_hash
+
+
+def test_failed_login_keeps_hash():
+    Session, client, old_hash = make_client()
+
+    response = client.post("/auth/login", json={"email": "gina@example.com", "password": "incorrecta"})
+    assert response.status_code == 401
+    assert stored_hash(Session) == old_hash
+
+
+def test_pool_caps_concurrency():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def task():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        clock.sleep(0.02)
+        with lock:
+            running -= 1
+
+    futures = [security.password_pool.submit(task) for _ in range(security.PASSWORD_HASH_WORKERS * 4)]
+    for future in futures:
+        future.result()
+    assert peak <= security.PASSWORD_HASH_WORKERS
+
+
+if __name__ == "__main__":
+    test_login_rehashes_when_cost_changes()
+    test_failed_login_keeps_hash()
+    test_pool_caps_concurrency()
+    print(f"✅ bcrypt con costo {security.BCRYPT_ROUNDS} y {security.PASSWORD_HASH_WORKERS} hilos")
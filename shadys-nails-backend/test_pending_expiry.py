@@ -0,0 +1,186 @@
+"""
+Vencimiento de solicitudes pendientes (app/utils/pending_expiry.py).
+
+- Solo se cancelan las 'pending' creadas hace más de PENDING_TTL_HOURS.
+- Un UPDATE y un INSERT al outbox por lote, sin consultas por cita.
+- El rollup diario queda igual que recalculado desde cero.
+- Se invalida la disponibilidad de los (worker, día) liberados.
+- Una cita vencida no se puede confirmar ni completar después (409).
+
+Uso:
+    python test_pending_expiry.py
+    pytest test_pending_expiry.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.models.appointment import Appointment
+from app.models.daily_worker_stats import DailyWorkerStats
+from app.models.email_outbox import EmailOutbox
+from app.routers.appointment import complete_appointment_status, confirm_appointment_status
+from app.utils.availability_cache import DayResult, availability_cache
+from app.utils.daily_stats import rebuild_daily_stats
+from app.utils.pending_expiry import expire_stale_pending
+from conftest import count_queries, make_session
+
+WORKER = SimpleNamespace(id=1, role="worker")
+FIRST_DAY = date.today() + timedelta(days=3)
+SECOND_DAY = date.today() + timedelta(days=4)
+
+
+def add_appointment(db, appointment_id, day, status, age_hours, start=time(10, 0)):
+    db.add(Appointment(
+        id=appointment_id, worker_id=1, customer_id=1, service_id=1,
+        date=day, start_time=start, end_time=time(start.hour + 1, 0), status=status,
+        service_price=30000, duration_minutes=60,
+        created_at=datetime.now(timezone.utc) - timedelta(hours=age_hours)
+    ))
+
+
+def seed(Session):
+    db = Session()
+    add_appointment(db, 1, FIRST_DAY, 'pending', age_hours=30)
+    add_appointment(db, 2, SECOND_DAY, 'pending', age_hours=50)
+    add_appointment(db, 3, FIRST_DAY, 'pending', age_hours=1, start=time(12, 0))
+    add_appointment(db, 4, FIRST_DAY, 'confirmed', age_hours=30, start=time(14, 0))
+    db.flush()
+    rebuild_daily_stats(db)
+    db.commit()
+    db.close()
+
+
+def statuses(Session):
+    db = Session()
+    try:
+        return {appointment.id: appointment.status for appointment in db.query(Appointment)}
+    finally:
+        db.close()
+
+
+def rollup(Session):
+    db = Session()
+    try:
+        return sorted(
+            (row.worker_id, row.date, row.total_count, row.pending_count, row.confirmed_count,
+             row.cancelled_count, row.estimated_revenue, row.pending_revenue)
+            for row in db.query(DailyWorkerStats)
+        )
+    finally:
+        db.close()
+
+
+def test_only_stale_pending_requests_expire_in_bulk():
+    engine, Session = make_session()
+    seed(Session)
+
+    expired, statements = count_queries(engine, lambda: expire_stale_pending(Session, ttl_hours=24))
+
+    assert expired == 2
+    assert statuses(Session) == {1: 'cancelled', 2: 'cancelled', 3: 'pending', 4: 'confirmed'}
+
+    select_statement = statements[0]
+    assert "appointments.status = " in select_statement and "appointments.created_at < " in select_statement
+    assert sum(statement.startswith("UPDATE appointments") for statement in statements) == 1
+    assert sum(statement.startswith("INSERT INTO email_outbox") for statement in statements) == 1
+    # SELECT, UPDATE, un UPSERT del rollup por día tocado y el INSERT al outbox
+    assert len(statements) == 5
+
+    db = Session()
+    subjects = [email.subject for email in db.query(EmailOutbox)]
+    db.close()
+    assert len(subjects) == 2 and all("venció" in subject for subject in subjects)
+
+
+def test_rollup_matches_a_rebuild():
+    engine, Session = make_session()
+    seed(Session)
+    expire_stale_pending(Session, ttl_hours=24)
+
+    incremental = rollup(Session)
+    db = Session()
+    rebuild_daily_stats(db)
+    db.commit()
+    db.close()
+    assert incremental == rollup(Session)
+
+
+def test_touched_days_are_invalidated():
+    engine, Session = make_session()
+    seed(Session)
+    free = DayResult(False, None, (600,))
+    availability_cache.set(1, FIRST_DAY, 60, free)
+    availability_cache.set(1, SECOND_DAY, 60, free)
+    untouched = FIRST_DAY + timedelta(days=7)
+    availability_cache.set(1, untouched, 60, free)
+    try:
+        expire_stale_pending(Session, ttl_hours=24)
+        assert availability_cache.get(1, FIRST_DAY, 60) is None
+        assert availability_cache.get(1, SECOND_DAY, 60) is None
+        assert availability_cache.get(1, untouched, 60) == free
+    finally:
+        availability_cache.clear()
+
+
+def test_expired_request_cannot_be_confirmed_afterwards():
+    engine, Session = make_session()
+    seed(Session)
+    expire_stale_pending(Session, ttl_hours=24)
+    free = DayResult(False, None, (600,))
+    availability_cache.set(1, FIRST_DAY, 60, free)
+
+    db = Session()
+    try:
+        for change in (confirm_appointment_status, complete_appointment_status):
+            with pytest.raises(HTTPException) as error:
+                change(1, BackgroundTasks(), db=db, current_worker=WORKER)
+            assert error.value.status_code == 409
+            db.rollback()
+        emails_after_expiry = db.query(EmailOutbox).count()
+
+        # La pendiente que no venció sí se confirma, y el día se invalida
+        confirmed = confirm_appointment_status(3, BackgroundTasks(), db=db, current_worker=WORKER)
+        assert confirmed.status == 'confirmed'
+        assert availability_cache.get(1, FIRST_DAY, 60) is None
+        assert db.query(EmailOutbox).count() == emails_after_expiry + 1
+    finally:
+        db.close()
+        availability_cache.clear()
+
+    assert statuses(Session) == {1: 'cancelled', 2: 'cancelled', 3: 'confirmed', 4: 'confirmed'}
+    incremental = rollup(Session)
+    db = Session()
+    rebuild_daily_stats(db)
+    db.commit()
+    db.close()
+    assert incremental == rollup(Session)
+
+
+def test_batches_until_nothing_is_left():
+    engine, Session = make_session()
+    db = Session()
+    for appointment_id in range(1, 6):
+        add_appointment(db, appointment_id, FIRST_DAY, 'pending', age_hours=30, start=time(8 + appointment_id, 0))
+    db.commit()
+    db.close()
+
+    assert expire_stale_pending(Session, ttl_hours=24, batch_size=2) == 5
+    assert set(statuses(Session).values()) == {'cancelled'}
+
+
+def test_zero_ttl_disables_expiry():
+    engine, Session = make_session()
+    seed(Session)
+    assert expire_stale_pending(Session, ttl_hours=0) == 0
+    assert statuses(Session)[2] == 'pending'
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,70 @@
+"""
+Configuración en memoria con recarga por mtime del `.env`.
+
+Uso:
+    python test_settings_reload.py
+    pytest test_settings_reload.py
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import tempfile
+from pathlib import Path
+
+from app.utils import email_service
+from app.utils import settings as settings_module
+from app.utils.settings import SettingsStore
+
+
+def write_env(path, text, mtime_ns):
+    path.write_text(text)
+    # mtime explícito: dos escrituras seguidas pueden caer en el mismo tick del reloj
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_when_dotenv_changes():
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / ".env"
+        write_env(path, "GOOGLE_SCRIPT_URL=https://example.com/a\n", 1_000_000_000)
+        store = SettingsStore(path)
+        assert store.get().google_script_url == "https://example.com/a"
+        assert store.get().email_enabled
+
+        # Sin cambios no se vuelve a leer
+        assert not store.reload_if_changed()
+
+        write_env(path, "GOOGLE_SCRIPT_URL=https://example.com/b\nEMAIL_ENABLED=false\n", 2_000_000_000)
+        assert store.reload_if_changed()
+        assert store.get().google_script_url == "https://example.com/b"
+        assert not store.get().email_enabled
+
+        path.unlink()
+        assert store.reload_if_changed()
+
+
+def test_dotenv_overrides_process_environment(monkeypatch):
+    monkeypatch.setenv("GOOGLE_SCRIPT_URL", "https://example.com/proceso")
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / ".env"
+        assert SettingsStore(path).get().google_script_url == "https://example.com/proceso"
+
+        write_env(path, "GOOGLE_SCRIPT_URL=https://example.com/dotenv\n", 1_000_000_000)
+        assert SettingsStore(path).get().google_script_url == "https://example.com/dotenv"
+
+
+def test_email_path_reads_settings_from_memory(monkeypatch):
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / ".env"
+        write_env(path, "GOOGLE_SCRIPT_URL=https://example.com/memoria\n", 1_000_000_000)
+        monkeypatch.setattr(settings_module, "settings_store", SettingsStore(path))
+
+        # Aunque el archivo desaparezca, el envío sigue usando lo cargado
+        path.unlink()
+        assert email_service._get_script_url() == "https://example.com/memoria"
+        assert email_service._is_email_enabled()
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))